@@ -0,0 +1,86 @@
+# encoding: utf-8
+
+"""Splitting and decoding a response as bytes compared to response.text
+
+``response.text`` guesses the charset from the body when the Content-Type has none,
+and decodes the whole body to one str before it is split. The bytes path splits
+``response.content`` on the line ends and gives every line to the decoder as bytes.
+
+Usage::
+
+    python -m benchmarks.bench_bytes [number of records] [content type]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+import requests
+from requests.utils import get_encoding_from_headers
+
+from biblio.biblio import parse_result, iter_ndjson
+
+from .fixtures import export_text
+
+
+def response(body, content_type):
+    """A response like the adapter builds it, with the body already read"""
+    result = requests.Response()
+    result.status_code = 200
+    result.headers['Content-Type'] = content_type
+    result.encoding = get_encoding_from_headers(result.headers)
+    result._content = body  # pylint: disable=protected-access
+
+    return result
+
+
+def measure(function, repeat=3):
+    """Time a call, and trace the memory blocks that it allocates
+
+    Returns:
+        tuple: The best seconds, the number of blocks and MiB in the result, and the peak MiB
+    """
+    elapsed = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = min(elapsed, time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(x.count for x in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    del result
+
+    return elapsed, blocks, current / 1024.0 / 1024, peak / 1024.0 / 1024
+
+
+def main(count=100000, content_type='application/x-ndjson'):
+    body = export_text(count).encode('utf-8')
+    text = response(body, content_type)
+    raw = response(body, content_type)
+
+    print('records:      {0}'.format(count))
+    print('body:         {0:.1f} MiB, Content-Type {1}, encoding {2}'.format(
+        len(body) / 1024.0 / 1024, content_type, text.encoding
+    ))
+    print('{0:28} {1:>9} {2:>10} {3:>10} {4:>10}'.format('', 'seconds', 'blocks', 'MiB', 'peak MiB'))
+
+    cases = [
+        ('lines, response.text', lambda: list(iter_ndjson(text.text))),
+        ('lines, response.content', lambda: list(iter_ndjson(raw.content))),
+        ('parse_result, text', lambda: parse_result(text.text, many=True)),
+        ('parse_result, bytes', lambda: parse_result(raw.content, many=True)),
+    ]
+
+    for name, function in cases:
+        print('{0:28} {1:9.3f} {2:10} {3:10.1f} {4:10.1f}'.format(name, *measure(function)))
+
+
+if __name__ == '__main__':
+    main(*[int(x) if x.isdigit() else x for x in sys.argv[1:]])
@@ -0,0 +1,57 @@
+# encoding: utf-8
+
+"""Decode throughput of json_string_to_namedtuple
+
+Compares the decoder that creates a new named tuple type for every object
+with the decoder that reuses the types from the record type registry.
+
+Usage::
+
+    python -m benchmarks.bench_decode [number of records]
+"""
+
+import json
+import sys
+import time
+from collections import namedtuple
+
+from biblio.biblio import json_string_to_namedtuple, normalize_key, RECORD_TYPES
+
+from .fixtures import export_lines
+
+
+def legacy_dictionary_to_namedtuple(item):
+    """The decoder as it was before the record type registry"""
+    normalized = dict((normalize_key(key), value) for key, value in item.items())
+    return namedtuple('d', normalized.keys())(*normalized.values())
+
+
+def legacy_json_string_to_namedtuple(string):
+    return json.loads(string, object_hook=legacy_dictionary_to_namedtuple)
+
+
+def measure(decode, lines):
+    start = time.perf_counter()
+
+    for line in lines:
+        decode(line)
+
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main(count=10000):
+    lines = export_lines(count)
+
+    before = measure(legacy_json_string_to_namedtuple, lines)
+    RECORD_TYPES.clear()
+    after = measure(json_string_to_namedtuple, lines)
+
+    print('records:        {0}'.format(count))
+    print('before:         {0:10.0f} records/sec'.format(before))
+    print('after:          {0:10.0f} records/sec'.format(after))
+    print('speedup:        {0:10.1f}x'.format(after / before))
+    print('registry:       {0}'.format(RECORD_TYPES.info()))
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,74 @@
+# encoding: utf-8
+
+"""Lookups in the PublicationIndex compared to a scan over the publications
+
+Usage::
+
+    python -m benchmarks.bench_index [number of records]
+"""
+
+import sys
+import time
+
+from biblio.biblio import json_string_to_namedtuple
+from biblio.index import PublicationIndex, tokenize
+
+from .fixtures import export_lines
+
+
+def scan(publications, year=None, author=None, text=None):
+    """Filter the publications with a loop, the way it was done without the index"""
+    words = tokenize(text) if text else set()
+    result = []
+
+    for publication in publications:
+        if year is not None and publication.year != str(year):
+            continue
+
+        if author is not None and not any(author in x.ugent_id for x in publication.author):
+            continue
+
+        if words and not words <= tokenize(publication.title + ' ' + ' '.join(publication.abstract)):
+            continue
+
+        result.append(publication)
+
+    return result
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        result = function()
+
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main(count=100000):
+    publications = [json_string_to_namedtuple(x) for x in export_lines(count)]
+
+    start = time.perf_counter()
+    index = PublicationIndex(publications)
+    print('records:        {0}'.format(count))
+    print('build index:    {0:10.0f} ms'.format((time.perf_counter() - start) * 1000))
+
+    queries = [
+        ('where(year=2015)', dict(year=2015)),
+        ('where(year, author)', dict(year=2015, author='802000000042')),
+        ('text(2 words)', dict(text='readability cyberbullying')),
+        ('where(year, author, text)', dict(year=2015, author='802000000042', text='readability')),
+    ]
+
+    for name, query in queries:
+        expected, scanned = timed(lambda: scan(publications, **query), 1)
+        result, indexed = timed(lambda: index.where(**query), 20)
+
+        assert [x.id for x in result] == [x.id for x in expected]
+        print('{0:27} scan {1:9.1f} ms   index {2:7.2f} ms   {3} results'.format(
+            name, scanned, indexed, len(result)
+        ))
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,78 @@
+# encoding: utf-8
+
+"""Decode time of the json backends
+
+Decodes an export with every installed json backend, checks that the result is
+the same, field for field, as the object_hook decoder, and reports the throughput.
+
+Usage::
+
+    python -m benchmarks.bench_json_backends [number of records | path to an export]
+"""
+
+import json
+import sys
+import time
+
+from biblio.biblio import JSON_BACKENDS, set_json_backend, json_string_to_namedtuple, dictionary_to_namedtuple
+
+from .fixtures import export_lines
+
+
+def hook_json_string_to_namedtuple(string):
+    """The decoder as it was before the json backends, converting in an object_hook"""
+    return json.loads(string, object_hook=dictionary_to_namedtuple)
+
+
+def same(first, second):
+    """Compare decoded values, including the names of the fields"""
+    if hasattr(first, '_fields'):
+        return getattr(second, '_fields', None) == first._fields and \
+            all(same(x, y) for x, y in zip(first, second))
+
+    if isinstance(first, list):
+        return isinstance(second, list) and len(first) == len(second) and \
+            all(same(x, y) for x, y in zip(first, second))
+
+    return type(first) is type(second) and first == second
+
+
+def measure(decode, lines):
+    start = time.perf_counter()
+
+    for line in lines:
+        decode(line)
+
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main(source='20000'):
+    if source.isdigit():
+        lines = export_lines(int(source))
+    else:
+        with open(source) as export:
+            lines = [x for x in export.read().split('\n') if x]
+
+    speed = measure(hook_json_string_to_namedtuple, lines)
+    print('records:        {0}'.format(len(lines)))
+    print('object_hook:    {0:10.0f} records/sec'.format(speed))
+
+    for name in JSON_BACKENDS:
+        try:
+            set_json_backend(name)
+        except ImportError:
+            print('{0:15} not installed'.format(name + ':'))
+            continue
+
+        speed = measure(json_string_to_namedtuple, lines)
+
+        if not all(same(hook_json_string_to_namedtuple(x), json_string_to_namedtuple(x)) for x in lines):
+            raise AssertionError('{0} does not decode the same as the object_hook decoder'.format(name))
+
+        print('{0:15} {1:10.0f} records/sec, identical output'.format(name + ':', speed))
+
+    set_json_backend()
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
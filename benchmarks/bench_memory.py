@@ -0,0 +1,56 @@
+# encoding: utf-8
+
+"""Memory used by decoded exports
+
+Compares the named tuples of json_string_to_namedtuple, with and without the
+record type registry, with the Publication model.
+
+Usage::
+
+    python -m benchmarks.bench_memory [number of records] [0 to skip the type per object]
+
+A named tuple type per object needs about 40 KiB per record, so skip it for large counts
+on machines with less than 8 GiB of memory.
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from biblio.biblio import json_string_to_namedtuple
+from biblio.models import publication_from_json
+
+from .bench_decode import legacy_json_string_to_namedtuple
+from .fixtures import export_lines
+
+
+def measure(decode, lines):
+    gc.collect()
+    tracemalloc.start()
+    records = [decode(line) for line in lines]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def main(count=10000, legacy=1):
+    lines = export_lines(count)
+
+    namedtuples = measure(json_string_to_namedtuple, lines)
+    models = measure(publication_from_json, lines)
+
+    print('records:                           {0}'.format(count))
+
+    if legacy:
+        print('namedtuple, a type per object:     {0:10.1f} MiB'.format(
+            measure(legacy_json_string_to_namedtuple, lines) / 1024.0 / 1024
+        ))
+
+    print('namedtuple, shared types:          {0:10.1f} MiB'.format(namedtuples / 1024.0 / 1024))
+    print('Publication:                       {0:10.1f} MiB'.format(models / 1024.0 / 1024))
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
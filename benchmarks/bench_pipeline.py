@@ -0,0 +1,53 @@
+# encoding: utf-8
+
+"""Decoding an export in a DecodePipeline compared to decoding it in one process
+
+The records per second should grow with the number of workers, up to the number of cores.
+The main process still unpickles every record, which limits the speedup.
+
+Usage::
+
+    python -m benchmarks.bench_pipeline [number of records] [workers ...]
+"""
+
+import os
+import sys
+import time
+
+from biblio.models import publication_from_json
+from biblio.pipeline import DecodePipeline
+
+from .fixtures import export_lines
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+
+    return result, time.perf_counter() - start
+
+
+def main(count=100000, *workers):
+    lines = [x.encode('utf-8') for x in export_lines(count)]
+    cores = os.cpu_count() or 1
+    workers = workers or sorted({1, 2, 4, cores})
+
+    expected, single = timed(lambda: [publication_from_json(x) for x in lines])
+    print('records:    {0}'.format(count))
+    print('cores:      {0}'.format(cores))
+    print('one process        {0:8.2f} s  {1:9.0f} records/s'.format(single, count / single))
+
+    for max_workers in workers:
+        with DecodePipeline(max_workers=max_workers) as pipeline:
+            # start the processes before timing
+            list(pipeline.decode(lines[:max_workers]))
+            result, elapsed = timed(lambda: list(pipeline.decode(lines)))
+
+        assert result == expected
+        print('{0:2} workers         {1:8.2f} s  {2:9.0f} records/s  {3:5.2f}x'.format(
+            max_workers, elapsed, count / elapsed, single / elapsed
+        ))
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,81 @@
+# encoding: utf-8
+
+"""Fixtures of the benchmark suite
+
+All the responses are synthetic, generated by :mod:`benchmarks.fixtures` once per session,
+not recorded from the API. They are served by the stub server of the tests,
+with the latency and bandwidth given on the command line::
+
+    pytest benchmarks --stub-latency 0.05 --stub-bandwidth 1000000
+"""
+
+import json
+
+import pytest
+
+from biblio.biblio import BiblioClient
+from biblio.tests.stub import StubResponse, StubServer
+
+from .fixtures import export_text, publication_dict
+
+PUBLICATION_ID = 7175390
+PERSON_ID = 801001
+ORGANISATION_ID = 'LW17'
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('biblio benchmarks')
+    group.addoption('--stub-latency', type=float, default=0,
+                    help='Seconds the stub server waits before answering a request')
+    group.addoption('--stub-bandwidth', type=int, default=None,
+                    help='Bytes per second the stub server sends, unlimited by default')
+    group.addoption('--export-size', type=int, default=100000,
+                    help='Number of records in the synthetic organisation export')
+
+
+@pytest.fixture(scope='session')
+def publication_text():
+    """A single synthetic publication, indented like the API does"""
+    publication = publication_dict(PUBLICATION_ID - 1000000)
+    return json.dumps(publication, indent=2) + '\n'
+
+
+@pytest.fixture(scope='session')
+def person_export_text():
+    """A small synthetic person export of 25 records"""
+    return export_text(25)
+
+
+@pytest.fixture(scope='session')
+def organisation_export_text(request):
+    """A synthetic organisation export, 100k records unless --export-size is given"""
+    return export_text(request.config.getoption('--export-size'))
+
+
+@pytest.fixture(scope='session')
+def stub(request, publication_text, person_export_text):
+    """A stub server with the small responses, the organisation export is added by the tests that need it"""
+    routes = {
+        '/publication/{0}'.format(PUBLICATION_ID): StubResponse(publication_text),
+        '/person/{0}/publication/export'.format(PERSON_ID): StubResponse(person_export_text),
+    }
+
+    with StubServer(routes, request.config.getoption('--stub-latency'),
+                    request.config.getoption('--stub-bandwidth')) as server:
+        yield server
+
+
+@pytest.fixture
+def organisation_stub(stub, organisation_export_text):
+    path = '/organization/{0}/publication/export'.format(ORGANISATION_ID)
+    stub.routes[path] = StubResponse(organisation_export_text.encode('utf-8'))
+
+    yield stub
+
+    del stub.routes[path]
+
+
+@pytest.fixture
+def client(stub):
+    with BiblioClient(base_url=stub.url, scheduler=False) as client:
+        yield client
@@ -0,0 +1,82 @@
+# encoding: utf-8
+
+"""Synthetic API responses, shaped like the records returned by the Biblio API"""
+
+import json
+import random
+
+TYPES = ['journalArticle', 'conference', 'bookChapter', 'book', 'dissertation', 'misc']
+
+WORDS = [
+    'language', 'translation', 'corpus', 'machine', 'learning', 'terminology', 'readability',
+    'sentiment', 'analysis', 'neural', 'network', 'evaluation', 'dutch', 'english', 'cyberbullying',
+    'detection', 'social', 'media', 'parallel', 'alignment', 'semantic', 'lexical', 'events',
+]
+
+
+def _sentence(rnd, length):
+    return ' '.join(rnd.choice(WORDS) for _ in range(length))
+
+
+def publication_dict(number, rnd=None):
+    """Build a single publication as it is returned by the API
+
+    Args:
+        number (int): Used to derive the id of the publication
+        rnd (random.Random): The random generator to use
+
+    Returns:
+        dict: The publication
+    """
+    rnd = rnd or random.Random(number)
+    authors = [
+        {
+            'first_name': rnd.choice(['Orphée', 'Veronique', 'Els', 'Bart', 'Lieve']),
+            'last_name': rnd.choice(['De Clercq', 'Hoste', 'Lefever', 'Desmet', 'Macken']),
+            'ugent_id': [str(802000000000 + rnd.randint(0, 500))],
+            'name': 'Author {0}'.format(i),
+        }
+        for i in range(rnd.randint(1, 6))
+    ]
+
+    return {
+        '_id': str(1000000 + number),
+        'title': _sentence(rnd, rnd.randint(4, 12)),
+        'type': rnd.choice(TYPES),
+        'year': str(rnd.randint(2000, 2017)),
+        'author': authors,
+        'abstract': [_sentence(rnd, rnd.randint(40, 120))],
+        'keyword': [rnd.choice(WORDS) for _ in range(rnd.randint(0, 5))],
+        'doi': ['10.1000/{0}'.format(number)],
+        'publication': 'Journal of {0}'.format(rnd.choice(WORDS)),
+        'cite': {
+            'apa': _sentence(rnd, 30),
+            'mla': _sentence(rnd, 30),
+            'chicago-author-date': _sentence(rnd, 30),
+            'vancouver': _sentence(rnd, 30),
+            'ieee': _sentence(rnd, 30),
+            'fwo': _sentence(rnd, 30),
+        },
+        'file': [
+            {'kind': 'fullText', '_id': str(2000000 + number), 'access': 'open', 'size': '1124315'}
+        ],
+    }
+
+
+def export_lines(count, seed=0):
+    """Build an export of `count` publications, one json object per line
+
+    Returns:
+        list: A list of json strings
+    """
+    rnd = random.Random(seed)
+    return [json.dumps(publication_dict(i, rnd)) for i in range(count)]
+
+
+def export_text(count, seed=0):
+    """Build an export of `count` publications as it is returned by the API
+
+    Returns:
+        str: One json object per line
+    """
+    return '\n'.join(export_lines(count, seed)) + '\n'
@@ -0,0 +1,34 @@
+# encoding: utf-8
+
+"""End-to-end calls against the stub server: request, transfer and decode"""
+
+import pytest
+
+from .conftest import PUBLICATION_ID, PERSON_ID, ORGANISATION_ID
+
+
+def test_single_publication(benchmark, client):
+    publication = benchmark(client.single_publication, PUBLICATION_ID)
+
+    assert publication.id == str(PUBLICATION_ID)
+
+
+def test_person_export(benchmark, client):
+    publications = benchmark(client.publications_by_person, PERSON_ID)
+
+    assert len(publications) == 25
+
+
+@pytest.mark.slow
+def test_organisation_export(benchmark, client, organisation_stub, organisation_export_text):
+    publications = benchmark.pedantic(client.publications_by_organisation, (ORGANISATION_ID,), rounds=3)
+
+    assert len(publications) == organisation_export_text.count('\n')
+
+
+@pytest.mark.slow
+def test_organisation_export_streamed(benchmark, client, organisation_stub, organisation_export_text):
+    def consume():
+        return sum(1 for _ in client.iter_publications_by_organisation(ORGANISATION_ID))
+
+    assert benchmark.pedantic(consume, rounds=3) == organisation_export_text.count('\n')
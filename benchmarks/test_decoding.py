@@ -0,0 +1,92 @@
+# encoding: utf-8
+
+"""Parsing and decoding without the network"""
+
+import json
+
+import pytest
+
+from biblio.biblio import parse_result, dictionary_to_namedtuple, projection_decoder, RECORD_TYPES
+from biblio.columnar import to_dataframe
+from biblio.lazy import lazy_from_json
+
+
+def test_parse_single_publication(benchmark, publication_text):
+    publication = benchmark(parse_result, publication_text, many=False)
+
+    assert publication.title
+
+
+def test_parse_person_export(benchmark, person_export_text):
+    assert len(benchmark(parse_result, person_export_text, many=True)) == 25
+
+
+def test_parse_person_export_bytes(benchmark, person_export_text):
+    assert len(benchmark(parse_result, person_export_text.encode('utf-8'), many=True)) == 25
+
+
+def test_parse_person_export_projected(benchmark, person_export_text):
+    decoder = projection_decoder(['id', 'year', 'title', 'author'])
+
+    assert len(benchmark(parse_result, person_export_text, decoder, many=True)) == 25
+
+
+def test_parse_person_export_lazy(benchmark, person_export_text):
+    assert len(benchmark(parse_result, person_export_text, lazy_from_json, many=True)) == 25
+
+
+def test_parse_person_export_cold(benchmark, person_export_text):
+    publications = benchmark.pedantic(parse_result, (person_export_text,), {'many': True},
+                                      setup=RECORD_TYPES.clear, rounds=100)
+
+    assert len(publications) == 25
+
+
+@pytest.mark.slow
+def test_parse_organisation_export(benchmark, organisation_export_text):
+    publications = benchmark.pedantic(parse_result, (organisation_export_text,), {'many': True}, rounds=3)
+
+    assert len(publications) == organisation_export_text.count('\n')
+
+
+def test_dictionary_to_namedtuple(benchmark, person_export_text):
+    # the nested objects are decoded first, like the object_hook does
+    def decode(items):
+        return [_decode_nested(item) for item in items]
+
+    items = [json.loads(line) for line in person_export_text.splitlines()]
+
+    assert len(benchmark(decode, items)) == 25
+
+
+def _decode_nested(value):
+    if isinstance(value, dict):
+        return dictionary_to_namedtuple(dict((key, _decode_nested(item)) for key, item in value.items()))
+
+    if isinstance(value, list):
+        return [_decode_nested(item) for item in value]
+
+    return value
+
+
+def _dataframe_from_namedtuples(text):
+    import pandas
+
+    return pandas.DataFrame([publication._asdict() for publication in parse_result(text, many=True)])
+
+
+@pytest.mark.slow
+def test_organisation_dataframe_from_namedtuples(benchmark, organisation_export_text):
+    pytest.importorskip('pandas')
+    frame = benchmark.pedantic(_dataframe_from_namedtuples, (organisation_export_text,), rounds=3)
+
+    assert len(frame) == organisation_export_text.count('\n')
+
+
+@pytest.mark.slow
+def test_organisation_dataframe_columnar(benchmark, organisation_export_text):
+    pytest.importorskip('pandas')
+    lines = organisation_export_text.splitlines()
+    frame = benchmark.pedantic(to_dataframe, (lines,), rounds=3)
+
+    assert len(frame) == len(lines)
@@ -13,12 +13,52 @@ Note that the API does not return empty values as empty placeholders.
     except AttributeError:
         print 'No chicago author date is provided'
 
+Exports can also be streamed, one publication at a time, with the ``iter_`` variants.
+Memory use then stays constant, whatever the size of the export.
+
+.. code:: python
+
+    for publication in iter_publications_by_organisation('PP02'):
+        print publication.title
+
+When only some fields are needed, pass them with ``fields``, the other fields are not decoded.
+A dotted name keeps a field of a nested object.
+
+.. code:: python
+
+    publications = publications_by_organisation('PP02', fields=['id', 'year', 'title', 'author.last_name'])
+
+All the functions share one pooled HTTP session, so connections are kept alive between calls.
+Use a ``BiblioClient`` to tune the connection pool.
+
+.. code:: python
+
+    client = BiblioClient(pool_maxsize=20, max_retries=3)
+    publication = client.single_publication(7175390)
+
+When the API is temporarily unavailable, the requests are retried with a backoff.
+If they keep failing, ``TransientError`` is raised, while None (or an empty list) still
+means that nothing was found.
+
+Hooks get the timings and sizes of every call, see ``biblio.instrumentation``.
+
+.. code:: python
+
+    recorder = CallRecorder()
+    client = BiblioClient(hooks=[recorder])
+
 .. _`Ghent University Academic Bibliography`: https://biblio.ugent.be/
 """
 
 from .biblio import search, publications_by_organisation, \
     publications_by_project, publications_by_person, publications_by_group, \
-    single_publication, BASE_URL
+    single_publication, iter_search, iter_publications_by_organisation, iter_publications_by_project, \
+    iter_publications_by_person, iter_publications_by_group, BiblioClient, fetch_publications, set_json_backend, \
+    publications_by_organisation_sharded, iter_publications_by_organisation_sharded, TransientError, BASE_URL
+from .groups import GroupEngine
+from .paging import PagedSearch
+from .pipeline import DecodePipeline
+from .instrumentation import CallRecorder, PrometheusCollector
 
 __author__ = 'Stef Bastiaansen'
 __email__ = 'stef.bastiaansen@ugent.be'
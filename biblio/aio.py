@@ -0,0 +1,405 @@
+# encoding: utf-8
+
+"""
+asyncio API
+===========
+
+Async versions of all the query functions, for use in asyncio applications.
+They need Python 3.7 or newer and aiohttp_, install it with ``pip install ugentbiblio[aio]``.
+The module can not be imported on older versions of Python.
+
+All the calls of a client share one pool of connections, and the number of
+concurrent requests is limited with a semaphore.
+The exports can be consumed as async iterators, one publication at a time.
+A stream keeps its connection until it is consumed, so streams have their own limit,
+and other calls can still be made while iterating.
+
+.. code:: python
+
+    async with AsyncBiblioClient(limit=20) as client:
+        publication = await client.single_publication(7175390)
+
+        async for publication in client.iter_publications_by_organisation('PP02'):
+            print(publication.title)
+
+.. _aiohttp: https://docs.aiohttp.org/
+"""
+
+import asyncio
+import weakref
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from .biblio import publication_url, person_export_url, organisation_export_url, group_export_url, \
+    project_export_url, search_url, search_params, parse_result, json_string_to_namedtuple, accepts_bytes, \
+    select_decoder, DEFAULT_POOL_MAXSIZE
+from .cache import cache_key
+from .scheduler import RequestScheduler, status_of
+
+
+DEFAULT_STREAM_LIMIT = 4
+
+if aiohttp is not None:
+    TRANSIENT_EXCEPTIONS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+class AsyncSingleFlight(object):
+    """Coalescing of concurrent coroutines with the same key, see :class:`biblio.cache.SingleFlight`
+
+    The call runs in a task, so it is not cancelled when one of the waiting callers is cancelled.
+    It is not thread-safe, all the callers must use the same event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._coalesced = 0
+
+    async def do(self, key, function):
+        """Await `function()`, unless a call with the same key is running already
+
+        Args:
+            key: A hashable key, e.g. from :func:`biblio.cache.cache_key`
+            function (callable): Returns an awaitable, called without arguments
+        Returns:
+            tuple: The result, and True when it is the result of another caller
+        Raises:
+            Exception: The exception of the call
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+
+        if shared:
+            self._coalesced += 1
+        else:
+            task = self._calls[key] = asyncio.ensure_future(function())
+            task.add_done_callback(lambda _: self._done(key, task))
+
+        return await asyncio.shield(task), shared
+
+    def _done(self, key, task):
+        self._calls.pop(key, None)
+
+        if not task.cancelled():
+            # the waiting callers get the exception, it is not logged when they were all cancelled
+            task.exception()
+
+    @property
+    def coalesced(self):
+        """The number of calls that got the result of another caller"""
+        return self._coalesced
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class AsyncBiblioClient(object):
+    """Async client holding a pooled aiohttp session to the API
+
+    Args:
+        base_url (str): The url of the API. When omitted, ``BASE_URL`` is used
+        limit (int): The maximum number of concurrent requests, besides the streams
+        stream_limit (int): The maximum number of streamed exports that are open at once.
+            A stream holds its connection while the caller iterates over it
+        session (aiohttp.ClientSession): Use this session instead of creating one.
+            Its connector needs room for ``limit + stream_limit`` connections
+        decoder (callable): Decodes one json string, see :class:`biblio.BiblioClient`
+        scheduler (biblio.scheduler.RequestScheduler): Retries the requests that fail and limits the rate,
+            see :class:`biblio.BiblioClient`
+        coalesce (bool): Send identical calls that run at the same time only once,
+            see :class:`AsyncSingleFlight`
+    """
+
+    def __init__(self, base_url=None, limit=DEFAULT_POOL_MAXSIZE, session=None, decoder=None, scheduler=None,
+                 coalesce=True, stream_limit=DEFAULT_STREAM_LIMIT):
+        if aiohttp is None:
+            raise ImportError('biblio.aio requires aiohttp, install it with pip install aiohttp')
+
+        self.base_url = base_url
+        self.decoder = decoder or json_string_to_namedtuple
+        self.scheduler = RequestScheduler() if scheduler is None else scheduler
+        self.limit = limit
+        self.stream_limit = stream_limit
+        self.flight = AsyncSingleFlight() if coalesce else None
+        self._session = session
+        self._semaphore = None
+        self._stream_semaphore = None
+
+    @property
+    def session(self):
+        """The aiohttp session, created on first use inside the running loop"""
+        if self._session is None:
+            # open streams can not take the connections of the other calls
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit + self.stream_limit)
+            )
+
+        return self._session
+
+    @property
+    def semaphore(self):
+        """The semaphore limiting the number of concurrent requests"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+
+        return self._semaphore
+
+    @property
+    def stream_semaphore(self):
+        """The semaphore limiting the number of open streams, held until a stream is consumed or closed"""
+        if self._stream_semaphore is None:
+            self._stream_semaphore = asyncio.Semaphore(self.stream_limit)
+
+        return self._stream_semaphore
+
+    async def single_publication(self, publication_id, fields=None):
+        """See :func:`biblio.single_publication`"""
+        return await self.get_result(publication_url(publication_id, self.base_url), {}, many=False, fields=fields)
+
+    async def publications_by_person(self, ugent_id, fields=None):
+        """See :func:`biblio.publications_by_person`"""
+        return await self.get_result(person_export_url(ugent_id, self.base_url), {}, many=True, fields=fields)
+
+    async def publications_by_organisation(self, organisation_id, year=None, fields=None):
+        """See :func:`biblio.publications_by_organisation`"""
+        return await self.get_result(organisation_export_url(organisation_id, year, self.base_url), {}, many=True,
+                                     fields=fields)
+
+    async def publications_by_group(self, ugent_ids, fields=None):
+        """See :func:`biblio.publications_by_group`"""
+        return await self.get_result(group_export_url(ugent_ids, self.base_url), {}, many=True, fields=fields)
+
+    async def publications_by_project(self, project_id, fields=None):
+        """See :func:`biblio.publications_by_project`"""
+        return await self.get_result(project_export_url(project_id, self.base_url), {}, many=True, fields=fields)
+
+    async def search(self, query=None, fields=None):
+        """See :func:`biblio.search`"""
+        return await self.get_result(search_url(self.base_url), search_params(query), many=True, fields=fields)
+
+    def iter_publications_by_person(self, ugent_id, fields=None):
+        """See :func:`biblio.iter_publications_by_person`"""
+        return self.iter_result(person_export_url(ugent_id, self.base_url), {}, fields=fields)
+
+    def iter_publications_by_organisation(self, organisation_id, year=None, fields=None):
+        """See :func:`biblio.iter_publications_by_organisation`"""
+        return self.iter_result(organisation_export_url(organisation_id, year, self.base_url), {}, fields=fields)
+
+    def iter_publications_by_group(self, ugent_ids, fields=None):
+        """See :func:`biblio.iter_publications_by_group`"""
+        return self.iter_result(group_export_url(ugent_ids, self.base_url), {}, fields=fields)
+
+    def iter_publications_by_project(self, project_id, fields=None):
+        """See :func:`biblio.iter_publications_by_project`"""
+        return self.iter_result(project_export_url(project_id, self.base_url), {}, fields=fields)
+
+    def iter_search(self, query=None, fields=None):
+        """See :func:`biblio.iter_search`"""
+        return self.iter_result(search_url(self.base_url), search_params(query), fields=fields)
+
+    async def get_result(self, url, params, many=None, fields=None):
+        """Get an API-response, see :meth:`biblio.BiblioClient.get_result`"""
+        params['format'] = 'json'
+        decoder = select_decoder(self.decoder, fields)
+
+        if self.flight is None:
+            return await self._get_result(url, params, many, decoder)
+
+        key = cache_key(url, params)
+
+        if fields is not None:
+            key += '#' + ','.join(sorted(fields))
+
+        result, shared = await self.flight.do(key, lambda: self._get_result(url, params, many, decoder))
+
+        # callers get their own copy of a list, so the shared one can not be changed
+        return list(result) if shared and isinstance(result, list) else result
+
+    async def _get_result(self, url, params, many, decoder):
+        async with self.semaphore:
+            response = await self.send(url, params)
+
+            async with response:
+                if response.status != 200:
+                    return None
+
+                body = await response.read()
+
+        return parse_result(body, decoder, many)
+
+    async def iter_result(self, url, params, fields=None):
+        """Stream an export from the API, one json object per line.
+
+        Args:
+            fields (list): Only decode these fields, see :func:`biblio.biblio.json_string_to_namedtuple`
+        Returns:
+            An async generator of named tuples.
+            When encountering a status_code other then 200, nothing is generated.
+            It counts as an open stream until it is consumed or closed, see ``stream_limit``.
+        """
+        params['format'] = 'json'
+        decoder = select_decoder(self.decoder, fields)
+        raw = accepts_bytes(decoder)
+
+        # not the semaphore of the other calls, it is held while the caller handles the records
+        async with self.stream_semaphore:
+            response = await self.send(url, params)
+
+            async with response:
+                if response.status != 200:
+                    return
+
+                rest = b''
+
+                async for chunk in response.content.iter_any():
+                    lines = (rest + chunk).split(b'\n')
+                    rest = lines.pop()
+
+                    for line in lines:
+                        if line.strip():
+                            yield decoder(line if raw else line.decode('utf-8'))
+
+                if rest.strip():
+                    yield decoder(rest if raw else rest.decode('utf-8'))
+
+    async def send(self, url, params):
+        """Send a GET request through the scheduler, see :meth:`biblio.BiblioClient.send`"""
+        async def send():
+            return await self.session.get(url, params=params)
+
+        if not self.scheduler:
+            return await send()
+
+        return await send_async(self.scheduler, send, TRANSIENT_EXCEPTIONS)
+
+    async def close(self):
+        """Close all the connections of the session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+async def send_async(scheduler, send, transient_exceptions):
+    """Async version of :meth:`biblio.scheduler.RequestScheduler.send`
+
+    Args:
+        scheduler (biblio.scheduler.RequestScheduler): Decides on the retries and the backoff
+        send (callable): A coroutine function that sends the request and returns the response
+        transient_exceptions (tuple): The exceptions that are retried, e.g. ``TRANSIENT_EXCEPTIONS``
+    Returns:
+        The response, with a status code that is not retried
+    Raises:
+        TransientError: When the last retry failed as well
+    """
+    attempt = 0
+
+    while True:
+        if scheduler.bucket is not None:
+            wait = scheduler.bucket.reserve()
+
+            if wait:
+                await asyncio.sleep(wait)
+
+        try:
+            response = await send()
+        except transient_exceptions as error:
+            wait = scheduler.wait(attempt, None, error)
+        else:
+            if status_of(response) not in scheduler.retry_statuses:
+                return response
+
+            response.close()
+            wait = scheduler.wait(attempt, response, None)
+
+        await asyncio.sleep(wait)
+        attempt += 1
+
+
+_DEFAULT_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def default_client():
+    """Get the client used by the module level functions in the running loop
+
+    Every event loop gets its own client, as an aiohttp session can not be shared between loops.
+
+    Returns:
+        AsyncBiblioClient: The shared client of the running loop
+    """
+    loop = asyncio.get_running_loop()
+
+    if loop not in _DEFAULT_CLIENTS:
+        _DEFAULT_CLIENTS[loop] = AsyncBiblioClient()
+
+    return _DEFAULT_CLIENTS[loop]
+
+
+async def close_default_client():
+    """Close the client of the running loop, call this before the loop is closed"""
+    client = _DEFAULT_CLIENTS.pop(asyncio.get_running_loop(), None)
+
+    if client is not None:
+        await client.close()
+
+
+async def single_publication(publication_id, fields=None):
+    """Async version of :func:`biblio.single_publication`"""
+    return await default_client().single_publication(publication_id, fields=fields)
+
+
+async def publications_by_person(ugent_id, fields=None):
+    """Async version of :func:`biblio.publications_by_person`"""
+    return await default_client().publications_by_person(ugent_id, fields=fields)
+
+
+async def publications_by_organisation(organisation_id, year=None, fields=None):
+    """Async version of :func:`biblio.publications_by_organisation`"""
+    return await default_client().publications_by_organisation(organisation_id, year, fields=fields)
+
+
+async def publications_by_group(ugent_ids, fields=None):
+    """Async version of :func:`biblio.publications_by_group`"""
+    return await default_client().publications_by_group(ugent_ids, fields=fields)
+
+
+async def publications_by_project(project_id, fields=None):
+    """Async version of :func:`biblio.publications_by_project`"""
+    return await default_client().publications_by_project(project_id, fields=fields)
+
+
+async def search(query=None, fields=None):
+    """Async version of :func:`biblio.search`"""
+    return await default_client().search(query, fields=fields)
+
+
+def iter_publications_by_person(ugent_id, fields=None):
+    """Async iterator version of :func:`biblio.iter_publications_by_person`"""
+    return default_client().iter_publications_by_person(ugent_id, fields=fields)
+
+
+def iter_publications_by_organisation(organisation_id, year=None, fields=None):
+    """Async iterator version of :func:`biblio.iter_publications_by_organisation`"""
+    return default_client().iter_publications_by_organisation(organisation_id, year, fields=fields)
+
+
+def iter_publications_by_group(ugent_ids, fields=None):
+    """Async iterator version of :func:`biblio.iter_publications_by_group`"""
+    return default_client().iter_publications_by_group(ugent_ids, fields=fields)
+
+
+def iter_publications_by_project(project_id, fields=None):
+    """Async iterator version of :func:`biblio.iter_publications_by_project`"""
+    return default_client().iter_publications_by_project(project_id, fields=fields)
+
+
+def iter_search(query=None, fields=None):
+    """Async iterator version of :func:`biblio.iter_search`"""
+    return default_client().iter_search(query, fields=fields)
@@ -20,14 +20,42 @@ Instead of returning plain JSON, it returns named tuples and provides methods fo
 .. _API: https://biblio.ugent.be/doc/api
 """
 
+import datetime
 import json
-from collections import namedtuple
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import namedtuple, OrderedDict
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from .cache import cache_key, endpoint_of, MemoryCache, SingleFlight
+from .instrumentation import CallStats, instrument_adapter, start_connect_timer, connect_time, \
+    CACHE_HIT, CACHE_MISS, CACHE_MEMO, CACHE_REVALIDATED, CACHE_COALESCED
+from .scheduler import RequestScheduler, TransientError  # pylint: disable=unused-import
 
 
 BASE_URL = 'https://biblio.ugent.be/'
 
+# Upper bounds for the caches used while decoding API responses
+MAX_RECORD_TYPES = 1024
+MAX_NORMALIZED_KEYS = 4096
+MAX_PROJECTIONS = 256
+
+# Defaults of the sharded organisation export
+DEFAULT_SHARD_WORKERS = 4
+DEFAULT_SHARD_RETRIES = 0
+
+# Connection pool defaults of the HTTP session
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+# Bytes read at once from a streamed response, before decompression
+STREAM_CHUNK_SIZE = 16384
+
 
 class NotAllowedParameter(Exception):
     """
@@ -50,169 +78,1414 @@ class InvalidYear(Exception):
     pass
 
 
-def single_publication(publication_id):
+class IncompleteExport(Exception):
+    """
+    Raised when some parts of a sharded export could not be downloaded.
+    ``errors`` maps every failed year to its last error.
+    """
+
+    def __init__(self, message, errors):
+        super(IncompleteExport, self).__init__(message)
+        self.errors = errors
+
+
+RecordTypeInfo = namedtuple('RecordTypeInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class RecordTypeRegistry(object):
+    """Bounded LRU registry of the named tuple types used for decoded objects
+
+    Creating a named tuple type is expensive, while the API only returns a limited
+    number of distinct shapes (publications, authors, cites, files, ...).
+    The registry generates one type per distinct set of fields and reuses it
+    for every object that has the same fields.
+
+    Args:
+        maxsize (int): The maximum number of types that are kept
+    """
+
+    def __init__(self, maxsize=MAX_RECORD_TYPES):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._types = OrderedDict()
+        self._types_by_keys = {}
+        self._keys_by_fields = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, keys):
+        """Get the named tuple type for the keys of a json object, as returned by the API
+
+        The types are remembered per tuple of raw keys as well, so objects with
+        known keys skip normalizing them.
+
+        Args:
+            keys (tuple): The keys, in order
+
+        Returns:
+            A named tuple type with the normalized keys as fields,
+            None when two keys are the same after normalizing
+        """
+        with self._lock:
+            record_type = self._types_by_keys.get(keys)
+
+            if record_type is not None:
+                self.hits += 1
+                self._touch(record_type._fields)
+                return record_type
+
+        fields = [normalize_key(key) for key in keys]
+
+        if len(set(fields)) != len(fields):
+            return None
+
+        record_type = self.get(fields)
+
+        with self._lock:
+            # only remember the keys while the type is registered, so they are forgotten when it is evicted
+            if self._types.get(record_type._fields) is record_type:
+                self._types_by_keys[keys] = record_type
+                self._keys_by_fields.setdefault(record_type._fields, set()).add(keys)
+
+        return record_type
+
+    def get(self, fields):
+        """Get the named tuple type for the given fields
+
+        Args:
+            fields (iterable): The normalized field names, in order
+
+        Returns:
+            A named tuple type with the given fields
+        """
+        fields = tuple(fields)
+
+        with self._lock:
+            record_type = self._types.get(fields)
+
+            if record_type is not None:
+                self.hits += 1
+                self._touch(fields)
+                return record_type
+
+            self.misses += 1
+
+        record_type = namedtuple('d', fields, rename=False)
+
+        with self._lock:
+            self._types[fields] = record_type
+
+            while len(self._types) > self.maxsize:
+                evicted, _ = self._types.popitem(last=False)
+
+                for keys in self._keys_by_fields.pop(evicted, ()):
+                    del self._types_by_keys[keys]
+
+        return record_type
+
+    def _touch(self, fields):
+        """Mark the type of the fields as most recently used, the lock must be held"""
+        if fields not in self._types:
+            return
+
+        try:
+            self._types.move_to_end(fields)
+        except AttributeError:  # pragma: no cover
+            # Python 2
+            self._types[fields] = self._types.pop(fields)
+
+    def info(self):
+        """Get the hit and miss counters of the registry
+
+        Returns:
+            RecordTypeInfo: A named tuple with hits, misses, maxsize and currsize
+        """
+        with self._lock:
+            return RecordTypeInfo(self.hits, self.misses, self.maxsize, len(self._types))
+
+    def clear(self):
+        """Remove all the types and reset the counters"""
+        with self._lock:
+            self._types.clear()
+            self._types_by_keys.clear()
+            self._keys_by_fields.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+RECORD_TYPES = RecordTypeRegistry()
+
+PublicationResult = namedtuple('PublicationResult', ['id', 'publication', 'error'])
+
+_NORMALIZED_KEYS = {}
+_PROJECTIONS = {}
+
+
+class BiblioClient(object):
+    """Client holding a pooled HTTP session to the API
+
+    Connections are kept alive and reused between calls, so only the first call
+    pays for the TCP and TLS handshake. The module level functions use a shared default client.
+
+    Args:
+        base_url (str): The url of the API. When omitted, ``BASE_URL`` is used
+        pool_connections (int): The number of connection pools to cache
+        pool_maxsize (int): The maximum number of connections kept alive per host
+        max_retries (int): The number of retries on connection errors
+        pool_block (bool): Wait for a free connection instead of opening an extra one
+        session (requests.Session): Use this session instead of creating one
+        cache (biblio.cache.ResponseCache): Keep the responses in this persistent cache
+        memo (biblio.cache.MemoryCache): Keep the decoded results in this in-memory cache
+        decoder (callable): Decodes one json string, e.g. :func:`biblio.models.publication_from_json`.
+            When omitted, :func:`json_string_to_namedtuple` is used. See :func:`accepts_bytes`
+        scheduler (biblio.scheduler.RequestScheduler): Retries the requests that fail and limits the rate.
+            When omitted, a scheduler with the default retries is used, with False requests are sent only once
+        hooks (list): Callables that get the :class:`biblio.instrumentation.CallStats` of every call
+        compression (bool): Ask for a compressed response, with every encoding that can be decoded,
+            see :func:`accept_encoding`
+        coalesce (bool): Send identical calls that run at the same time only once, in threads they all
+            wait for the first one and share its result, see :class:`biblio.cache.SingleFlight`
+    """
+
+    def __init__(self, base_url=None, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, max_retries=0, pool_block=False, session=None,
+                 cache=None, memo=None, decoder=None, scheduler=None, hooks=None, compression=True, coalesce=True):
+        self.base_url = base_url
+        self.hooks = list(hooks or [])
+        self.scheduler = RequestScheduler() if scheduler is None else scheduler
+        self.decoder = decoder or json_string_to_namedtuple
+        self.cache = cache
+        self.memo = memo
+        self.flight = SingleFlight() if coalesce else None
+        self.session = session or requests.Session()
+
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+            pool_block=pool_block,
+        )
+
+        # the connect time is only measured for hooks
+        if self.hooks:
+            instrument_adapter(self._adapter)
+
+        self.session.headers['Accept-Encoding'] = accept_encoding() if compression else 'identity'
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+
+    def single_publication(self, publication_id, fields=None):
+        """See :func:`single_publication`"""
+        return self.get_result(publication_url(publication_id, self.base_url), {}, many=False, fields=fields)
+
+    def publications_by_person(self, ugent_id, fields=None):
+        """See :func:`publications_by_person`"""
+        return self.get_result(person_export_url(ugent_id, self.base_url), {}, many=True, fields=fields)
+
+    def publications_by_organisation(self, organisation_id, year=None, fields=None):
+        """See :func:`publications_by_organisation`"""
+        return self.get_result(organisation_export_url(organisation_id, year, self.base_url), {}, many=True,
+                               fields=fields)
+
+    def publications_by_group(self, ugent_ids, fields=None):
+        """See :func:`publications_by_group`"""
+        return self.get_result(group_export_url(ugent_ids, self.base_url), {}, many=True, fields=fields)
+
+    def publications_by_project(self, project_id, fields=None):
+        """See :func:`publications_by_project`"""
+        return self.get_result(project_export_url(project_id, self.base_url), {}, many=True, fields=fields)
+
+    def search(self, query=None, fields=None):
+        """See :func:`search`"""
+        return self.get_result(search_url(self.base_url), search_params(query), many=True, fields=fields)
+
+    def iter_publications_by_person(self, ugent_id, fields=None):
+        """See :func:`iter_publications_by_person`"""
+        return self.iter_result(person_export_url(ugent_id, self.base_url), {}, fields=fields)
+
+    def iter_publications_by_organisation(self, organisation_id, year=None, fields=None):
+        """See :func:`iter_publications_by_organisation`"""
+        return self.iter_result(organisation_export_url(organisation_id, year, self.base_url), {}, fields=fields)
+
+    def iter_publications_by_group(self, ugent_ids, fields=None):
+        """See :func:`iter_publications_by_group`"""
+        return self.iter_result(group_export_url(ugent_ids, self.base_url), {}, fields=fields)
+
+    def iter_publications_by_project(self, project_id, fields=None):
+        """See :func:`iter_publications_by_project`"""
+        return self.iter_result(project_export_url(project_id, self.base_url), {}, fields=fields)
+
+    def iter_search(self, query=None, fields=None):
+        """See :func:`iter_search`"""
+        return self.iter_result(search_url(self.base_url), search_params(query), fields=fields)
+
+    def iter_publications_by_organisation_sharded(self, organisation_id, first_year, last_year=None,
+                                                  max_workers=DEFAULT_SHARD_WORKERS,
+                                                  retries=DEFAULT_SHARD_RETRIES, fields=None):
+        """See :func:`iter_publications_by_organisation_sharded`"""
+        if last_year is None:
+            last_year = datetime.date.today().year
+
+        if not str(first_year).isdigit() or not str(last_year).isdigit():
+            raise InvalidYear('Year should be an integer')
+
+        urls = OrderedDict(
+            (year, organisation_export_url(organisation_id, year, self.base_url))
+            for year in range(int(first_year), int(last_year) + 1)
+        )
+
+        return self._merge_shards(urls, max_workers, retries, fields)
+
+    def publications_by_organisation_sharded(self, organisation_id, first_year, last_year=None,
+                                             max_workers=DEFAULT_SHARD_WORKERS, retries=DEFAULT_SHARD_RETRIES,
+                                             fields=None):
+        """See :func:`publications_by_organisation_sharded`"""
+        return list(self.iter_publications_by_organisation_sharded(
+            organisation_id, first_year, last_year, max_workers, retries, fields
+        ))
+
+    def _get_shard(self, url, retries, fields):
+        # the scheduler retries every request with a backoff, this only starts it over
+        attempt = 0
+
+        while True:
+            try:
+                return self.get_result(url, {}, many=True, fields=fields) or []
+            except TransientError:
+                if attempt >= retries:
+                    raise
+
+                attempt += 1
+
+    def _merge_shards(self, urls, max_workers, retries, fields):
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = dict((executor.submit(self._get_shard, url, retries, fields), year) for year, url in urls.items())
+        seen = set()
+        errors = {}
+
+        try:
+            for future in as_completed(futures):
+                try:
+                    publications = future.result()
+                except Exception as error:  # pylint: disable=broad-except
+                    errors[futures[future]] = error
+                    continue
+
+                for publication in publications:
+                    publication_id = getattr(publication, 'id', None)
+
+                    if publication_id is not None:
+                        if publication_id in seen:
+                            continue
+
+                        seen.add(publication_id)
+
+                    yield publication
+        finally:
+            for future in futures:
+                future.cancel()
+
+            executor.shutdown(wait=True)
+
+        if errors:
+            raise IncompleteExport(
+                'The export of {0} could not be downloaded'.format(', '.join(str(x) for x in sorted(errors))),
+                errors
+            )
+
+    def fetch_publications(self, publication_ids, max_workers=DEFAULT_POOL_MAXSIZE, ordered=True, fields=None):
+        """See :func:`fetch_publications`"""
+        urls = OrderedDict()
+
+        # validate all the ids before anything is requested
+        for publication_id in publication_ids:
+            url = publication_url(publication_id, self.base_url)
+            urls.setdefault(str(int(publication_id)), url)
+
+        return self._fetch_urls(urls, max_workers, ordered, fields)
+
+    def _fetch_urls(self, urls, max_workers, ordered, fields):
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = OrderedDict(
+            (executor.submit(self.get_result, url, {}, False, fields), key) for key, url in urls.items()
+        )
+
+        try:
+            for future in (futures if ordered else as_completed(futures)):
+                try:
+                    yield PublicationResult(futures[future], future.result(), None)
+                except Exception as error:  # pylint: disable=broad-except
+                    yield PublicationResult(futures[future], None, error)
+        finally:
+            for future in futures:
+                future.cancel()
+
+            executor.shutdown(wait=True)
+
+    def get_result(self, url, params, many=None, fields=None):
+        """Get an API-response, formatted as json back from the API.
+
+        Args:
+            url (str): The url that needs to be queried, without get-parameters
+            many (bool): True when the API returns one json per line, False for a single json.
+                When omitted, the format is detected from the response
+            fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
+        Returns:
+            When encountering a status_code other then 200, None is returned.
+            If a single json is found, it is returned as a dict.
+            If multiple jsons are found, they are returns as dicts in a list.
+        Raises:
+            TransientError: When the API was not available, even after retrying
+        """
+        params['format'] = 'json'
+        decoder = select_decoder(self.decoder, fields)
+        stats = self._start_stats(url) if self.hooks else None
+
+        try:
+            if self.memo is None and self.flight is None:
+                return self._get_result(url, params, many, stats, decoder)
+
+            key = cache_key(url, params)
+
+            if fields is not None:
+                key += '#' + ','.join(sorted(fields))
+
+            result = self.memo.get(key) if self.memo is not None else MemoryCache.MISSING
+
+            if result is not MemoryCache.MISSING:
+                if stats is not None:
+                    stats.cache_status = CACHE_MEMO
+            elif self.flight is None:
+                result = self._get_memoized(key, url, params, many, stats, decoder)
+            else:
+                result, shared = self.flight.do(
+                    key, lambda: self._get_memoized(key, url, params, many, stats, decoder)
+                )
+
+                if shared and stats is not None:
+                    stats.cache_status = CACHE_COALESCED
+
+            # callers get their own copy of a list, so the cached or shared one can not be changed
+            return list(result) if isinstance(result, list) else result
+        except Exception as error:
+            if stats is not None:
+                stats.error = error
+
+            raise
+        finally:
+            if stats is not None:
+                self._finish_stats(stats)
+
+    def cache_info(self):
+        """Get the statistics of the in-memory cache, see :meth:`biblio.cache.MemoryCache.cache_info`"""
+        return self.memo.cache_info() if self.memo is not None else None
+
+    def cache_clear(self):
+        """Empty the in-memory cache"""
+        if self.memo is not None:
+            self.memo.cache_clear()
+
+    def _get_memoized(self, key, url, params, many, stats, decoder):
+        result = self._get_result(url, params, many, stats, decoder)
+
+        if self.memo is not None:
+            self.memo.set(key, result)
+
+        return result
+
+    def _get_result(self, url, params, many, stats, decoder):
+        body = self._get_body(url, params, stats)
+
+        if body is None:
+            return None
+
+        if stats is None:
+            return parse_result(body, decoder, many)
+
+        start = time.time()
+        result = parse_result(body, decoder, many)
+        stats.decode_time = time.time() - start
+        stats.records = len(result) if isinstance(result, list) else 1
+
+        return result
+
+    def iter_result(self, url, params, fields=None):
+        """Stream an export from the API, one json object per line.
+
+        The request is only sent when the iteration starts. Every line is decoded
+        as soon as it arrives, so memory use does not grow with the size of the export.
+
+        Args:
+            url (str): The url that needs to be queried, without get-parameters
+            fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
+        Returns:
+            A generator of named tuples.
+            When encountering a status_code other then 200, nothing is generated.
+        """
+        decoder = select_decoder(self.decoder, fields)
+        raw = accepts_bytes(decoder)
+
+        if not self.hooks:
+            for line in self.iter_raw(url, params):
+                yield decoder(line if raw else line.decode('utf-8'))
+
+            return
+
+        stats = self._start_stats(url)
+
+        try:
+            for line in self._iter_raw(url, params, stats):
+                start = time.time()
+                record = decoder(line if raw else line.decode('utf-8'))
+                stats.decode_time += time.time() - start
+                stats.records += 1
+
+                yield record
+        except Exception as error:
+            stats.error = error
+            raise
+        finally:
+            stats.transfer_time = max(0.0, stats.transfer_time - stats.decode_time)
+            self._finish_stats(stats)
+
+    def iter_raw(self, url, params):
+        """Stream an export from the API, without decoding the lines
+
+        Args:
+            url (str): The url that needs to be queried, without get-parameters
+        Returns:
+            A generator of the lines that are not empty, as bytes.
+            When encountering a status_code other then 200, nothing is generated.
+        """
+        return self._iter_raw(url, params, None)
+
+    def _iter_raw(self, url, params, stats):
+        params['format'] = 'json'
+
+        for line in self._iter_lines(url, params, stats):
+            if line:
+                yield line
+
+    def send(self, url, params, headers=None, stream=False, stats=None):
+        """Send a GET request through the scheduler
+
+        Args:
+            stats (biblio.instrumentation.CallStats): Record the connect time and time to first byte in it
+        Returns:
+            requests.Response: The response, with a status code that is not retried
+        Raises:
+            TransientError: When the API was not available, even after retrying
+        """
+        def send():
+            return self.session.get(url, params=params, headers=headers, stream=stream)
+
+        if stats is not None:
+            start_connect_timer()
+
+        if not self.scheduler:
+            response = send()
+        else:
+            response = self.scheduler.send(send)
+
+        if stats is not None:
+            stats.status = response.status_code
+            stats.connect_time = connect_time()
+            stats.time_to_first_byte = response.elapsed.total_seconds()
+
+        return response
+
+    def add_hook(self, hook):
+        """Call `hook` with the :class:`biblio.instrumentation.CallStats` of every call"""
+        if not self.hooks:
+            instrument_adapter(self._adapter)
+            # the open connections are not timed, new ones are opened in timed pools
+            self._adapter.poolmanager.clear()
+
+        self.hooks.append(hook)
+
+    def _start_stats(self, url):
+        return CallStats(url, endpoint_of(url))
+
+    def _finish_stats(self, stats):
+        stats.duration = time.time() - stats.started_at
+
+        for hook in self.hooks:
+            hook(stats)
+
+    def _get_body(self, url, params, stats=None):
+        entry = None
+
+        if self.cache is not None:
+            entry = self.cache.get(url, params)
+
+            if entry is not None and entry.fresh:
+                if stats is not None:
+                    stats.cache_status = CACHE_HIT
+
+                return entry.body
+
+        # with stats the body is read after the headers arrived, to measure the transfer separately
+        response = self.send(url, params, entry.validators() if entry else None, stream=stats is not None,
+                             stats=stats)
+
+        try:
+            if response.status_code == 304 and entry is not None:
+                self.cache.revalidated(entry)
+
+                if stats is not None:
+                    stats.cache_status = CACHE_REVALIDATED
+
+                return entry.body
+
+            if response.status_code != 200:
+                return None
+
+            if stats is not None:
+                start = time.time()
+                stats.bytes_decoded = len(response.content)
+                stats.transfer_time = time.time() - start
+                stats.bytes_received = response.raw.tell()
+                stats.content_encoding = response.headers.get('Content-Encoding')
+
+                if self.cache is not None:
+                    stats.cache_status = CACHE_MISS
+
+            if self.cache is not None:
+                self.cache.store(url, params, response.content, response.headers)
+
+            # the body is utf-8 json, response.text would guess the charset from the bytes first
+            return response.content
+        finally:
+            response.close()
+
+    def _iter_lines(self, url, params, stats=None):
+        entry = None
+
+        if self.cache is not None:
+            entry = self.cache.get(url, params)
+
+            if entry is not None and entry.fresh:
+                if stats is not None:
+                    stats.cache_status = CACHE_HIT
+
+                for line in entry.iter_lines():
+                    yield line
+
+                return
+
+        response = self.send(url, params, entry.validators() if entry else None, stream=True, stats=stats)
+
+        try:
+            if response.status_code == 304 and entry is not None:
+                self.cache.revalidated(entry)
+
+                if stats is not None:
+                    stats.cache_status = CACHE_REVALIDATED
+
+                for line in entry.iter_lines():
+                    yield line
+
+                return
+
+            if response.status_code != 200:
+                return
+
+            writer = self.cache.writer(url, params, response.headers) if self.cache is not None else None
+
+            if stats is not None:
+                start = time.time()
+
+                if writer is not None:
+                    stats.cache_status = CACHE_MISS
+
+            # urllib3 decompresses every chunk as it arrives, the compressed body is never buffered
+            for line in response.iter_lines(chunk_size=STREAM_CHUNK_SIZE):
+                if writer is not None:
+                    writer.write(line + b'\n')
+
+                if stats is not None:
+                    stats.bytes_decoded += len(line) + 1
+
+                yield line
+
+            if stats is not None:
+                stats.transfer_time = time.time() - start
+                stats.bytes_received = response.raw.tell()
+                stats.content_encoding = response.headers.get('Content-Encoding')
+
+            if writer is not None:
+                writer.commit()
+        finally:
+            response.close()
+
+    def close(self):
+        """Close all the connections of the session"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+_DEFAULT_CLIENT = None
+_DEFAULT_CLIENT_LOCK = threading.Lock()
+
+
+def accept_encoding():
+    """The content encodings urllib3 can decode, for the Accept-Encoding header
+
+    gzip and deflate are always supported, br when brotli is installed
+    and zstd when the zstd module is available.
+
+    Returns:
+        str: e.g. ``gzip, deflate, br, zstd``
+    """
+    return ', '.join(x.strip() for x in ACCEPT_ENCODING.split(','))
+
+
+def default_client():
+    """Get the client used by the module level functions
+
+    Returns:
+        BiblioClient: The shared client, created on first use
+    """
+    global _DEFAULT_CLIENT  # pylint: disable=global-statement
+
+    if _DEFAULT_CLIENT is None:
+        with _DEFAULT_CLIENT_LOCK:
+            if _DEFAULT_CLIENT is None:
+                _DEFAULT_CLIENT = BiblioClient()
+
+    return _DEFAULT_CLIENT
+
+
+def set_default_client(client):
+    """Replace the client used by the module level functions
+
+    Args:
+        client (BiblioClient): The new default client, or None to create a fresh one on next use
+    """
+    global _DEFAULT_CLIENT  # pylint: disable=global-statement
+
+    with _DEFAULT_CLIENT_LOCK:
+        _DEFAULT_CLIENT = client
+
+
+def single_publication(publication_id, fields=None):
     """Get a single publication as a named tuple
 
     Args:
         publication_id (int): The numerical id, of the wanted publication
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
     Returns:
         A named tuple if a publication is found,
         None when nothing is found.
     """
-    try:
-        publication_id = int(publication_id)
-    except ValueError:
-        raise InvalidID(
-            '{0} should be an integer.'
-            .format(publication_id)
-        )
-
-    url = BASE_URL + 'publication/' + str(publication_id)
+    return default_client().single_publication(publication_id, fields=fields)
 
-    return get_result(url, {})
 
-
-def publications_by_person(ugent_id):
+def publications_by_person(ugent_id, fields=None):
     """Get all the publications of a person
 
     Args:
         ugent_id (str): The numerical ugent_id of the person
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
     Returns:
         A list with named tuples of all the publications of the given person.
         If no person or publications are found, an empty list is returned.
     """
-    try:
-        ugent_id_int = int(ugent_id)
-    except ValueError:
-        raise InvalidID(
-            '{0} is an invalid format for a UGentID. It should be an integer.'
-            .format(ugent_id)
-        )
-
-    url = BASE_URL + 'person/' + str(ugent_id_int) + '/publication/export'
-
-    return get_result(url, {})
+    return default_client().publications_by_person(ugent_id, fields=fields)
 
 
-def publications_by_organisation(organisation_id, year=None):
+def publications_by_organisation(organisation_id, year=None, fields=None):
     """Get all the publications of an organisation
 
     Args:
         organisation_id (str): The id of the organisation.
         year (int): The year of publication. When omitted, all the publications are returned
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
     Returns:
         A list with named tuples of all the publications of the given organisation.
         If no organisation is found, None is returned.
         If no publication is found, an empty list is returned
     """
-    year_prefix = ''
-
-    if year:
-        if not str(year).isdigit():
-            raise InvalidYear('Year should be an integer')
-
-        year_prefix = '/' + str(year)
+    return default_client().publications_by_organisation(organisation_id, year, fields=fields)
 
-    url = BASE_URL + 'organization/' + organisation_id + year_prefix + '/publication/export'
 
-    return get_result(url, {})
-
-
-def publications_by_group(ugent_ids):
+def publications_by_group(ugent_ids, fields=None):
     """Get all the publications of an group of people
 
     Args:
         ugent_ids (list): A list of integers
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
     Returns:
         A list with named tuples of all the publications that
         share the group of people
         If no person or publications are found, an empty list is returned.
     """
-    try:
-        ugent_ids_int = [int(x) for x in ugent_ids]
-    except ValueError:
-        raise InvalidID('Not all IDs are valid integers.')
-
-    url = BASE_URL + 'group/' + ','.join([str(x) for x in ugent_ids_int]) + '/publication/export'
+    return default_client().publications_by_group(ugent_ids, fields=fields)
 
-    return get_result(url, {})
 
-
-def publications_by_project(project_id):
+def publications_by_project(project_id, fields=None):
     """Get all the publications of a project
 
     Args:
         project_id (str): The id of the project
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
     Returns:
         A list with named tuples of all the publications that
         belong to the given project.
         When no project or publications are found, an empty list is returned.
     """
-    url = BASE_URL + 'project/' + project_id + '/publication/export'
-
-    return get_result(url, {})
+    return default_client().publications_by_project(project_id, fields=fields)
 
 
-def search(query=None):
+def search(query=None, fields=None):
     """Search the Biblio Api for publications having a certain keyword.
 
     Args:
         query (str): the keyword that needs to be searched
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
     Returns:
         A list with named tuples of all the publications that
         match the query
         When no publications are found, an empty list is returned.
     """
-    url = BASE_URL + 'publication/export'
+    return default_client().search(query, fields=fields)
+
+
+def iter_publications_by_person(ugent_id, fields=None):
+    """Iterate over all the publications of a person, while they are downloaded
+
+    Args:
+        ugent_id (str): The numerical ugent_id of the person
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
+    Returns:
+        A generator of named tuples of all the publications of the given person.
+    """
+    return default_client().iter_publications_by_person(ugent_id, fields=fields)
+
+
+def iter_publications_by_organisation(organisation_id, year=None, fields=None):
+    """Iterate over all the publications of an organisation, while they are downloaded
+
+    Args:
+        organisation_id (str): The id of the organisation.
+        year (int): The year of publication. When omitted, all the publications are returned
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
+    Returns:
+        A generator of named tuples of all the publications of the given organisation.
+    """
+    return default_client().iter_publications_by_organisation(organisation_id, year, fields=fields)
+
+
+def iter_publications_by_group(ugent_ids, fields=None):
+    """Iterate over all the publications of a group of people, while they are downloaded
+
+    Args:
+        ugent_ids (list): A list of integers
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
+    Returns:
+        A generator of named tuples of all the publications that share the group of people.
+    """
+    return default_client().iter_publications_by_group(ugent_ids, fields=fields)
+
+
+def iter_publications_by_project(project_id, fields=None):
+    """Iterate over all the publications of a project, while they are downloaded
+
+    Args:
+        project_id (str): The id of the project
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
+    Returns:
+        A generator of named tuples of all the publications that belong to the given project.
+    """
+    return default_client().iter_publications_by_project(project_id, fields=fields)
+
+
+def iter_search(query=None, fields=None):
+    """Iterate over the publications having a certain keyword, while they are downloaded
+
+    Args:
+        query (str): the keyword that needs to be searched
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
+    Returns:
+        A generator of named tuples of all the publications that match the query.
+    """
+    return default_client().iter_search(query, fields=fields)
+
+
+def iter_publications_by_organisation_sharded(organisation_id, first_year, last_year=None,
+                                              max_workers=DEFAULT_SHARD_WORKERS, retries=DEFAULT_SHARD_RETRIES,
+                                              fields=None):
+    """Download the publications of an organisation with one request per year, in parallel
+
+    The publications are generated as soon as the export of their year is downloaded,
+    every publication only once. A year that is not available is retried on its own
+    by the scheduler of the client, with its backoff. Other errors, such as invalid json, are not retried.
+    Publications without a year are not part of any per-year export.
+
+    Args:
+        organisation_id (str): The id of the organisation.
+        first_year (int): The first year to download
+        last_year (int): The last year to download, the current year when omitted
+        max_workers (int): The maximum number of concurrent requests
+        retries (int): The number of times a year is downloaded again when it is still not available
+            after the retries of the scheduler. Every time, the scheduler retries it again
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
+    Returns:
+        A generator of named tuples of the publications of the given organisation.
+    Raises:
+        InvalidYear: When a year is not an integer
+        IncompleteExport: At the end, when some years still failed after the retries
+    """
+    return default_client().iter_publications_by_organisation_sharded(
+        organisation_id, first_year, last_year, max_workers, retries, fields
+    )
+
+
+def publications_by_organisation_sharded(organisation_id, first_year, last_year=None,
+                                         max_workers=DEFAULT_SHARD_WORKERS, retries=DEFAULT_SHARD_RETRIES, fields=None):
+    """Get the publications of an organisation with one request per year, in parallel
+
+    See :func:`iter_publications_by_organisation_sharded`.
+
+    Returns:
+        A list with named tuples of the publications of the given organisation.
+    """
+    return default_client().publications_by_organisation_sharded(
+        organisation_id, first_year, last_year, max_workers, retries, fields
+    )
+
+
+def fetch_publications(publication_ids, max_workers=DEFAULT_POOL_MAXSIZE, ordered=True, fields=None):
+    """Get many publications at once, using a pool of threads
+
+    All the ids are validated before the first request is sent, and every id is only requested once.
+    A failing request does not stop the others, the error is returned with its id instead.
+    Use a :class:`BiblioClient` with a ``pool_maxsize`` of at least ``max_workers``
+    to keep all the connections alive.
+
+    Args:
+        publication_ids (list): The numerical ids of the wanted publications
+        max_workers (int): The maximum number of concurrent requests
+        ordered (bool): Generate the results in the order of the ids.
+            When False, the results are generated as soon as they are available.
+        fields (list): Only decode these fields, see :func:`json_string_to_namedtuple`
+    Returns:
+        A generator of PublicationResult named tuples, with the id, the publication
+        (None when nothing is found) and the error (None when the request succeeded).
+    Raises:
+        InvalidID: When one of the ids is not an integer
+    """
+    return default_client().fetch_publications(publication_ids, max_workers, ordered, fields=fields)
+
+
+def publication_url(publication_id, base_url=None):
+    """Build the url of a single publication
+
+    Raises:
+        InvalidID: When the id is not an integer
+    """
+    try:
+        publication_id = int(publication_id)
+    except ValueError:
+        raise InvalidID(
+            '{0} should be an integer.'
+            .format(publication_id)
+        )
+
+    return (base_url or BASE_URL) + 'publication/' + str(publication_id)
+
+
+def person_export_url(ugent_id, base_url=None):
+    """Build the export url of the publications of a person
+
+    Raises:
+        InvalidID: When the UGentID is not an integer
+    """
+    try:
+        ugent_id_int = int(ugent_id)
+    except ValueError:
+        raise InvalidID(
+            '{0} is an invalid format for a UGentID. It should be an integer.'
+            .format(ugent_id)
+        )
+
+    return (base_url or BASE_URL) + 'person/' + str(ugent_id_int) + '/publication/export'
+
+
+def organisation_export_url(organisation_id, year=None, base_url=None):
+    """Build the export url of the publications of an organisation
+
+    Raises:
+        InvalidYear: When the year is not an integer
+    """
+    year_prefix = ''
 
+    if year:
+        if not str(year).isdigit():
+            raise InvalidYear('Year should be an integer')
+
+        year_prefix = '/' + str(year)
+
+    return (base_url or BASE_URL) + 'organization/' + organisation_id + year_prefix + '/publication/export'
+
+
+def group_export_url(ugent_ids, base_url=None):
+    """Build the export url of the publications of a group of people
+
+    Raises:
+        InvalidID: When not all the UGentIDs are integers
+    """
+    try:
+        ugent_ids_int = [int(x) for x in ugent_ids]
+    except ValueError:
+        raise InvalidID('Not all IDs are valid integers.')
+
+    return (base_url or BASE_URL) + 'group/' + ','.join([str(x) for x in ugent_ids_int]) + '/publication/export'
+
+
+def project_export_url(project_id, base_url=None):
+    """Build the export url of the publications of a project"""
+    return (base_url or BASE_URL) + 'project/' + project_id + '/publication/export'
+
+
+def search_url(base_url=None):
+    """Build the url used to search publications"""
+    return (base_url or BASE_URL) + 'publication/export'
+
+
+def search_params(query=None):
+    """Build the get-parameters used to search publications"""
     params = {}
 
     if query:
         params['q'] = query
 
-    return get_result(url, params)
+    return params
+
+
+def get_result(url, params, many=None, fields=None):
+    """Get an API-response with the default client, see :meth:`BiblioClient.get_result`"""
+    return default_client().get_result(url, params, many, fields)
+
 
+def iter_result(url, params, fields=None):
+    """Stream an API-response with the default client, see :meth:`BiblioClient.iter_result`"""
+    return default_client().iter_result(url, params, fields)
 
-def get_result(url, params):
-    """Get an API-response, formatted as json back from the API.
+
+def parse_result(text, decoder=None, many=None):
+    """Decode the body of an API-response
 
     Args:
-        url (str): The url that needs to be queried, without get-parameters
+        text (str or bytes): A single json, or one json per line. Bytes are utf-8,
+            and are only decoded to str when the decoder does not accept bytes, see :func:`accepts_bytes`
+        decoder (callable): Decodes one json string, :func:`json_string_to_namedtuple` by default
+        many (bool): True when the text has one json per line, False for a single json.
+            When omitted, the text is decoded as a single json first.
     Returns:
-        When encountering a status_code other then 200, None is returned.
-        If a single json is found, it is returned as a dict.
-        If multiple jsons are found, they are returns as dicts in a list.
+        A named tuple when the text is a single json,
+        a list with named tuples when there is one json per line.
     """
-    params['format'] = 'json'
+    decoder = decoder or json_string_to_namedtuple
 
-    response = requests.get(url, params=params)
+    if isinstance(text, bytes) and not accepts_bytes(decoder):
+        text = text.decode('utf-8')
 
-    if response.status_code == 200:
+    if many is None:
         try:
-            return json_string_to_namedtuple(response.text)
+            return decoder(text)
         except ValueError:
             # some of the api calls return one json object per line
-            json_string_list = response.text.split('\n')
+            many = True
+
+    if many:
+        return [decoder(x) for x in iter_ndjson(text)]
+
+    return decoder(text)
+
+
+def iter_ndjson(text):
+    """Generate the lines of a text with one json per line
+
+    The text is scanned for line ends, so no list with all the lines is built.
+
+    Args:
+        text (str or bytes): One json per line
+    Returns:
+        A generator of the lines that are not empty, of the same type as the text
+    """
+    newline = b'\n' if isinstance(text, bytes) else '\n'
+    start = 0
+    length = len(text)
+
+    while start < length:
+        end = text.find(newline, start)
 
-            return [json_string_to_namedtuple(x) for x in json_string_list if x]
+        if end == -1:
+            end = length
 
-    return None
+        if end > start:
+            line = text[start:end]
 
+            if not line.isspace():
+                yield line
 
-def json_string_to_namedtuple(string):
+        start = end + 1
+
+
+def json_string_to_namedtuple(string, fields=None):
     """
 
     Args:
         string: a string representing a json that needs to be converted
         to a named tuple
+        fields (list): Only keep these fields, by their attribute name.
+            Use a dotted name to keep a field of a nested object, e.g. ``author.last_name``.
+            The json is still parsed completely, but no named tuples are built for the other fields.
 
     Returns:
         namedtuple
     """
-    return json.loads(
-        string,
-        object_hook=dictionary_to_namedtuple
-    )
+    if not _JSON_BACKEND:
+        set_json_backend()
+
+    if fields is not None:
+        return project(_JSON_BACKEND['loads'](string), compile_fields(fields))
+
+    if _JSON_BACKEND['name'] == 'json':
+        # converting in the object_hook is faster than a separate pass with the stdlib decoder
+        return json.loads(
+            string,
+            object_hook=dictionary_to_namedtuple
+        )
+
+    return to_namedtuple(_JSON_BACKEND['loads'](string))
+
+
+json_string_to_namedtuple.accepts_bytes = True
+
+
+def to_namedtuple(value):
+    """Convert the dicts in a decoded json to named tuples, with normalized keys
+
+    The lists in the value are updated in place.
+
+    Args:
+        value: The output of a json decoder
+
+    Returns:
+        The value, with every dict replaced by a named tuple
+    """
+    if type(value) is dict:  # pylint: disable=unidiomatic-typecheck
+        keys = tuple(value)
+        record_type = RECORD_TYPES.lookup(keys)
+        values = list(value.values())
+        index = 0
+
+        for item in values:
+            item_type = type(item)
+
+            if item_type is dict or item_type is list:
+                values[index] = to_namedtuple(item)
+
+            index += 1
+
+        if record_type is None:
+            # two keys are the same after normalizing, the last one wins
+            return dictionary_to_namedtuple(OrderedDict(zip(keys, values)))
+
+        return record_type(*values)
+
+    if type(value) is list:  # pylint: disable=unidiomatic-typecheck
+        index = 0
+
+        for item in value:
+            item_type = type(item)
+
+            if item_type is dict or item_type is list:
+                value[index] = to_namedtuple(item)
+
+            index += 1
+
+    return value
+
+
+class Projection(object):
+    """The fields to keep while decoding, see :func:`compile_fields`
+
+    Args:
+        fields (dict): Maps the attribute names to the projection of their nested fields,
+            or to None to keep the whole value
+    """
+
+    __slots__ = ('fields', '_plans')
+
+    def __init__(self, fields):
+        self.fields = fields
+        self._plans = {}
+
+    def plan(self, keys):
+        """Which keys of a json object to keep, and the type of the named tuple
+
+        Args:
+            keys (tuple): The keys of the object, as they are in the json
+        Returns:
+            tuple: The record type, or None when it has to be built from the keys,
+                and a list of the kept keys with the projection of their value
+        """
+        plan = self._plans.get(keys)
+
+        if plan is not None:
+            return plan
+
+        kept = [(key, self.fields[normalize_key(key)]) for key in keys if normalize_key(key) in self.fields]
+        plan = (RECORD_TYPES.lookup(tuple(key for key, _ in kept)), kept)
+
+        if len(self._plans) < MAX_RECORD_TYPES:
+            self._plans[keys] = plan
+
+        return plan
+
+
+def compile_fields(fields):
+    """Build the projection of a list of (dotted) field names
+
+    Args:
+        fields (list): Attribute names, e.g. ``['id', 'title', 'author.last_name']``
+    Returns:
+        Projection: Shared by all the calls with the same fields
+    """
+    key = tuple(sorted(fields))
+    projection = _PROJECTIONS.get(key)
+
+    if projection is not None:
+        return projection
+
+    tree = {}
+
+    for field in key:
+        node = tree
+        names = field.split('.')
+
+        for index, name in enumerate(names):
+            if index == len(names) - 1:
+                node[name] = None
+            elif name in node and node[name] is None:
+                # the whole object is already kept
+                break
+            else:
+                node = node.setdefault(name, {})
+
+    projection = _to_projection(tree)
+
+    if len(_PROJECTIONS) < MAX_PROJECTIONS:
+        _PROJECTIONS[key] = projection
+
+    return projection
+
+
+def _to_projection(tree):
+    return Projection(dict((name, None if node is None else _to_projection(node)) for name, node in tree.items()))
+
+
+def project(value, projection):
+    """Convert the fields of a decoded json that are in the projection to named tuples, and drop the others
+
+    Args:
+        value: The output of a json decoder
+        projection (Projection): The fields to keep, see :func:`compile_fields`
+    Returns:
+        The value with only the fields in the projection, every dict replaced by a named tuple
+    """
+    if type(value) is list:  # pylint: disable=unidiomatic-typecheck
+        return [project(item, projection) for item in value]
+
+    if type(value) is not dict:  # pylint: disable=unidiomatic-typecheck
+        return value
+
+    record_type, kept = projection.plan(tuple(value))
+    values = []
+
+    for key, nested in kept:
+        item = value[key]
+        item_type = type(item)
+
+        if item_type is dict or item_type is list:
+            item = to_namedtuple(item) if nested is None else project(item, nested)
+
+        values.append(item)
+
+    if record_type is None:
+        # two keys are the same after normalizing, the last one wins
+        return dictionary_to_namedtuple(OrderedDict(zip([key for key, _ in kept], values)))
+
+    return record_type(*values)
+
+
+def select_decoder(decoder, fields):
+    """The decoder of a call with a projection on `fields`
+
+    Raises:
+        ValueError: When fields are given and the decoder is not :func:`json_string_to_namedtuple`
+    """
+    if fields is None:
+        return decoder
+
+    if decoder is not json_string_to_namedtuple:
+        raise ValueError('fields can only be used with the default decoder')
+
+    return projection_decoder(fields)
+
+
+def projection_decoder(fields):
+    """A decoder like :func:`json_string_to_namedtuple`, that only keeps the given fields"""
+    projection = compile_fields(fields)
+
+    def decode(string):
+        if not _JSON_BACKEND:
+            set_json_backend()
+
+        return project(_JSON_BACKEND['loads'](string), projection)
+
+    decode.accepts_bytes = True
+
+    return decode
+
+
+def accepts_bytes(decoder):
+    """Check if a decoder can decode utf-8 bytes
+
+    The lines of a response are given to such a decoder as they were received,
+    without decoding them to str first. The decoders of this package set ``accepts_bytes = True``,
+    as they decode with the json library of :func:`set_json_backend`. They only get bytes when
+    that library accepts bytes: orjson, ujson, and json from Python 3.6.
+    Set ``accepts_bytes = True`` on a decoder of your own that uses :func:`json_loads` to give it bytes too.
+
+    Returns:
+        bool
+    """
+    if getattr(decoder, 'accepts_bytes', False) is not True:
+        return False
+
+    if not _JSON_BACKEND:
+        set_json_backend()
+
+    return _JSON_BACKEND['bytes']
+
+
+def _stdlib_loads():
+    return json.loads
+
+
+def _orjson_loads():
+    import orjson  # pylint: disable=import-error
+    return orjson.loads
+
+
+def _ujson_loads():
+    import ujson  # pylint: disable=import-error
+    return ujson.loads
+
+
+# The json decoders that can be used, in order of preference
+JSON_BACKENDS = OrderedDict([
+    ('orjson', _orjson_loads),
+    ('ujson', _ujson_loads),
+    ('json', _stdlib_loads),
+])
+
+_JSON_BACKEND = {}
+
+
+def set_json_backend(name='auto'):
+    """Choose the library used to decode json
+
+    Args:
+        name (str): orjson, ujson or json. With auto, the first one that is installed is used, in that order.
+
+    Returns:
+        str: The name of the library that is used
+
+    Raises:
+        ValueError: When the name is unknown
+        ImportError: When the library is not installed
+    """
+    if name == 'auto':
+        for candidate, loader in JSON_BACKENDS.items():
+            try:
+                loads = loader()
+            except ImportError:
+                continue
+
+            name = candidate
+            break
+    elif name in JSON_BACKENDS:
+        loads = JSON_BACKENDS[name]()
+    else:
+        raise ValueError('Unknown json backend {0}, use one of {1}'.format(name, ', '.join(JSON_BACKENDS)))
+
+    _JSON_BACKEND['name'] = name
+    _JSON_BACKEND['loads'] = loads
+    # json.loads only accepts bytes from Python 3.6
+    _JSON_BACKEND['bytes'] = name != 'json' or sys.version_info >= (3, 6)
+
+    return name
+
+
+def json_backend():
+    """The name of the library used to decode json"""
+    if not _JSON_BACKEND:
+        set_json_backend()
+
+    return _JSON_BACKEND['name']
+
+
+def json_loads(string):
+    """Decode a json string, to plain dicts and lists, with the chosen backend
+
+    Raises:
+        ValueError: When the string is not valid json
+    """
+    try:
+        loads = _JSON_BACKEND['loads']
+    except KeyError:
+        set_json_backend()
+        loads = _JSON_BACKEND['loads']
+
+    return loads(string)
+
+
+def normalize_key(key):
+    """Translate an API field name to a valid attribute name
+
+    Hyphens are replaced with underscores and a leading underscore is removed,
+    e.g. ``_id`` becomes ``id`` and ``chicago-author-date`` becomes ``chicago_author_date``.
+
+    Args:
+        key (str): The field name as returned by the API
+
+    Returns:
+        str: The normalized field name
+    """
+    try:
+        return _NORMALIZED_KEYS[key]
+    except KeyError:
+        pass
+
+    new_key = key.replace('-', '_')
+
+    if new_key.startswith('_'):
+        new_key = new_key[1:]
+
+    if len(_NORMALIZED_KEYS) < MAX_NORMALIZED_KEYS:
+        _NORMALIZED_KEYS[key] = new_key
+
+    return new_key
 
 
 def dictionary_to_namedtuple(item):
@@ -226,15 +1499,14 @@ def dictionary_to_namedtuple(item):
         namedtuple: Containing the recursive indexed data of the dict
 
     """
-    for key, value in item.items():  # pylint: disable=unused-variable
+    record_type = RECORD_TYPES.lookup(tuple(item))
 
-        new_key = key
+    if record_type is not None:
+        return record_type(*item.values())
 
-        if '-' in new_key:
-            new_key = key.replace('-', '_')
-            item[new_key] = item.pop(key)
+    normalized = OrderedDict()
 
-        if new_key.startswith('_'):
-            item[new_key[1:]] = item.pop(new_key)
+    for key, value in item.items():
+        normalized[normalize_key(key)] = value
 
-    return namedtuple('d', item.keys(), rename=False)(*item.values())
+    return RECORD_TYPES.get(normalized.keys())(*normalized.values())
@@ -0,0 +1,482 @@
+# encoding: utf-8
+
+"""
+Response caches
+===============
+
+``MemoryCache`` keeps decoded results in memory, for pipelines that ask for the same
+publications over and over. Unknown ids are remembered too, for a shorter time,
+so repeated bad ids do not reach the API.
+
+.. code:: python
+
+    client = BiblioClient(memo=MemoryCache(maxsize=10000, ttl=10 * MINUTE))
+
+``ResponseCache`` is a persistent cache for API-responses, stored in a SQLite database.
+Responses are kept compressed, expire after a time to live per endpoint, and the least
+recently used responses are evicted when the cache grows too big.
+Expired responses are revalidated with ``If-None-Match`` and ``If-Modified-Since``
+when the API provided an ``ETag`` or ``Last-Modified`` header.
+
+.. code:: python
+
+    cache = ResponseCache('biblio.sqlite', ttls={'publication': 7 * DAY})
+    client = BiblioClient(cache=cache)
+
+``SingleFlight`` coalesces identical calls that run at the same time: the first one is sent to the API,
+the others wait for it and get the same result. Clients use one by default.
+:class:`biblio.aio.AsyncSingleFlight` does the same for coroutines.
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple, OrderedDict
+from concurrent.futures import Future
+
+try:
+    from urllib.parse import urlencode, urlparse
+except ImportError:  # pragma: no cover
+    from urllib import urlencode
+    from urlparse import urlparse
+
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+DEFAULT_TTL = DAY
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+DEFAULT_MEMO_SIZE = 1024
+DEFAULT_MEMO_TTL = 5 * MINUTE
+DEFAULT_NEGATIVE_TTL = 30
+
+# Read compressed bodies in steps of this size, so streaming from the cache uses little memory
+READ_SIZE = 64 * 1024
+
+MemoInfo = namedtuple('MemoInfo', ['hits', 'misses', 'negative_hits', 'maxsize', 'currsize'])
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'revalidated', 'bytes_saved', 'entries', 'size'])
+
+COUNTERS = ('hits', 'misses', 'revalidated', 'bytes_saved')
+
+
+def cache_key(url, params):
+    """The key of a request in the cache
+
+    Args:
+        url (str): The url, without get-parameters
+        params (dict): The get-parameters
+    Returns:
+        str: The url with the sorted get-parameters
+    """
+    if not params:
+        return url
+
+    return url + '?' + urlencode(sorted(params.items()))
+
+
+def endpoint_of(url):
+    """The name of the endpoint an url belongs to
+
+    Returns:
+        str: One of publication, person, organisation, group, project or search
+    """
+    segments = [x for x in urlparse(url).path.split('/') if x]
+
+    if not segments:
+        return None
+
+    if segments[0] == 'publication' and segments[-1] == 'export':
+        return 'search'
+
+    if segments[0] == 'organization':
+        return 'organisation'
+
+    return segments[0]
+
+
+class MemoryCache(object):
+    """Thread-safe in-memory LRU cache of decoded results, with a time to live
+
+    Results of None, returned for unknown ids, are cached as well with their own time to live.
+
+    Args:
+        maxsize (int): The maximum number of results to keep
+        ttl (int): Seconds a result is kept
+        negative_ttl (int): Seconds a None result is kept
+    """
+
+    MISSING = object()
+
+    def __init__(self, maxsize=DEFAULT_MEMO_SIZE, ttl=DEFAULT_MEMO_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._negative_hits = 0
+
+    def get(self, key):
+        """Look up a result
+
+        Returns:
+            The result, or ``MemoryCache.MISSING`` when nothing or an expired result is stored
+        """
+        with self._lock:
+            item = self._results.get(key)
+
+            if item is None or item[0] <= time.time():
+                if item is not None:
+                    del self._results[key]
+
+                self._misses += 1
+                return self.MISSING
+
+            del self._results[key]
+            self._results[key] = item
+
+            if item[1] is None:
+                self._negative_hits += 1
+            else:
+                self._hits += 1
+
+            return item[1]
+
+    def set(self, key, result):
+        """Store a result"""
+        expires_at = time.time() + (self.negative_ttl if result is None else self.ttl)
+
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = (expires_at, result)
+
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def cache_info(self):
+        """Get the statistics of the cache
+
+        Returns:
+            MemoInfo: hits, misses, negative_hits (hits on a None result), maxsize and currsize
+        """
+        with self._lock:
+            return MemoInfo(self._hits, self._misses, self._negative_hits, self.maxsize, len(self._results))
+
+    def cache_clear(self):
+        """Remove all the results and reset the statistics"""
+        with self._lock:
+            self._results.clear()
+            self._hits = 0
+            self._misses = 0
+            self._negative_hits = 0
+
+
+class SingleFlight(object):
+    """Thread-safe coalescing of concurrent calls with the same key
+
+    The first caller of a key runs the call, callers of the same key that arrive
+    while it runs wait for it, and get its result or its exception.
+    Nothing is kept after the call finished, a later caller runs the call again.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._coalesced = 0
+
+    def do(self, key, function):
+        """Run `function`, unless a call with the same key is running already
+
+        Args:
+            key: A hashable key, e.g. from :func:`cache_key`
+            function (callable): Called without arguments
+        Returns:
+            tuple: The result, and True when it is the result of another caller
+        Raises:
+            Exception: The exception of the call
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            shared = future is not None
+
+            if shared:
+                self._coalesced += 1
+            else:
+                future = self._calls[key] = Future()
+
+        if shared:
+            return future.result(), True
+
+        try:
+            result = function()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        return result, False
+
+    @property
+    def coalesced(self):
+        """The number of calls that got the result of another caller"""
+        return self._coalesced
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class CacheEntry(object):
+    """A response stored in the cache"""
+
+    def __init__(self, key, data, etag, last_modified, fresh):
+        self.key = key
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh = fresh
+
+    @property
+    def body(self):
+        """The uncompressed body"""
+        return zlib.decompress(self.data)
+
+    @property
+    def text(self):
+        """The uncompressed body as text"""
+        return self.body.decode('utf-8')
+
+    def iter_lines(self):
+        """Generate the lines of the body, decompressing little by little"""
+        decompressor = zlib.decompressobj()
+        rest = b''
+
+        for start in range(0, len(self.data), READ_SIZE):
+            lines = (rest + decompressor.decompress(self.data[start:start + READ_SIZE])).split(b'\n')
+            rest = lines.pop()
+
+            for line in lines:
+                yield line
+
+        rest += decompressor.flush()
+
+        for line in rest.split(b'\n'):
+            yield line
+
+    def validators(self):
+        """The headers to revalidate this response
+
+        Returns:
+            dict: If-None-Match and If-Modified-Since, when known
+        """
+        headers = {}
+
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+
+        return headers
+
+
+class CacheWriter(object):
+    """Compresses a response while it is downloaded, and stores it when it is complete"""
+
+    def __init__(self, cache, url, params, headers):
+        self.cache = cache
+        self.url = url
+        self.params = params
+        self.headers = headers
+        self._compressor = zlib.compressobj()
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        self._size += len(data)
+        self._chunks.append(self._compressor.compress(data))
+
+    def commit(self):
+        self._chunks.append(self._compressor.flush())
+        self.cache.store_compressed(self.url, self.params, b''.join(self._chunks), self._size, self.headers)
+
+
+class ResponseCache(object):
+    """Persistent cache of API-responses in a SQLite database
+
+    Args:
+        path (str): The path of the database, ``:memory:`` for a cache that is not persisted
+        ttl (int): Seconds before a response needs to be revalidated
+        ttls (dict): Seconds per endpoint (publication, person, organisation, group, project, search),
+            overriding ``ttl``
+        max_size (int): The maximum number of compressed bytes to keep
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, ttls=None, max_size=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT,
+                data BLOB,
+                size INTEGER,
+                body_size INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL,
+                accessed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER
+            );
+        """)
+        self._db.commit()
+
+    def ttl_of(self, url):
+        """The time to live of the responses of an url"""
+        return self.ttls.get(endpoint_of(url), self.ttl)
+
+    def get(self, url, params):
+        """Look up a response
+
+        Counts a hit when a fresh response is found and a miss otherwise.
+
+        Returns:
+            CacheEntry: The stored response, also when it is expired. None when nothing is stored
+        """
+        key = cache_key(url, params)
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                'SELECT data, etag, last_modified, stored_at, body_size FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None:
+                self._count('misses')
+                self._db.commit()
+                return None
+
+            data, etag, last_modified, stored_at, body_size = row
+            fresh = now - stored_at < self.ttl_of(url)
+
+            if fresh:
+                self._count('hits')
+                self._count('bytes_saved', body_size)
+                self._db.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            else:
+                self._count('misses')
+
+            self._db.commit()
+
+        return CacheEntry(key, bytes(data), etag, last_modified, fresh)
+
+    def revalidated(self, entry):
+        """Mark an expired response as fresh again, after the API answered 304 Not Modified"""
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body_size FROM responses WHERE key = ?', (entry.key,)
+            ).fetchone()
+            self._db.execute(
+                'UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?', (now, now, entry.key)
+            )
+            self._count('revalidated')
+
+            if row is not None:
+                self._count('bytes_saved', row[0])
+
+            self._db.commit()
+
+        entry.fresh = True
+
+    def store(self, url, params, body, headers):
+        """Store a response
+
+        Args:
+            url (str): The url, without get-parameters
+            params (dict): The get-parameters
+            body (bytes): The body of the response
+            headers (dict): The headers of the response
+        """
+        self.store_compressed(url, params, zlib.compress(body), len(body), headers)
+
+    def writer(self, url, params, headers):
+        """Get a writer to store a response while it is streamed
+
+        Returns:
+            CacheWriter: call ``write`` with every piece of the body and ``commit`` at the end
+        """
+        return CacheWriter(self, url, params, headers)
+
+    def store_compressed(self, url, params, data, body_size, headers):
+        """Store a response that is already compressed with zlib"""
+        now = time.time()
+
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (cache_key(url, params), endpoint_of(url), sqlite3.Binary(data), len(data), body_size,
+                 headers.get('ETag'), headers.get('Last-Modified'), now, now)
+            )
+            self._evict()
+            self._db.commit()
+
+    def stats(self):
+        """Get the statistics of the cache
+
+        Returns:
+            CacheStats: hits, misses, revalidated and bytes_saved since the cache was created,
+            and the current number of entries and their compressed size.
+        """
+        with self._lock:
+            counters = dict(self._db.execute('SELECT name, value FROM counters'))
+            entries, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+
+        return CacheStats(*([counters.get(x, 0) for x in COUNTERS] + [entries, size]))
+
+    def clear(self):
+        """Remove all the responses and reset the statistics"""
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+            self._db.execute('DELETE FROM counters')
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def _count(self, name, value=1):
+        self._db.execute('INSERT OR IGNORE INTO counters VALUES (?, 0)', (name,))
+        self._db.execute('UPDATE counters SET value = value + ? WHERE name = ?', (value, name))
+
+    def _evict(self):
+        size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+        if size <= self.max_size:
+            return
+
+        rows = self._db.execute('SELECT key, size FROM responses ORDER BY accessed_at').fetchall()
+
+        for key, entry_size in rows:
+            if size <= self.max_size:
+                break
+
+            self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            size -= entry_size
@@ -0,0 +1,257 @@
+# encoding: utf-8
+
+"""
+Columnar exports
+================
+
+Decode an export straight into columns, for analysis with pandas or Arrow.
+No named tuples are created: every line is decoded to a dict, and only the
+declared fields are copied to the column buffers.
+They need numpy and pandas, or pyarrow, install them with ``pip install ugentbiblio[dataframe]``.
+
+.. code:: python
+
+    frame = dataframe_by_organisation('PP02', year=2015)
+    frame.groupby('type').size()
+
+    for batch in iter_batches(client.iter_raw(url, {}), arrow=True):
+        writer.write_batch(batch)
+
+The default fields are id, year, type, title, first_author, journal and doi.
+Other fields can be added with a :class:`Field`.
+"""
+
+from collections import OrderedDict, namedtuple
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+try:
+    import pandas
+except ImportError:  # pragma: no cover
+    pandas = None
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+from .biblio import default_client, json_loads, organisation_export_url, person_export_url, group_export_url, \
+    project_export_url, search_url, search_params
+
+
+DEFAULT_BATCH_SIZE = 65536
+
+# Kinds of columns
+STRING = 'string'
+INTEGER = 'integer'
+
+Field = namedtuple('Field', 'name, extract, kind')
+Field.__doc__ = """A flattened column of an export
+
+Args:
+    name (str): The name of the column
+    extract (callable): Gets the decoded json object of a publication, and returns the value or None
+    kind (str): ``STRING`` or ``INTEGER``
+"""
+
+
+def _first(value):
+    if isinstance(value, list):
+        return value[0] if value else None
+
+    return value
+
+
+def _year(record):
+    year = record.get('year')
+
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
+
+
+def _first_author(record):
+    authors = record.get('author')
+
+    if not authors:
+        return None
+
+    author = authors[0]
+    name = ' '.join(part for part in (author.get('first_name'), author.get('last_name')) if part)
+
+    return name or author.get('name')
+
+
+FIELDS = (
+    Field('id', lambda record: record.get('_id'), STRING),
+    Field('year', _year, INTEGER),
+    Field('type', lambda record: record.get('type'), STRING),
+    Field('title', lambda record: _first(record.get('title')), STRING),
+    Field('first_author', _first_author, STRING),
+    Field('journal', lambda record: _first(record.get('publication')), STRING),
+    Field('doi', lambda record: _first(record.get('doi')), STRING),
+)
+
+
+def _require(module, name):
+    if module is None:
+        raise ImportError('{0} is not installed, install it with pip install ugentbiblio[dataframe]'.format(name))
+
+
+class ColumnBuilder(object):
+    """Buffers the values of the fields of the publications, one list per column
+
+    Args:
+        fields (tuple): The fields to keep, :data:`FIELDS` by default
+    """
+
+    def __init__(self, fields=None):
+        self.fields = tuple(fields or FIELDS)
+        self._columns = [[] for _ in self.fields]
+
+    def __len__(self):
+        return len(self._columns[0]) if self._columns else 0
+
+    def append(self, record):
+        """Add a decoded json object"""
+        for field, column in zip(self.fields, self._columns):
+            column.append(field.extract(record))
+
+    def append_line(self, line):
+        """Decode a line of an export, as str or bytes, and add it"""
+        self.append(json_loads(line))
+
+    def clear(self):
+        """Empty the buffers, the fields are kept"""
+        self._columns = [[] for _ in self.fields]
+
+    def columns(self):
+        """The buffers as numpy arrays
+
+        Strings are object arrays, integers are float64 arrays with NaN for missing values.
+
+        Returns:
+            OrderedDict: The arrays by field name
+        """
+        _require(numpy, 'numpy')
+
+        return OrderedDict(
+            (field.name, numpy.array(
+                [numpy.nan if value is None else value for value in column], dtype=numpy.float64
+            ) if field.kind == INTEGER else numpy.array(column, dtype=object))
+            for field, column in zip(self.fields, self._columns)
+        )
+
+    def record_batch(self):
+        """The buffers as an Arrow record batch, missing values are nulls"""
+        _require(pyarrow, 'pyarrow')
+
+        return pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(column, type=pyarrow.int64() if field.kind == INTEGER else pyarrow.string())
+             for field, column in zip(self.fields, self._columns)],
+            [field.name for field in self.fields],
+        )
+
+    def dataframe(self):
+        """The buffers as a pandas DataFrame, integer columns use the nullable Int64 type"""
+        _require(pandas, 'pandas')
+
+        return pandas.DataFrame(OrderedDict(
+            (field.name, pandas.array(column, dtype='Int64') if field.kind == INTEGER else column)
+            for field, column in zip(self.fields, self._columns)
+        ))
+
+
+def iter_batches(lines, fields=None, batch_size=DEFAULT_BATCH_SIZE, arrow=False):
+    """Decode the lines of an export in batches of columns
+
+    Args:
+        lines: An iterable of json lines, e.g. from :meth:`biblio.BiblioClient.iter_raw`
+        fields (tuple): The fields to keep, :data:`FIELDS` by default
+        batch_size (int): The number of publications in a batch
+        arrow (bool): Generate Arrow record batches instead of dicts of numpy arrays
+    Returns:
+        A generator of batches, the last one can be smaller
+    """
+    builder = ColumnBuilder(fields)
+
+    for line in lines:
+        if not line:
+            continue
+
+        builder.append_line(line)
+
+        if len(builder) >= batch_size:
+            yield builder.record_batch() if arrow else builder.columns()
+            builder.clear()
+
+    if len(builder):
+        yield builder.record_batch() if arrow else builder.columns()
+
+
+def to_columns(lines, fields=None):
+    """Decode all the lines of an export to numpy arrays, see :meth:`ColumnBuilder.columns`"""
+    return _build(lines, fields).columns()
+
+
+def to_table(lines, fields=None):
+    """Decode all the lines of an export to an Arrow table"""
+    _require(pyarrow, 'pyarrow')
+
+    return pyarrow.Table.from_batches([_build(lines, fields).record_batch()])
+
+
+def to_dataframe(lines, fields=None):
+    """Decode all the lines of an export to a pandas DataFrame, see :meth:`ColumnBuilder.dataframe`"""
+    return _build(lines, fields).dataframe()
+
+
+def _build(lines, fields):
+    builder = ColumnBuilder(fields)
+
+    for line in lines:
+        if line:
+            builder.append_line(line)
+
+    return builder
+
+
+def dataframe_by_organisation(organisation_id, year=None, fields=None, client=None):
+    """Download the publications of an organisation to a DataFrame
+
+    Args:
+        organisation_id (str): The id of the organisation.
+        year (int): The year of publication. When omitted, all the publications are returned
+        fields (tuple): The fields to keep, :data:`FIELDS` by default
+        client (biblio.BiblioClient): The client to use, the default client when omitted
+    """
+    client = client or default_client()
+    return to_dataframe(client.iter_raw(organisation_export_url(organisation_id, year, client.base_url), {}), fields)
+
+
+def dataframe_by_person(ugent_id, fields=None, client=None):
+    """Download the publications of a person to a DataFrame, see :func:`dataframe_by_organisation`"""
+    client = client or default_client()
+    return to_dataframe(client.iter_raw(person_export_url(ugent_id, client.base_url), {}), fields)
+
+
+def dataframe_by_group(ugent_ids, fields=None, client=None):
+    """Download the publications of a group of people to a DataFrame, see :func:`dataframe_by_organisation`"""
+    client = client or default_client()
+    return to_dataframe(client.iter_raw(group_export_url(ugent_ids, client.base_url), {}), fields)
+
+
+def dataframe_by_project(project_id, fields=None, client=None):
+    """Download the publications of a project to a DataFrame, see :func:`dataframe_by_organisation`"""
+    client = client or default_client()
+    return to_dataframe(client.iter_raw(project_export_url(project_id, client.base_url), {}), fields)
+
+
+def dataframe_search(query=None, fields=None, client=None):
+    """Download the results of a search to a DataFrame, see :func:`dataframe_by_organisation`"""
+    client = client or default_client()
+    return to_dataframe(client.iter_raw(search_url(client.base_url), search_params(query)), fields)
@@ -0,0 +1,224 @@
+# encoding: utf-8
+
+"""
+Group queries
+=============
+
+Publications of large groups of people, without one huge group request.
+The exports of the people are downloaded in parallel, and combined locally by publication id.
+Every export is kept for a while, so a person that is part of many groups is only downloaded once.
+
+.. code:: python
+
+    engine = GroupEngine(client)
+
+    engine.union(ugent_ids)                 # the publications of any of the people
+    engine.shared(ugent_ids)                # the publications of all of the people
+    engine.shared(ugent_ids, min_people=2)  # co-authored by at least two of them
+
+With ``strategy=CHUNKS``, :meth:`GroupEngine.shared` asks for the people in groups of ``chunk_size``,
+so the urls stay short. A group export has the publications that all the people of the group share,
+so the publications shared by everyone are those that are in the export of every group.
+This needs fewer requests, but can not count the people of a publication, so :meth:`GroupEngine.union`
+and ``shared`` with a ``min_people`` below the number of people still use one request per person.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .biblio import default_client, person_export_url, group_export_url, IncompleteExport, InvalidID
+from .cache import MemoryCache, HOUR
+
+
+# Strategies of a GroupEngine
+PERSONS = 'persons'
+CHUNKS = 'chunks'
+
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_GROUP_WORKERS = 4
+DEFAULT_EXPORT_CACHE_SIZE = 1024
+
+
+class GroupEngine(object):
+    """Download and combine the publications of groups of people
+
+    Args:
+        client (biblio.BiblioClient): The client to use, the default client when omitted
+        strategy (str): ``PERSONS`` for one request per person,
+            ``CHUNKS`` for group requests of ``chunk_size`` people in :meth:`shared`
+        chunk_size (int): The number of people in a group request
+        max_workers (int): The maximum number of concurrent requests
+        cache (biblio.cache.MemoryCache): Keeps the downloaded exports, by default 1024 exports for an hour
+    """
+
+    def __init__(self, client=None, strategy=PERSONS, chunk_size=DEFAULT_CHUNK_SIZE,
+                 max_workers=DEFAULT_GROUP_WORKERS, cache=None):
+        if strategy not in (PERSONS, CHUNKS):
+            raise ValueError('Unknown strategy {0}'.format(strategy))
+
+        self.client = client
+        self.strategy = strategy
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.cache = MemoryCache(DEFAULT_EXPORT_CACHE_SIZE, HOUR) if cache is None else cache
+
+    def by_person(self, ugent_ids, fields=None):
+        """Get the publications of every person
+
+        Args:
+            ugent_ids (list): The numerical ugent_ids of the people
+            fields (list): Only decode these fields, see :func:`biblio.biblio.json_string_to_namedtuple`
+        Returns:
+            OrderedDict: The list of publications of each ugent_id
+        Raises:
+            InvalidID: When not all the ugent_ids are integers
+            IncompleteExport: When some exports could not be downloaded
+        """
+        client = self.client or default_client()
+        ids = _validate(ugent_ids)
+
+        return self._exports(OrderedDict(
+            (ugent_id, person_export_url(ugent_id, client.base_url)) for ugent_id in ids
+        ), _with_id(fields))
+
+    def union(self, ugent_ids, fields=None):
+        """Get the publications of any of the people, every publication once
+
+        Args:
+            ugent_ids (list): The numerical ugent_ids of the people
+            fields (list): Only decode these fields, the id is always decoded
+        Returns:
+            list: The publications, in the order of the people
+        Raises:
+            InvalidID: When not all the ugent_ids are integers
+            IncompleteExport: When some exports could not be downloaded
+        """
+        # a group export only has the publications of all its people, so it can not give the union
+        exports = self.by_person(ugent_ids, fields)
+        publications = OrderedDict()
+
+        for export in exports.values():
+            for publication in export:
+                publications.setdefault(_id_of(publication), publication)
+
+        return list(publications.values())
+
+    def shared(self, ugent_ids, min_people=None, fields=None):
+        """Get the publications that the people have in common
+
+        Args:
+            ugent_ids (list): The numerical ugent_ids of the people
+            min_people (int): The number of the people a publication needs, all of them when omitted
+            fields (list): Only decode these fields, the id is always decoded
+        Returns:
+            list: The publications, in the order of the people
+        Raises:
+            InvalidID: When not all the ugent_ids are integers
+            IncompleteExport: When some exports could not be downloaded
+        """
+        ids = _validate(ugent_ids)
+
+        if self.strategy == CHUNKS and (min_people is None or min_people == len(ids)):
+            return self._shared_by_chunks(ids, fields)
+
+        exports = self.by_person(ids, fields)
+
+        if min_people is None:
+            min_people = len(exports)
+
+        publications = OrderedDict()
+        counts = {}
+
+        for export in exports.values():
+            # a person counts once, even when the export has a publication twice
+            for publication_id, publication in OrderedDict((_id_of(x), x) for x in export).items():
+                publications.setdefault(publication_id, publication)
+                counts[publication_id] = counts.get(publication_id, 0) + 1
+
+        return [publication for publication_id, publication in publications.items()
+                if counts[publication_id] >= min_people]
+
+    def _shared_by_chunks(self, ids, fields):
+        client = self.client or default_client()
+        urls = OrderedDict()
+
+        for start in range(0, len(ids), self.chunk_size):
+            chunk = ids[start:start + self.chunk_size]
+            urls[','.join(chunk)] = group_export_url(chunk, client.base_url)
+
+        exports = list(self._exports(urls, _with_id(fields)).values())
+
+        if not exports:
+            return []
+
+        # shared by everyone when every group shares it
+        others = [set(_id_of(x) for x in export) for export in exports[1:]]
+        publications = OrderedDict((_id_of(x), x) for x in exports[0])
+
+        return [publication for publication_id, publication in publications.items()
+                if all(publication_id in x for x in others)]
+
+    def _exports(self, urls, fields):
+        client = self.client or default_client()
+        suffix = '#' + ','.join(sorted(fields)) if fields is not None else ''
+        exports = OrderedDict()
+        missing = OrderedDict()
+
+        for key, url in urls.items():
+            export = self.cache.get(url + suffix)
+
+            if export is self.cache.MISSING:
+                missing[key] = url
+            else:
+                exports[key] = export
+
+        if missing:
+            errors = {}
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+            try:
+                futures = OrderedDict(
+                    (key, executor.submit(client.get_result, url, {}, True, fields)) for key, url in missing.items()
+                )
+
+                for key, future in futures.items():
+                    try:
+                        exports[key] = future.result() or []
+                    except Exception as error:  # pylint: disable=broad-except
+                        errors[key] = error
+                        continue
+
+                    self.cache.set(missing[key] + suffix, exports[key])
+            finally:
+                executor.shutdown(wait=True)
+
+            if errors:
+                raise IncompleteExport(
+                    'The export of {0} could not be downloaded'.format(', '.join(sorted(errors))), errors
+                )
+
+        # callers get their own lists, so the cached ones can not be changed
+        return OrderedDict((key, list(exports[key])) for key in urls)
+
+
+def _validate(ugent_ids):
+    try:
+        ids = [str(int(x)) for x in ugent_ids]
+    except (TypeError, ValueError):
+        raise InvalidID('Not all IDs are valid integers.')
+
+    return list(OrderedDict.fromkeys(ids))
+
+
+def _with_id(fields):
+    if fields is None or 'id' in fields:
+        return fields
+
+    return list(fields) + ['id']
+
+
+def _id_of(publication):
+    publication_id = getattr(publication, 'id', None)
+
+    # publications without an id are all kept
+    return publication_id if publication_id is not None else object()
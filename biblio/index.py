@@ -0,0 +1,172 @@
+# encoding: utf-8
+
+"""
+Publication index
+=================
+
+An in-memory index over publications that were downloaded before, to filter them
+without going over every publication.
+
+.. code:: python
+
+    index = PublicationIndex(publications_by_organisation('PP02'))
+
+    index.get('7175390')
+    index.where(year=2015, type='journalArticle')
+    index.where(author='802000574659', text='machine translation')
+    index.text('readability')
+"""
+
+import re
+from collections import defaultdict
+
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+try:
+    # json decodes strings to unicode on Python 2
+    TEXT_TYPES = basestring  # pylint: disable=undefined-variable
+except NameError:
+    TEXT_TYPES = str
+
+
+def tokenize(text):
+    """Split a text in lowercase words
+
+    Returns:
+        set: The words of the text
+    """
+    return set(TOKEN.findall(text.lower()))
+
+
+def _texts(value):
+    if value is None:
+        return []
+
+    if isinstance(value, (list, tuple)) and not hasattr(value, '_fields'):
+        return [x for x in value if isinstance(x, TEXT_TYPES)]
+
+    return [value] if isinstance(value, TEXT_TYPES) else []
+
+
+def _author_ids(publication):
+    ids = set()
+
+    for author in getattr(publication, 'author', None) or []:
+        ugent_id = getattr(author, 'ugent_id', None)
+
+        if isinstance(ugent_id, (list, tuple)):
+            ids.update(str(x) for x in ugent_id)
+        elif ugent_id is not None:
+            ids.add(str(ugent_id))
+
+    return ids
+
+
+class PublicationIndex(object):
+    """Hash indexes on id, year, type and author, and an inverted index on the words
+    of the title and abstract
+
+    Works with the named tuples returned by the API functions, and with :class:`biblio.models.Publication`.
+
+    Args:
+        publications (iterable): The publications to index
+    """
+
+    def __init__(self, publications=()):
+        self.publications = []
+        self._ids = {}
+        self._years = defaultdict(list)
+        self._types = defaultdict(list)
+        self._authors = defaultdict(list)
+        self._words = defaultdict(list)
+
+        for publication in publications:
+            self.add(publication)
+
+    def add(self, publication):
+        """Add a publication to the index"""
+        position = len(self.publications)
+        self.publications.append(publication)
+
+        publication_id = getattr(publication, 'id', None)
+
+        if publication_id is not None:
+            self._ids[str(publication_id)] = position
+
+        year = getattr(publication, 'year', None)
+
+        if year is not None:
+            self._years[str(year)].append(position)
+
+        publication_type = getattr(publication, 'type', None)
+
+        if publication_type is not None:
+            self._types[publication_type].append(position)
+
+        for author_id in _author_ids(publication):
+            self._authors[author_id].append(position)
+
+        words = set()
+
+        for text in _texts(getattr(publication, 'title', None)) + _texts(getattr(publication, 'abstract', None)):
+            words.update(tokenize(text))
+
+        for word in words:
+            self._words[word].append(position)
+
+    def __len__(self):
+        return len(self.publications)
+
+    def get(self, publication_id):
+        """The publication with the given id, None when it is not in the index"""
+        position = self._ids.get(str(publication_id))
+        return None if position is None else self.publications[position]
+
+    def where(self, year=None, type=None, author=None, text=None):  # pylint: disable=redefined-builtin
+        """The publications that match all the given conditions
+
+        Args:
+            year (int): The year of publication
+            type (str): The type of publication, e.g. journalArticle
+            author (str): The UGentID of one of the authors
+            text (str): Words that all appear in the title or the abstract
+        Returns:
+            list: The matching publications, in the order they were added
+        """
+        postings = []
+
+        if year is not None:
+            postings.append(self._years.get(str(year), []))
+
+        if type is not None:
+            postings.append(self._types.get(type, []))
+
+        if author is not None:
+            postings.append(self._authors.get(str(author), []))
+
+        if text is not None:
+            words = tokenize(text)
+
+            if not words:
+                return []
+
+            postings.extend(self._words.get(word, []) for word in words)
+
+        if not postings:
+            return list(self.publications)
+
+        postings.sort(key=len)
+        positions = set(postings[0])
+
+        for posting in postings[1:]:
+            if not positions:
+                break
+
+            positions.intersection_update(posting)
+
+        return [self.publications[x] for x in sorted(positions)]
+
+    def text(self, query):
+        """The publications with all the words of the query in their title or abstract"""
+        return self.where(text=query)
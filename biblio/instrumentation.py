@@ -0,0 +1,234 @@
+# encoding: utf-8
+
+"""
+Instrumentation
+===============
+
+Hooks that get the timings and sizes of every call of a :class:`biblio.BiblioClient`,
+to find out whether a job is waiting for the network or decoding.
+When no hook is added, nothing is measured.
+
+.. code:: python
+
+    recorder = CallRecorder()
+    client = BiblioClient(hooks=[recorder])
+    client.publications_by_organisation('PP02')
+
+    stats = recorder.calls[-1]
+    print(stats.time_to_first_byte, stats.transfer_time, stats.decode_time, stats.records)
+
+``PrometheusCollector`` aggregates the calls in counters and histograms,
+and renders them in the Prometheus text format.
+"""
+
+import threading
+import time
+from collections import deque, defaultdict
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+# Cache status of a call
+CACHE_HIT = 'hit'
+CACHE_MISS = 'miss'
+CACHE_REVALIDATED = 'revalidated'
+CACHE_MEMO = 'memo'
+CACHE_COALESCED = 'coalesced'
+
+_timings = threading.local()
+
+
+class CallStats(object):
+    """The measurements of one call to the API
+
+    Times are in seconds, ``duration`` is the time of the whole call.
+    ``time_to_first_byte`` is measured from sending the request until the headers are received,
+    and includes ``connect_time`` when a new connection was opened.
+    For streamed exports, ``transfer_time`` also includes the time the caller spends between records.
+    ``bytes_received`` is the size of the body as it was sent, compressed with ``content_encoding``,
+    ``bytes_decoded`` its size after decompression.
+    """
+
+    __slots__ = (
+        'url', 'endpoint', 'status', 'started_at', 'connect_time', 'time_to_first_byte', 'transfer_time',
+        'bytes_received', 'bytes_decoded', 'content_encoding', 'decode_time', 'records', 'cache_status', 'error',
+        'duration',
+    )
+
+    def __init__(self, url, endpoint):
+        self.url = url
+        self.endpoint = endpoint
+        self.status = None
+        self.started_at = time.time()
+        self.connect_time = 0.0
+        self.time_to_first_byte = None
+        self.transfer_time = 0.0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.content_encoding = None
+        self.decode_time = 0.0
+        self.records = 0
+        self.cache_status = None
+        self.error = None
+        self.duration = None
+
+    def __repr__(self):
+        return 'CallStats({0})'.format(', '.join(
+            '{0}={1!r}'.format(name, getattr(self, name)) for name in self.__slots__
+        ))
+
+
+def start_connect_timer():
+    """Start counting the time spent opening connections in this thread"""
+    _timings.connect = 0.0
+
+
+def connect_time():
+    """The seconds spent opening connections in this thread, since the timer was started"""
+    return getattr(_timings, 'connect', 0.0)
+
+
+class _TimedConnectMixin(object):
+    def connect(self):
+        start = time.time()
+
+        try:
+            super(_TimedConnectMixin, self).connect()
+        finally:
+            _timings.connect = getattr(_timings, 'connect', 0.0) + time.time() - start
+
+
+class TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    """HTTP connection measuring the DNS lookup and connect time"""
+
+
+class TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    """HTTPS connection measuring the DNS lookup, connect and TLS handshake time"""
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+def instrument_adapter(adapter):
+    """Make the connections of a requests adapter measure their connect time
+
+    Args:
+        adapter (requests.adapters.HTTPAdapter): The adapter, before it opened any connection
+    """
+    adapter.poolmanager.pool_classes_by_scheme = {
+        'http': TimedHTTPConnectionPool,
+        'https': TimedHTTPSConnectionPool,
+    }
+
+
+class CallRecorder(object):
+    """Hook keeping the stats of the most recent calls
+
+    Args:
+        maxlen (int): The number of calls to keep
+    """
+
+    def __init__(self, maxlen=1000):
+        self.calls = deque(maxlen=maxlen)
+
+    def __call__(self, stats):
+        self.calls.append(stats)
+
+
+# Upper bounds of the histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HISTOGRAMS = (
+    ('connect_time', 'biblio_connect_seconds', 'Time spent on DNS lookups and opening connections'),
+    ('time_to_first_byte', 'biblio_time_to_first_byte_seconds', 'Time until the response headers arrived'),
+    ('transfer_time', 'biblio_transfer_seconds', 'Time spent receiving the body'),
+    ('decode_time', 'biblio_decode_seconds', 'Time spent decoding json'),
+)
+
+
+class PrometheusCollector(object):
+    """Hook aggregating the calls in Prometheus-style counters and histograms
+
+    Args:
+        buckets (tuple): The upper bounds of the histogram buckets, in seconds
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)
+        self._bytes = defaultdict(int)
+        self._decoded_bytes = defaultdict(int)
+        self._records = defaultdict(int)
+        self._histograms = dict(
+            (attribute, defaultdict(lambda: [[0] * len(self.buckets), 0, 0.0])) for attribute, _, _ in HISTOGRAMS
+        )
+
+    def __call__(self, stats):
+        endpoint = stats.endpoint or ''
+
+        with self._lock:
+            self._requests[(endpoint, str(stats.status), stats.cache_status or 'none')] += 1
+            self._bytes[endpoint] += stats.bytes_received
+            self._decoded_bytes[endpoint] += stats.bytes_decoded
+            self._records[endpoint] += stats.records
+
+            for attribute, _, _ in HISTOGRAMS:
+                value = getattr(stats, attribute)
+
+                if value is None:
+                    continue
+
+                histogram = self._histograms[attribute][endpoint]
+
+                for index, bound in enumerate(self.buckets):
+                    if value <= bound:
+                        histogram[0][index] += 1
+
+                histogram[1] += 1
+                histogram[2] += value
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format"""
+        lines = []
+
+        with self._lock:
+            lines.append('# HELP biblio_requests_total Calls to the API')
+            lines.append('# TYPE biblio_requests_total counter')
+
+            for (endpoint, status, cache), value in sorted(self._requests.items()):
+                lines.append('biblio_requests_total{{endpoint="{0}",status="{1}",cache="{2}"}} {3}'.format(
+                    endpoint, status, cache, value
+                ))
+
+            for name, values, description in (
+                    ('biblio_received_bytes_total', self._bytes, 'Bytes received from the API'),
+                    ('biblio_decoded_bytes_total', self._decoded_bytes, 'Bytes received, after decompression'),
+                    ('biblio_records_total', self._records, 'Records decoded')):
+                lines.append('# HELP {0} {1}'.format(name, description))
+                lines.append('# TYPE {0} counter'.format(name))
+
+                for endpoint, value in sorted(values.items()):
+                    lines.append('{0}{{endpoint="{1}"}} {2}'.format(name, endpoint, value))
+
+            for attribute, name, description in HISTOGRAMS:
+                lines.append('# HELP {0} {1}'.format(name, description))
+                lines.append('# TYPE {0} histogram'.format(name))
+
+                for endpoint, (counts, count, total) in sorted(self._histograms[attribute].items()):
+                    for bound, bucket_count in zip(self.buckets, counts):
+                        lines.append('{0}_bucket{{endpoint="{1}",le="{2}"}} {3}'.format(
+                            name, endpoint, bound, bucket_count
+                        ))
+
+                    lines.append('{0}_bucket{{endpoint="{1}",le="+Inf"}} {2}'.format(name, endpoint, count))
+                    lines.append('{0}_sum{{endpoint="{1}"}} {2}'.format(name, endpoint, total))
+                    lines.append('{0}_count{{endpoint="{1}"}} {2}'.format(name, endpoint, count))
+
+        return '\n'.join(lines) + '\n'
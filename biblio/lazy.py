@@ -0,0 +1,200 @@
+# encoding: utf-8
+
+"""
+Lazy records
+============
+
+Records that keep the json line of a publication, and only decode its nested objects
+(authors, cite, files, ...) when they are used. Listing many publications is cheaper
+when only a few of them are looked at in detail.
+
+The records have the same attributes as the named tuples, with the same normalized names,
+and raise ``AttributeError`` for fields that are not in the json.
+
+.. code:: python
+
+    client = BiblioClient(decoder=lazy_from_json)
+
+    for publication in client.publications_by_organisation('PP02'):
+        print(publication.title)  # decoded when the line was read
+
+    publication.author[0].last_name  # all the nested values are decoded now, and kept
+"""
+
+from collections import OrderedDict
+
+from .biblio import json_loads, json_string_to_namedtuple, normalize_key, to_namedtuple, RECORD_TYPES
+
+_OBJECT_STARTS = ('{', b'{')
+
+
+class LazyRecord(object):
+    """A json object of which the nested values are decoded on first access
+
+    Only the top-level values that are not objects or lists are kept when the record is created.
+    When a nested value is used for the first time, the json is decoded again, all the nested values
+    are kept, and the json is dropped.
+
+    Args:
+        raw (str or bytes): The json object
+    Raises:
+        ValueError: When the raw json is not a single json object
+    """
+
+    __slots__ = ('_raw', '_names', '_values', '_pending')
+
+    def __init__(self, raw):
+        item = json_loads(raw)
+
+        if type(item) is not dict:  # pylint: disable=unidiomatic-typecheck
+            raise ValueError('Expecting a json object')
+
+        names = []
+        values = {}
+        pending = {}
+
+        for key, value in item.items():
+            name = normalize_key(key)
+
+            if name in values or name in pending:
+                # two keys are the same after normalizing, the last one wins
+                names.remove(name)
+                values.pop(name, None)
+                pending.pop(name, None)
+
+            names.append(name)
+            value_type = type(value)
+
+            if (value_type is dict or value_type is list) and value:
+                pending[name] = key
+            else:
+                values[name] = to_namedtuple(value)
+
+        self._raw = raw
+        self._names = tuple(names)
+        self._values = values
+        self._pending = pending
+
+    @property
+    def _fields(self):
+        return self._names
+
+    def __getattr__(self, name):
+        if name in LazyRecord.__slots__:
+            # not set yet, e.g. while unpickling
+            raise AttributeError(name)
+
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+
+        if name not in self._pending:
+            raise AttributeError("'{0}' object has no attribute '{1}'".format(type(self).__name__, name))
+
+        self._decode_pending()
+
+        return self._values[name]
+
+    def _decode_pending(self):
+        """Decode all the nested values at once, the json is not needed afterwards"""
+        item = json_loads(self._raw)
+
+        for name, key in self._pending.items():
+            self._values[name] = to_namedtuple(item[key])
+
+        self._raw = None
+        self._pending = {}
+
+    def _asdict(self):
+        """The fields as a dict, the nested values are decoded"""
+        return OrderedDict((name, getattr(self, name)) for name in self._names)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(getattr(self, name) for name in self._names[index])
+
+        return getattr(self, self._names[index])
+
+    def __eq__(self, other):
+        if isinstance(other, (tuple, LazyRecord)):
+            return tuple(self) == tuple(other)
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __reduce__(self):
+        if self._raw is not None:
+            return LazyRecord, (self._raw,)
+
+        # the named tuple types can not be pickled, they are rebuilt from dicts
+        return _restore, (self._names, dict((name, _plain(value)) for name, value in self._values.items()))
+
+    def __repr__(self):
+        return 'LazyRecord({0})'.format(', '.join(
+            '{0}={1}'.format(name, '...' if name in self._pending else repr(self._values[name]))
+            for name in self._names
+        ))
+
+
+def _plain(value):
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return OrderedDict(zip(value._fields, (_plain(x) for x in value)))
+
+    if isinstance(value, list):
+        return [_plain(x) for x in value]
+
+    return value
+
+
+def _record(value):
+    if isinstance(value, dict):
+        return RECORD_TYPES.get(value.keys())(*[_record(x) for x in value.values()])
+
+    if isinstance(value, list):
+        return [_record(x) for x in value]
+
+    return value
+
+
+def _restore(names, values):
+    record = LazyRecord.__new__(LazyRecord)
+    record._raw = None
+    record._names = names
+    record._values = dict((name, _record(value)) for name, value in values.items())
+    record._pending = {}
+
+    return record
+
+
+def lazy_from_json(string):
+    """Decode a json string to a :class:`LazyRecord`
+
+    Can be used as the decoder of a :class:`biblio.BiblioClient`.
+    A json that is not an object, e.g. a list, is decoded to named tuples.
+
+    Args:
+        string (str or bytes): One json object
+    Returns:
+        LazyRecord
+    Raises:
+        ValueError: When the string is not valid json
+    """
+    if string[:1] not in _OBJECT_STARTS and string.lstrip()[:1] not in _OBJECT_STARTS:
+        return json_string_to_namedtuple(string)
+
+    return LazyRecord(string)
+
+
+lazy_from_json.accepts_bytes = True
@@ -0,0 +1,262 @@
+# encoding: utf-8
+
+"""
+Local mirror
+============
+
+Keeps the publications of organisations, people and projects in a local SQLite database,
+so they can be queried without downloading the export every time.
+
+The first sync of an organisation downloads the full export. Later syncs only download
+the exports of the most recent years, as older publications rarely change.
+Publications are stored once, by id, however many organisations, people or projects they belong to.
+
+.. code:: python
+
+    mirror = Mirror('publications.sqlite')
+    mirror.sync_organisation('PP02')
+
+    publications = mirror.publications_by_organisation('PP02', year=2015)
+"""
+
+import datetime
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from .biblio import BiblioClient, organisation_export_url, person_export_url, project_export_url, \
+    json_loads, json_string_to_namedtuple, IncompleteExport, STREAM_CHUNK_SIZE
+
+
+ORGANISATION = 'organisation'
+PERSON = 'person'
+PROJECT = 'project'
+
+# The number of years, up to the current one, that are downloaded again on every sync
+DEFAULT_RECENT_YEARS = 2
+
+SyncResult = namedtuple('SyncResult', ['scope', 'scope_id', 'full', 'years', 'publications'])
+
+
+def publication_year(item):
+    """The year of a decoded publication as an integer, None when it is missing or not a number"""
+    try:
+        return int(item.get('year'))
+    except (TypeError, ValueError):
+        return None
+
+
+class Mirror(object):
+    """Local store of publications, synced with the API
+
+    Args:
+        path (str): The path of the SQLite database
+        client (biblio.BiblioClient): The client used to download the exports
+        recent_years (int): The number of years that are downloaded again on every sync
+    """
+
+    def __init__(self, path, client=None, recent_years=DEFAULT_RECENT_YEARS):
+        self.path = path
+        self.client = client or BiblioClient()
+        self.recent_years = recent_years
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS publications (
+                id TEXT PRIMARY KEY,
+                year INTEGER,
+                type TEXT,
+                data TEXT,
+                updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS memberships (
+                scope TEXT,
+                scope_id TEXT,
+                publication_id TEXT,
+                year INTEGER,
+                PRIMARY KEY (scope, scope_id, publication_id)
+            );
+            CREATE INDEX IF NOT EXISTS memberships_year ON memberships (scope, scope_id, year);
+            CREATE TABLE IF NOT EXISTS syncs (
+                scope TEXT,
+                scope_id TEXT,
+                synced_at REAL,
+                PRIMARY KEY (scope, scope_id)
+            );
+        """)
+        self._db.commit()
+
+    def sync_organisation(self, organisation_id, full=False):
+        """Download the publications of an organisation
+
+        Args:
+            organisation_id (str): The id of the organisation
+            full (bool): Download the full export, also when the organisation was synced before
+        Returns:
+            SyncResult: What was downloaded
+        Raises:
+            IncompleteExport: When an export could not be downloaded, the stored publications are kept
+        """
+        if full or self.synced_at(ORGANISATION, organisation_id) is None:
+            lines = self._download(organisation_export_url(organisation_id, base_url=self.client.base_url), None)
+            return self._store(ORGANISATION, organisation_id, lines, None)
+
+        current = datetime.date.today().year
+        years = list(range(current - self.recent_years + 1, current + 1))
+        count = 0
+
+        for year in years:
+            lines = self._download(organisation_export_url(organisation_id, year, self.client.base_url), year)
+            count += self._store(ORGANISATION, organisation_id, lines, year).publications
+
+        return SyncResult(ORGANISATION, organisation_id, False, years, count)
+
+    def sync_person(self, ugent_id):
+        """Download the publications of a person
+
+        Args:
+            ugent_id (str): The numerical ugent_id of the person
+        Returns:
+            SyncResult: What was downloaded
+        Raises:
+            IncompleteExport: When the export could not be downloaded, the stored publications are kept
+        """
+        lines = self._download(person_export_url(ugent_id, self.client.base_url), None)
+        return self._store(PERSON, str(int(ugent_id)), lines, None)
+
+    def sync_project(self, project_id):
+        """Download the publications of a project
+
+        Args:
+            project_id (str): The id of the project
+        Returns:
+            SyncResult: What was downloaded
+        Raises:
+            IncompleteExport: When the export could not be downloaded, the stored publications are kept
+        """
+        lines = self._download(project_export_url(project_id, self.client.base_url), None)
+        return self._store(PROJECT, project_id, lines, None)
+
+    def publications_by_organisation(self, organisation_id, year=None):
+        """The stored publications of an organisation, see :meth:`publications`"""
+        return self.publications(ORGANISATION, organisation_id, year)
+
+    def publications_by_person(self, ugent_id, year=None):
+        """The stored publications of a person, see :meth:`publications`"""
+        return self.publications(PERSON, str(int(ugent_id)), year)
+
+    def publications_by_project(self, project_id, year=None):
+        """The stored publications of a project, see :meth:`publications`"""
+        return self.publications(PROJECT, project_id, year)
+
+    def publications(self, scope, scope_id, year=None, publication_type=None, decoder=None):
+        """The stored publications of an organisation, person or project
+
+        Args:
+            scope (str): organisation, person or project
+            scope_id (str): The id of the organisation, person or project
+            year (int): Only the publications of this year
+            publication_type (str): Only the publications of this type, e.g. journalArticle
+            decoder (callable): Decodes the json of a publication, :func:`biblio.json_string_to_namedtuple` by default
+        Returns:
+            A list with named tuples, ordered by year and id
+        """
+        decoder = decoder or json_string_to_namedtuple
+        query = 'SELECT p.data FROM memberships m JOIN publications p ON p.id = m.publication_id ' \
+                'WHERE m.scope = ? AND m.scope_id = ?'
+        args = [scope, scope_id]
+
+        if year is not None:
+            query += ' AND m.year = ?'
+            args.append(int(year))
+
+        if publication_type is not None:
+            query += ' AND p.type = ?'
+            args.append(publication_type)
+
+        with self._lock:
+            rows = self._db.execute(query + ' ORDER BY m.year, p.id', args).fetchall()
+
+        return [decoder(row[0]) for row in rows]
+
+    def publication(self, publication_id, decoder=None):
+        """A stored publication
+
+        Returns:
+            A named tuple, None when the publication is not stored
+        """
+        with self._lock:
+            row = self._db.execute('SELECT data FROM publications WHERE id = ?', (str(publication_id),)).fetchone()
+
+        return (decoder or json_string_to_namedtuple)(row[0]) if row else None
+
+    def synced_at(self, scope, scope_id):
+        """The time of the last sync, as a timestamp, None when it was never synced"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT synced_at FROM syncs WHERE scope = ? AND scope_id = ?', (scope, scope_id)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def close(self):
+        self._db.close()
+
+    def _download(self, url, year):
+        """Stream the lines of an export
+
+        Unlike :meth:`biblio.BiblioClient.iter_raw`, a response that is not a 200 is an error,
+        as an empty export would remove all the stored publications of the scope.
+
+        Raises:
+            IncompleteExport: When the status of the response is not 200
+        """
+        response = self.client.send(url, {'format': 'json'}, stream=True)
+
+        try:
+            if response.status_code != 200:
+                raise IncompleteExport(
+                    'The export {0} could not be downloaded, the status was {1}'.format(url, response.status_code),
+                    {year: response.status_code}
+                )
+
+            for line in response.iter_lines(chunk_size=STREAM_CHUNK_SIZE):
+                if line:
+                    yield line
+        finally:
+            response.close()
+
+    def _store(self, scope, scope_id, lines, year):
+        """Upsert the publications of an export and replace the memberships it covers
+
+        Args:
+            year (int): The year of the export, None for a full export
+        """
+        publications = []
+        now = time.time()
+
+        # download and decode the export before the database is locked
+        for line in lines:
+            data = line.decode('utf-8')
+            item = json_loads(data)
+            publication_id = str(item.get('_id', item.get('id')))
+            publications.append((publication_id, publication_year(item), item.get('type'), data, now))
+
+        with self._lock:
+            if year is None:
+                self._db.execute('DELETE FROM memberships WHERE scope = ? AND scope_id = ?', (scope, scope_id))
+            else:
+                self._db.execute(
+                    'DELETE FROM memberships WHERE scope = ? AND scope_id = ? AND year = ?', (scope, scope_id, year)
+                )
+
+            self._db.executemany('INSERT OR REPLACE INTO publications VALUES (?, ?, ?, ?, ?)', publications)
+            self._db.executemany(
+                'INSERT OR REPLACE INTO memberships VALUES (?, ?, ?, ?)',
+                [(scope, scope_id, x[0], x[1]) for x in publications]
+            )
+            self._db.execute('INSERT OR REPLACE INTO syncs VALUES (?, ?, ?)', (scope, scope_id, now))
+            self._db.commit()
+
+        return SyncResult(scope, scope_id, year is None, [year] if year else None, len(publications))
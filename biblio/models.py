@@ -0,0 +1,195 @@
+# encoding: utf-8
+
+"""
+Publication model
+=================
+
+Compact classes for decoded publications, as an alternative to the named tuples.
+Every class has a fixed set of ``__slots__``, so records share their layout and take little memory.
+Fields that are missing in the API-response are None, instead of raising ``AttributeError``.
+Fields the model does not know are kept in ``extra``, as decoded from the json.
+
+.. code:: python
+
+    client = BiblioClient(decoder=publication_from_json)
+    publication = client.single_publication(7175390)
+
+    if publication.cite.chicago_author_date is None:
+        print('No chicago author date is provided')
+"""
+
+import sys
+
+try:
+    intern = sys.intern
+except AttributeError:  # pragma: no cover
+    intern = intern  # pylint: disable=invalid-name,self-assigning-variable
+
+from .biblio import normalize_key, json_loads
+
+_FIELDS = {}
+
+
+class Record(object):
+    """Base class of the models
+
+    Subclasses list their fields in ``__slots__``, the models of nested fields in ``nested``,
+    and the fields with few distinct values in ``interned``, so equal values are stored only once.
+    """
+
+    __slots__ = ('extra',)
+
+    nested = {}
+
+    interned = frozenset()
+
+    def __init__(self, **fields):
+        for name in self.fields():
+            setattr(self, name, fields.pop(name, None))
+
+        self.extra = fields or None
+
+    @classmethod
+    def fields(cls):
+        """The names of the fields, without ``extra``"""
+        try:
+            return _FIELDS[cls]
+        except KeyError:
+            names = [name for klass in reversed(cls.__mro__) for name in getattr(klass, '__slots__', ())
+                     if name != 'extra']
+            _FIELDS[cls] = names
+            return names
+
+    @classmethod
+    def from_dict(cls, item):
+        """Build a record from a decoded json object
+
+        Args:
+            item (dict): The json object, with the keys as returned by the API
+        Returns:
+            Record: The record, with nested objects converted to their model
+        """
+        fields = {}
+
+        for key, value in item.items():
+            key = normalize_key(key)
+            model = cls.nested.get(key)
+
+            if model is not None and value is not None:
+                if isinstance(value, list):
+                    value = [model.from_dict(x) if isinstance(x, dict) else x for x in value]
+                elif isinstance(value, dict):
+                    value = model.from_dict(value)
+            elif key in cls.interned and isinstance(value, str):
+                value = intern(value)
+
+            fields[key] = value
+
+        return cls(**fields)
+
+    def _asdict(self):
+        """The fields as a dict, with nested records converted as well"""
+        result = {}
+
+        for name in self.fields():
+            result[name] = _asdict(getattr(self, name))
+
+        if self.extra:
+            result.update(self.extra)
+
+        return result
+
+    def __getstate__(self):
+        return [getattr(self, name) for name in self.fields()] + [self.extra]
+
+    def __setstate__(self, state):
+        for name, value in zip(self.fields() + ['extra'], state):
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.__getstate__() == other.__getstate__()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        values = ', '.join(
+            '{0}={1!r}'.format(name, getattr(self, name))
+            for name in self.fields() if getattr(self, name) is not None
+        )
+        return '{0}({1})'.format(type(self).__name__, values)
+
+
+def _asdict(value):
+    if isinstance(value, Record):
+        return value._asdict()  # pylint: disable=protected-access
+
+    if isinstance(value, list):
+        return [_asdict(x) for x in value]
+
+    return value
+
+
+class Author(Record):
+    """An author, editor or promoter of a publication"""
+
+    __slots__ = ('first_name', 'last_name', 'name', 'ugent_id', 'orcid')
+
+    interned = frozenset(['first_name', 'last_name'])
+
+
+class Cite(Record):
+    """The citation of a publication in the different styles"""
+
+    __slots__ = ('apa', 'mla', 'chicago_author_date', 'vancouver', 'ieee', 'fwo', 'harvard')
+
+
+class File(Record):
+    """A file attached to a publication"""
+
+    __slots__ = ('kind', 'id', 'access', 'size', 'name', 'content_type', 'url')
+
+    interned = frozenset(['kind', 'access', 'content_type'])
+
+
+class Publication(Record):
+    """A publication"""
+
+    __slots__ = (
+        'id', 'type', 'title', 'year', 'author', 'editor', 'promoter', 'abstract', 'keyword', 'language',
+        'doi', 'isbn', 'issn', 'publication', 'volume', 'issue', 'page_first', 'page_last', 'publisher',
+        'url', 'department', 'project', 'cite', 'file',
+    )
+
+    nested = {
+        'author': Author,
+        'editor': Author,
+        'promoter': Author,
+        'cite': Cite,
+        'file': File,
+    }
+
+    interned = frozenset(['type', 'year', 'language', 'publisher'])
+
+
+def publication_from_json(string):
+    """Decode a json string to a Publication
+
+    Can be used as the decoder of a :class:`biblio.BiblioClient`.
+
+    Args:
+        string: a string representing one publication, or a list of publications
+    Returns:
+        Publication, or a list of publications
+    """
+    item = json_loads(string)
+
+    if isinstance(item, list):
+        return [Publication.from_dict(x) for x in item]
+
+    return Publication.from_dict(item)
+
+
+publication_from_json.accepts_bytes = True
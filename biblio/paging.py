@@ -0,0 +1,182 @@
+# encoding: utf-8
+
+"""
+Paged search
+============
+
+Search in pages of a bounded size, so a broad search does not need one huge request,
+and can be resumed from a checkpoint after a crash or a timeout.
+
+.. code:: python
+
+    search = PagedSearch('translation', page_size=500, checkpoint='translation.json')
+
+    for publication in search:
+        store(publication)
+
+The checkpoint is a json file with the query, the offset of the next page and the id of the last
+publication. It is written when the caller asks for the next page, so the publications of a page are
+generated again after a crash in the middle of the page. When publications were removed from the results
+before the checkpoint, the search resumes one publication early, so one publication can be generated twice.
+A finished search keeps its checkpoint, with ``done`` set, until :meth:`PagedSearch.reset` is called.
+"""
+
+import io
+import json
+import os
+from collections import namedtuple
+
+from .biblio import default_client, search_url, search_params, IncompleteExport
+
+DEFAULT_PAGE_SIZE = 1000
+
+Checkpoint = namedtuple('Checkpoint', ['query', 'offset', 'last_id', 'done'])
+
+
+class PagedSearch(object):
+    """Iterate over the results of a search, one page at a time
+
+    Args:
+        query (str): The keyword that needs to be searched
+        page_size (int): The number of publications in a request
+        checkpoint (str): The path of the checkpoint file. When it exists for the same query,
+            the search continues where it was. When omitted, the search always starts at the beginning
+        client (biblio.BiblioClient): The client to use, the default client when omitted
+        fields (list): Only decode these fields, see :func:`biblio.biblio.json_string_to_namedtuple`
+    Raises:
+        ValueError: When the checkpoint is for another query
+    """
+
+    def __init__(self, query=None, page_size=DEFAULT_PAGE_SIZE, checkpoint=None, client=None, fields=None):
+        self.query = query
+        self.page_size = page_size
+        self.path = checkpoint
+        self.client = client
+        self.fields = fields if fields is None or 'id' in fields else list(fields) + ['id']
+        self.checkpoint = self._load() or Checkpoint(query, 0, None, False)
+
+    @property
+    def offset(self):
+        """The offset of the next page"""
+        return self.checkpoint.offset
+
+    @property
+    def done(self):
+        """True when all the pages were generated"""
+        return self.checkpoint.done
+
+    def __iter__(self):
+        for page in self.pages():
+            for publication in page:
+                yield publication
+
+    def pages(self):
+        """Generate the remaining pages
+
+        Returns:
+            A generator of lists of named tuples, the last one can be shorter or empty
+        Raises:
+            TransientError: When the API was not available, even after retrying
+            IncompleteExport: When a page could not be downloaded for another reason,
+                or has more publications than requested. The checkpoint is kept, so the search can be resumed.
+        """
+        while not self.checkpoint.done:
+            page, offset, done = self._fetch(self.checkpoint)
+            last_id = getattr(page[-1], 'id', None) if page else self.checkpoint.last_id
+
+            yield page
+
+            # the caller asked for the next page, so this one was handled
+            self._save(Checkpoint(self.query, offset, last_id, done))
+
+    def reset(self):
+        """Start again from the beginning, and remove the checkpoint file"""
+        self.checkpoint = Checkpoint(self.query, 0, None, False)
+
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _fetch(self, checkpoint):
+        """Get the page at the offset of the checkpoint
+
+        Returns:
+            tuple: The publications, the offset of the next page, and True when this was the last page
+        """
+        client = self.client or default_client()
+        params = search_params(self.query)
+        overlap = 1 if checkpoint.offset and checkpoint.last_id is not None else 0
+        params['start'] = checkpoint.offset - overlap
+        params['limit'] = self.page_size + overlap
+        page = client.get_result(search_url(client.base_url), params, many=True, fields=self.fields)
+
+        if page is None:
+            raise IncompleteExport(
+                'The page at {0} of the search could not be downloaded'.format(checkpoint.offset),
+                {checkpoint.offset: None}
+            )
+
+        if len(page) > params['limit']:
+            # the API ignored start and limit, every next page would download the full result again
+            raise IncompleteExport(
+                'The page at {0} of the search has {1} publications, more than the limit of {2}'.format(
+                    checkpoint.offset, len(page), params['limit']
+                ),
+                {checkpoint.offset: None}
+            )
+
+        offset = params['start'] + len(page)
+        done = not page or len(page) < params['limit']
+
+        if not overlap:
+            return page, offset, done
+
+        # the results moved when the last publication before the page is not where it was,
+        # continue after it when it can be found
+        ids = [getattr(publication, 'id', None) for publication in page]
+
+        if checkpoint.last_id in ids:
+            return page[ids.index(checkpoint.last_id) + 1:], offset, done
+
+        # it moved back out of the page, or was removed: the first publication may not have been seen yet,
+        # so it is generated, even when that makes it a duplicate
+        return page, offset, done
+
+    def _load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return None
+
+        with io.open(self.path, encoding='utf-8') as f:
+            checkpoint = Checkpoint(**json.load(f))
+
+        if checkpoint.query != self.query:
+            raise ValueError('The checkpoint {0} is for the query {1!r}'.format(self.path, checkpoint.query))
+
+        return checkpoint
+
+    def _save(self, checkpoint):
+        self.checkpoint = checkpoint
+
+        if self.path is None:
+            return
+
+        # write a new file and replace the old one, so a crash never leaves half a checkpoint
+        temporary = self.path + '.tmp'
+
+        with io.open(temporary, 'wb') as f:
+            f.write(json.dumps(checkpoint._asdict()).encode('utf-8'))
+
+        _replace(temporary, self.path)
+
+
+def _replace(source, target):
+    """os.replace, which Python 2 does not have. There, the rename is not atomic on Windows"""
+    replace = getattr(os, 'replace', None)
+
+    if replace is not None:
+        replace(source, target)
+        return
+
+    if os.name == 'nt' and os.path.exists(target):
+        os.remove(target)
+
+    os.rename(source, target)
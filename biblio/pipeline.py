@@ -0,0 +1,144 @@
+# encoding: utf-8
+
+"""
+Decoding pipeline
+=================
+
+Decode large exports on all the cores. The lines of an export are read as they are downloaded,
+and sent in batches to a pool of processes that decode them to :class:`biblio.models.Publication`
+records. The records are generated in the order of the export.
+
+.. code:: python
+
+    with DecodePipeline(max_workers=4) as pipeline:
+        for publication in pipeline.iter_publications_by_organisation('PP02'):
+            print(publication.title)
+
+The named tuples can not be used here, as their types only exist in the process that created them.
+Any decoder that is a module level function and returns picklable records can be used instead.
+The records are unpickled in the main process, which limits how much faster it can get.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .biblio import default_client, person_export_url, organisation_export_url, group_export_url, \
+    project_export_url, search_url, search_params
+from .models import publication_from_json
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def decode_batch(decoder, lines):
+    """Decode a batch of lines, in a worker process"""
+    return [decoder(line) for line in lines]
+
+
+class DecodePipeline(object):
+    """Decode the lines of exports in a pool of processes
+
+    Args:
+        max_workers (int): The number of processes, the number of cores when omitted
+        batch_size (int): The number of lines sent to a process at once
+        decoder (callable): Decodes one line, :func:`biblio.models.publication_from_json` by default
+        max_pending (int): The number of batches that are sent but not generated yet,
+            twice the number of processes by default. Limits the memory that is used.
+        client (biblio.BiblioClient): The client to download with, the default client when omitted
+    """
+
+    def __init__(self, max_workers=None, batch_size=DEFAULT_BATCH_SIZE, decoder=publication_from_json,
+                 max_pending=None, client=None):
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.decoder = decoder
+        self.max_pending = max_pending
+        self.client = client
+        self._executor = None
+
+    @property
+    def executor(self):
+        """The pool of processes, started on first use"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        return self._executor
+
+    def decode(self, lines):
+        """Decode the lines in the pool of processes
+
+        Args:
+            lines: An iterable of json lines, as bytes or str. Empty lines are skipped
+        Returns:
+            A generator of the decoded records, in the order of the lines
+        """
+        executor = self.executor
+        # pylint: disable=protected-access
+        max_pending = self.max_pending or 2 * executor._max_workers
+        pending = deque()
+        batch = []
+
+        try:
+            for line in lines:
+                if not line:
+                    continue
+
+                batch.append(line)
+
+                if len(batch) < self.batch_size:
+                    continue
+
+                pending.append(executor.submit(decode_batch, self.decoder, batch))
+                batch = []
+
+                while len(pending) >= max_pending:
+                    for record in pending.popleft().result():
+                        yield record
+
+            if batch:
+                pending.append(executor.submit(decode_batch, self.decoder, batch))
+
+            while pending:
+                for record in pending.popleft().result():
+                    yield record
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def iter_result(self, url, params):
+        """Stream an export and decode it in the pool, see :meth:`biblio.BiblioClient.iter_result`"""
+        return self.decode((self.client or default_client()).iter_raw(url, params))
+
+    def iter_publications_by_person(self, ugent_id):
+        """See :func:`biblio.iter_publications_by_person`"""
+        return self.iter_result(person_export_url(ugent_id, self._base_url()), {})
+
+    def iter_publications_by_organisation(self, organisation_id, year=None):
+        """See :func:`biblio.iter_publications_by_organisation`"""
+        return self.iter_result(organisation_export_url(organisation_id, year, self._base_url()), {})
+
+    def iter_publications_by_group(self, ugent_ids):
+        """See :func:`biblio.iter_publications_by_group`"""
+        return self.iter_result(group_export_url(ugent_ids, self._base_url()), {})
+
+    def iter_publications_by_project(self, project_id):
+        """See :func:`biblio.iter_publications_by_project`"""
+        return self.iter_result(project_export_url(project_id, self._base_url()), {})
+
+    def iter_search(self, query=None):
+        """See :func:`biblio.iter_search`"""
+        return self.iter_result(search_url(self._base_url()), search_params(query))
+
+    def _base_url(self):
+        return (self.client or default_client()).base_url
+
+    def close(self):
+        """Stop the processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
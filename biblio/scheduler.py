@@ -0,0 +1,206 @@
+# encoding: utf-8
+
+"""
+Request scheduler
+=================
+
+Every request to the API goes through a scheduler. When the API is overloaded
+(429 Too Many Requests, 5xx) or the connection fails, the request is retried
+with an exponential backoff with jitter, honouring the ``Retry-After`` header.
+When all the retries fail, :class:`TransientError` is raised, so a temporary failure
+can not be mistaken for a publication or person that does not exist.
+
+An optional token bucket limits the number of requests per second, shared by all the threads
+(and event loops) that use the same scheduler. The async clients retry with the same scheduler,
+see :func:`biblio.aio.send_async`.
+
+.. code:: python
+
+    scheduler = RequestScheduler(max_retries=5, rate=10)
+    client = BiblioClient(scheduler=scheduler)
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_tz, mktime_tz
+
+import requests
+
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_MAX_BACKOFF = 30
+DEFAULT_MAX_RETRY_AFTER = 120
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+TRANSIENT_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class TransientError(Exception):
+    """
+    Raised when the API could not be reached or was not available, even after retrying.
+    ``status`` is the last status code, None when the connection failed.
+    """
+
+    def __init__(self, message, status=None):
+        super(TransientError, self).__init__(message)
+        self.status = status
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket
+
+    Args:
+        rate (float): The number of tokens added per second
+        burst (int): The maximum number of tokens, the number of requests that can be sent at once
+    """
+
+    def __init__(self, rate, burst=1, clock=time.time):
+        self.rate = float(rate)
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token, possibly one that is only available in the future
+
+        Returns:
+            float: The seconds to wait before the token may be used
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+
+            if self._tokens >= 0:
+                return 0.0
+
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Wait for a token"""
+        wait = self.reserve()
+
+        if wait:
+            time.sleep(wait)
+
+
+def retry_after(response, now=None):
+    """The seconds to wait according to the Retry-After header, None when there is none
+
+    The header can contain seconds or an HTTP-date.
+    """
+    value = response.headers.get('Retry-After')
+
+    if not value:
+        return None
+
+    value = value.strip()
+
+    if value.isdigit():
+        return float(value)
+
+    parsed = parsedate_tz(value)
+
+    if parsed is None:
+        return None
+
+    return max(0.0, mktime_tz(parsed) - (now or time.time()))
+
+
+def status_of(response):
+    """The status code of a requests or an aiohttp response"""
+    status = getattr(response, 'status_code', None)
+    return response.status if status is None else status
+
+
+class RequestScheduler(object):
+    """Retries failed requests with backoff, and limits the request rate
+
+    Args:
+        max_retries (int): The number of retries after the first attempt
+        backoff_factor (float): The backoff of the first retry, doubled on every next retry.
+            The actual wait is a random part of it (full jitter).
+        max_backoff (float): The maximum backoff
+        max_retry_after (float): The maximum wait honoured from a Retry-After header
+        rate (float): The maximum number of requests per second, None for no limit
+        burst (int): The number of requests that can be sent at once, within the rate
+        retry_statuses (iterable): The status codes that are retried
+    """
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 max_backoff=DEFAULT_MAX_BACKOFF, max_retry_after=DEFAULT_MAX_RETRY_AFTER,
+                 rate=None, burst=1, retry_statuses=RETRY_STATUSES):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+        self.bucket = TokenBucket(rate, burst) if rate else None
+
+    def backoff(self, attempt):
+        """The seconds to wait before retry number `attempt` (starting at 0)"""
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+    def send(self, send, transient_exceptions=TRANSIENT_EXCEPTIONS):
+        """Send a request, retrying it when it fails
+
+        Args:
+            send (callable): Sends the request and returns the response
+            transient_exceptions (tuple): The exceptions that are retried
+        Returns:
+            The response, with a status code that is not retried
+        Raises:
+            TransientError: When the last retry failed as well
+        """
+        attempt = 0
+
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+
+            try:
+                response = send()
+            except transient_exceptions as error:
+                wait = self.wait(attempt, None, error)
+            else:
+                if status_of(response) not in self.retry_statuses:
+                    return response
+
+                response.close()
+                wait = self.wait(attempt, response, None)
+
+            time.sleep(wait)
+            attempt += 1
+
+    def wait(self, attempt, response, error):
+        """The seconds to wait before the next attempt
+
+        Args:
+            attempt (int): The number of the retry, starting at 0
+            response: The response that is retried, None when the request raised `error`
+            error (Exception): The exception of the request
+
+        Raises:
+            TransientError: When there are no retries left
+        """
+        if attempt >= self.max_retries:
+            if response is None:
+                raise TransientError('The API could not be reached: {0}'.format(error))
+
+            status = status_of(response)
+            raise TransientError(
+                'The API answered {0} after {1} retries'.format(status, self.max_retries), status
+            )
+
+        wait = retry_after(response) if response is not None else None
+
+        if wait is None:
+            return self.backoff(attempt)
+
+        return min(wait, self.max_retry_after)
@@ -0,0 +1,17 @@
+# encoding: utf-8
+
+import sys
+
+import pytest
+
+from .stub import StubServer
+
+# async generators and asyncio.run need Python 3.7, older versions can not even compile these modules
+collect_ignore = ['test_aio.py'] if sys.version_info < (3, 7) else []
+
+
+@pytest.fixture
+def stub():
+    """A running local stub server without any routes"""
+    with StubServer() as server:
+        yield server
@@ -0,0 +1,188 @@
+# encoding: utf-8
+
+"""A local HTTP server that serves canned API responses, so tests can run offline"""
+
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:  # pragma: no cover
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+
+class StubResponse(object):
+    """A canned response
+
+    Args:
+        body (bytes, str or iterable): The body. An iterable of chunks is sent with chunked encoding.
+        status (int): The status code
+        headers (dict): Extra headers
+    """
+
+    def __init__(self, body=b'', status=200, headers=None):
+        self.body = body
+        self.status = status
+        self.headers = headers or {}
+
+
+def failing(*responses, **kwargs):
+    """A route answering with the given responses, and with `body` after them"""
+    responses = list(responses)
+    body = kwargs.get('body', '{"_id":"1"}')
+
+    def route(request):
+        if responses:
+            return responses.pop(0)
+
+        return StubResponse(body)
+
+    return route
+
+
+class StubRequest(object):
+    """A request received by the stub server"""
+
+    def __init__(self, path, params, headers, connection):
+        self.path = path
+        self.params = params
+        self.headers = headers
+        self.connection = connection
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # the headers and a small body are written separately, do not wait for the ack in between
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        stub = self.server.stub
+        parsed = urlparse(self.path)
+        request = StubRequest(
+            parsed.path,
+            dict((key, values[0]) for key, values in parse_qs(parsed.query).items()),
+            dict(self.headers.items()),
+            id(self.connection),
+        )
+        stub.record(request)
+
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        route = stub.routes.get(parsed.path)
+
+        if route is None:
+            response = StubResponse(b'Not Found', status=404)
+        elif callable(route):
+            response = route(request)
+        else:
+            response = route
+
+        self.send_response(response.status)
+
+        for key, value in response.headers.items():
+            self.send_header(key, value)
+
+        body = response.body
+
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        if isinstance(body, bytes):
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self._write(body)
+        else:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            for chunk in body:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+
+                if chunk:
+                    self.wfile.write('{0:x}\r\n'.format(len(chunk)).encode('ascii'))
+                    self._write(chunk)
+                    self.wfile.write(b'\r\n')
+                    self.wfile.flush()
+
+            self.wfile.write(b'0\r\n\r\n')
+
+        self.wfile.flush()
+
+    def _write(self, data):
+        bandwidth = self.server.stub.bandwidth
+
+        if not bandwidth:
+            self.wfile.write(data)
+            return
+
+        # send 10 slices per second to simulate a slow link
+        step = max(1, int(bandwidth / 10))
+
+        for start in range(0, len(data), step):
+            self.wfile.write(data[start:start + step])
+            self.wfile.flush()
+            time.sleep(0.1)
+
+
+class StubServer(object):
+    """Serve canned responses on a random local port
+
+    Args:
+        routes (dict): Maps a path to a StubResponse, or to a callable that gets
+            the StubRequest and returns a StubResponse
+        latency (float): Seconds to wait before answering a request
+        bandwidth (int): Bytes per second, None for unlimited
+
+    Usage::
+
+        with StubServer({'/publication/1': StubResponse('{"_id": "1"}')}) as stub:
+            client = BiblioClient(base_url=stub.url)
+    """
+
+    def __init__(self, routes=None, latency=0, bandwidth=None):
+        self.routes = routes if routes is not None else {}
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """The base url of the server, ending with a slash"""
+        return 'http://127.0.0.1:{0}/'.format(self._server.server_address[1])
+
+    def record(self, request):
+        with self._lock:
+            self.requests.append(request)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,))
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
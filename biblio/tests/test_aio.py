@@ -0,0 +1,174 @@
+# encoding: utf-8
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from biblio import aio, biblio  # noqa: E402
+from biblio.aio import AsyncBiblioClient  # noqa: E402
+from biblio.biblio import InvalidID, TransientError  # noqa: E402
+from biblio.scheduler import RequestScheduler  # noqa: E402
+
+from .stub import StubResponse, failing  # noqa: E402
+
+
+EXPORT = '{"_id":"1","title":"One"}\n{"_id":"2","title":"Two"}\n{"_id":"3","title":"Three"}\n'
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def collect(iterator):
+    return [x async for x in iterator]
+
+
+class TestAio:
+    def test_identical_calls_are_coalesced(self, stub):
+        def slow(request):
+            time.sleep(0.1)
+            return StubResponse(EXPORT)
+
+        stub.routes['/person/1/publication/export'] = slow
+
+        async def main():
+            async with AsyncBiblioClient(base_url=stub.url) as client:
+                results = await asyncio.gather(*[client.publications_by_person(1) for _ in range(5)])
+                results[0].pop()
+
+                return results, client.flight.coalesced, len(client.flight)
+
+        results, coalesced, running = run(main())
+
+        assert [len(x) for x in results] == [2, 3, 3, 3, 3]
+        assert (coalesced, running) == (4, 0)
+        assert len(stub.requests) == 1
+
+    def test_single_publication(self, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1","cite":{"chicago-author-date":"x"}}')
+
+        async def main():
+            async with AsyncBiblioClient(base_url=stub.url) as client:
+                return await client.single_publication(1), await client.single_publication(2)
+
+        found, missing = run(main())
+
+        assert found.id == '1'
+        assert found.cite.chicago_author_date == 'x'
+        assert missing is None
+
+    def test_exports_return_lists(self, stub):
+        for path in ['/person/1/publication/export', '/organization/PP02/2015/publication/export',
+                     '/group/1,2/publication/export', '/project/LT3/publication/export', '/publication/export']:
+            stub.routes[path] = StubResponse(EXPORT)
+
+        async def main():
+            async with AsyncBiblioClient(base_url=stub.url) as client:
+                return await asyncio.gather(
+                    client.publications_by_person(1),
+                    client.publications_by_organisation('PP02', 2015),
+                    client.publications_by_group([1, 2]),
+                    client.publications_by_project('LT3'),
+                    client.search('test'),
+                )
+
+        for result in run(main()):
+            assert [x.id for x in result] == ['1', '2', '3']
+
+    def test_iter_export(self, stub):
+        def chunks(request):
+            # split the lines over the chunks on purpose
+            return StubResponse([EXPORT[:10], EXPORT[10:40], EXPORT[40:]])
+
+        stub.routes['/project/LT3/publication/export'] = chunks
+
+        async def main():
+            async with AsyncBiblioClient(base_url=stub.url) as client:
+                return await collect(client.iter_publications_by_project('LT3'))
+
+        assert [x.title for x in run(main())] == ['One', 'Two', 'Three']
+
+    def test_concurrency_is_limited(self, stub):
+        stub.latency = 0.1
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+
+        async def main():
+            async with AsyncBiblioClient(base_url=stub.url, limit=2) as client:
+                start = time.time()
+                # different ids, identical calls would be coalesced
+                await asyncio.gather(*[client.single_publication(x) for x in range(1, 5)])
+                return time.time() - start
+
+        assert run(main()) >= 0.2
+
+    def test_calls_while_streaming(self, stub):
+        stub.routes['/person/1/publication/export'] = StubResponse(EXPORT)
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+
+        async def main():
+            async with AsyncBiblioClient(base_url=stub.url, limit=1, stream_limit=1) as client:
+                titles = []
+
+                async for publication in client.iter_publications_by_person(1):
+                    single = await client.single_publication(1)
+                    titles.append((publication.title, single.id))
+
+                return titles
+
+        assert run(asyncio.wait_for(main(), 5)) == [('One', '1'), ('Two', '1'), ('Three', '1')]
+
+    def test_failures_are_retried(self, stub):
+        stub.routes['/publication/1'] = failing(StubResponse(status=503))
+        stub.routes['/publication/2'] = StubResponse(status=503)
+        scheduler = RequestScheduler(max_retries=1, backoff_factor=0.01)
+
+        async def main():
+            async with AsyncBiblioClient(base_url=stub.url, scheduler=scheduler) as client:
+                assert (await client.single_publication(1)).id == '1'
+
+                with pytest.raises(TransientError):
+                    await client.single_publication(2)
+
+        run(main())
+
+    def test_exhausted_stream_releases_the_connection(self, stub):
+        stub.routes['/person/1/publication/export'] = StubResponse(status=503)
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+        scheduler = RequestScheduler(max_retries=1, backoff_factor=0.01)
+
+        async def main():
+            async with AsyncBiblioClient(base_url=stub.url, scheduler=scheduler, limit=1, stream_limit=1) as client:
+                with pytest.raises(TransientError):
+                    await collect(client.iter_publications_by_person(1))
+
+                return await client.single_publication(1)
+
+        assert run(asyncio.wait_for(main(), 5)).id == '1'
+
+    def test_validates_before_requesting(self, stub):
+        async def main():
+            async with AsyncBiblioClient(base_url=stub.url) as client:
+                with pytest.raises(InvalidID):
+                    await client.single_publication('lalalalala')
+
+                with pytest.raises(InvalidID):
+                    client.iter_publications_by_person('lalalalala')
+
+        run(main())
+        assert stub.requests == []
+
+    def test_module_functions(self, stub, monkeypatch):
+        monkeypatch.setattr(biblio, 'BASE_URL', stub.url)
+        stub.routes['/person/1/publication/export'] = StubResponse(EXPORT)
+
+        async def main():
+            try:
+                return await aio.publications_by_person(1), await collect(aio.iter_publications_by_person(1))
+            finally:
+                await aio.close_default_client()
+
+        buffered, streamed = run(main())
+        assert buffered == streamed
@@ -4,7 +4,8 @@ import requests
 import pytest
 
 from biblio.biblio import publications_by_project, publications_by_organisation, search, publications_by_person, \
-    publications_by_group, BASE_URL, InvalidID, InvalidYear, single_publication, json_string_to_namedtuple
+    publications_by_group, BASE_URL, InvalidID, InvalidYear, single_publication, json_string_to_namedtuple, \
+    RecordTypeRegistry, RECORD_TYPES, set_json_backend, json_backend, JSON_BACKENDS
 
 
 class TestApi:
@@ -120,3 +121,111 @@ class TestApi:
 
         assert item.oi_nk
         assert item.lalala[0].i_d
+
+    def test_objects_with_the_same_fields_share_a_type(self):
+        string = '[{"_id":"1","size":"2"},{"_id":"3","size":"4"},{"id":"5","size":"6"}]'
+        items = json_string_to_namedtuple(string)
+
+        assert type(items[0]) is type(items[1])
+        assert type(items[1]) is type(items[2])
+        assert items[2].id == '5'
+
+    def test_record_type_registry_counts_hits_and_misses(self):
+        registry = RecordTypeRegistry(maxsize=2)
+
+        registry.get(['a', 'b'])
+        registry.get(['a', 'b'])
+        registry.get(['c'])
+        registry.get(['d'])
+        registry.get(['a', 'b'])
+
+        info = registry.info()
+        assert info.hits == 1
+        assert info.misses == 4
+        assert info.currsize == 2
+
+        registry.clear()
+        assert registry.info() == (0, 0, 2, 0)
+
+    def test_record_type_registry_keeps_used_types(self):
+        registry = RecordTypeRegistry(maxsize=2)
+        hot = registry.lookup(('_a',))
+        registry.lookup(('b',))
+
+        for _ in range(100):
+            registry.lookup(('_a',))
+
+        registry.lookup(('c',))
+
+        assert registry.lookup(('_a',)) is hot
+        assert registry.lookup(('a',)) is hot
+        assert registry.info().misses == 3
+        assert registry.info().currsize == 2
+
+        # the keys of the evicted type are forgotten as well
+        registry.lookup(('b',))
+        assert registry.info().misses == 4
+        assert ('c',) not in registry._types_by_keys  # pylint: disable=protected-access
+
+    def test_record_type_registry_is_used_by_decoder(self):
+        RECORD_TYPES.clear()
+        json_string_to_namedtuple('[{"_kind":"fullText"},{"_kind":"fullText"}]')
+
+        assert RECORD_TYPES.info().misses == 1
+        assert RECORD_TYPES.info().hits == 1
+
+    @pytest.mark.parametrize('backend', list(JSON_BACKENDS))
+    def test_json_backends_decode_the_same(self, backend):
+        string = '{"_lalala":[{"kind":"fullText","_i-d":"7175395","access":[{"_test": 1, "test2": 2.5}],"siz-e":null}, {"_kind":"fullText","_id":"123456"}],"_oi-nk": "4", "oi-nk": "5"}'
+
+        try:
+            set_json_backend(backend)
+        except ImportError:
+            pytest.skip('{0} is not installed'.format(backend))
+
+        try:
+            item = json_string_to_namedtuple(string)
+        finally:
+            set_json_backend()
+
+        assert json_backend() in JSON_BACKENDS
+        assert item._fields == ('lalala', 'oi_nk')
+        assert item.oi_nk == '5'
+        assert item.lalala[0]._fields == ('kind', 'i_d', 'access', 'siz_e')
+        assert item.lalala[0].access[0].test2 == 2.5
+        assert item.lalala[0].siz_e is None
+        assert item.lalala[1].id == '123456'
+
+    def test_unknown_json_backend(self):
+        with pytest.raises(ValueError):
+            set_json_backend('simplejson')
+
+    @pytest.mark.parametrize('backend', list(JSON_BACKENDS))
+    def test_fields_are_projected(self, backend):
+        string = ('{"_id":"1","title":"T","cite":{"apa":"a","mla":"m"},'
+                  '"author":[{"first_name":"E","last_name":"L","ugent_id":["8"]},{"last_name":"H"}]}')
+
+        try:
+            set_json_backend(backend)
+        except ImportError:
+            pytest.skip('{0} is not installed'.format(backend))
+
+        try:
+            item = json_string_to_namedtuple(string, fields=['id', 'cite', 'author.last_name'])
+        finally:
+            set_json_backend()
+
+        assert item._fields == ('id', 'cite', 'author')
+        assert item.cite.mla == 'm'
+        assert [author._fields for author in item.author] == [('last_name',), ('last_name',)]
+        assert item.author[0].last_name == 'L'
+
+    def test_missing_fields_are_left_out(self):
+        item = json_string_to_namedtuple('{"_id":"1","year":"2015"}', fields=['id', 'title'])
+
+        assert item._fields == ('id',)
+
+    def test_dotted_field_inside_kept_field(self):
+        item = json_string_to_namedtuple('{"cite":{"apa":"a","mla":"m"}}', fields=['cite', 'cite.apa'])
+
+        assert item.cite._fields == ('apa', 'mla')
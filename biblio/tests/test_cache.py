@@ -0,0 +1,286 @@
+# encoding: utf-8
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from biblio.biblio import BiblioClient
+from biblio.cache import ResponseCache, MemoryCache, SingleFlight, endpoint_of, cache_key
+from biblio.instrumentation import CallRecorder, CACHE_COALESCED
+
+from .stub import StubResponse
+
+
+EXPORT = '{"_id":"1","title":"One"}\n{"_id":"2","title":"Two"}\n'
+
+
+@pytest.fixture
+def cache(tmpdir):
+    cache = ResponseCache(str(tmpdir.join('cache.sqlite')))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def client(stub, cache):
+    with BiblioClient(base_url=stub.url, cache=cache) as client:
+        yield client
+
+
+def etag_route(body, etag='"v1"'):
+    def route(request):
+        if request.headers.get('If-None-Match') == etag:
+            return StubResponse(b'', status=304, headers={'ETag': etag})
+
+        return StubResponse(body, headers={'ETag': etag})
+
+    return route
+
+
+class TestCache:
+    def test_endpoint_of(self):
+        assert endpoint_of('https://biblio.ugent.be/publication/1') == 'publication'
+        assert endpoint_of('https://biblio.ugent.be/publication/export') == 'search'
+        assert endpoint_of('https://biblio.ugent.be/organization/PP02/2015/publication/export') == 'organisation'
+        assert endpoint_of('https://biblio.ugent.be/person/1/publication/export') == 'person'
+
+    def test_cache_key_ignores_parameter_order(self):
+        assert cache_key('u', {'q': 'a', 'format': 'json'}) == cache_key('u', {'format': 'json', 'q': 'a'})
+
+    def test_fresh_response_is_served_from_cache(self, client, stub, cache):
+        stub.routes['/person/1/publication/export'] = StubResponse(EXPORT)
+
+        first = client.publications_by_person(1)
+        second = client.publications_by_person(1)
+
+        assert first == second
+        assert len(stub.requests) == 1
+
+        stats = cache.stats()
+        assert stats.hits == 1
+        assert stats.misses == 1
+        assert stats.bytes_saved == len(EXPORT)
+        assert stats.entries == 1
+
+    def test_streamed_response_is_stored(self, client, stub, cache):
+        stub.routes['/project/LT3/publication/export'] = StubResponse(EXPORT)
+
+        streamed = list(client.iter_publications_by_project('LT3'))
+
+        assert list(client.iter_publications_by_project('LT3')) == streamed
+        assert client.publications_by_project('LT3') == streamed
+        assert len(stub.requests) == 1
+
+    def test_expired_response_is_revalidated(self, stub, cache):
+        stub.routes['/publication/1'] = etag_route('{"_id":"1"}')
+        cache.ttls['publication'] = 0
+
+        with BiblioClient(base_url=stub.url, cache=cache) as client:
+            assert client.single_publication(1).id == '1'
+            assert client.single_publication(1).id == '1'
+
+        assert 'If-None-Match' not in stub.requests[0].headers
+        assert stub.requests[1].headers['If-None-Match'] == '"v1"'
+        assert cache.stats().revalidated == 1
+
+    def test_expired_stream_is_revalidated(self, stub, cache):
+        stub.routes['/project/LT3/publication/export'] = etag_route(EXPORT)
+        cache.ttl = 0
+
+        with BiblioClient(base_url=stub.url, cache=cache) as client:
+            first = list(client.iter_publications_by_project('LT3'))
+            assert list(client.iter_publications_by_project('LT3')) == first
+
+        assert cache.stats().revalidated == 1
+
+    def test_errors_are_not_stored(self, client, stub, cache):
+        assert client.single_publication(1) is None
+        assert client.single_publication(1) is None
+
+        assert len(stub.requests) == 2
+        assert cache.stats().entries == 0
+
+    def test_least_recently_used_is_evicted(self, client, stub, cache):
+        for number in range(1, 4):
+            stub.routes['/publication/{0}'.format(number)] = StubResponse('{{"_id":"{0}"}}'.format(number))
+
+        client.single_publication(1)
+        size = cache.stats().size
+        cache.max_size = size * 2
+
+        client.single_publication(2)
+        time.sleep(0.01)
+        client.single_publication(1)
+        client.single_publication(3)
+
+        assert cache.stats().entries == 2
+        assert cache.get(client.base_url + 'publication/2', {'format': 'json'}) is None
+        assert cache.get(client.base_url + 'publication/1', {'format': 'json'}) is not None
+
+    def test_cache_is_persisted(self, client, stub, cache):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+        client.single_publication(1)
+
+        other = ResponseCache(cache.path)
+
+        with BiblioClient(base_url=stub.url, cache=other) as client:
+            assert client.single_publication(1).id == '1'
+
+        assert len(stub.requests) == 1
+        assert other.stats().hits == 1
+
+    def test_clear(self, client, stub, cache):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+        client.single_publication(1)
+        cache.clear()
+
+        assert cache.stats() == (0, 0, 0, 0, 0, 0)
+
+
+class TestMemoryCache:
+    def test_results_are_memoized(self, stub):
+        stub.routes['/person/1/publication/export'] = StubResponse(EXPORT)
+
+        with BiblioClient(base_url=stub.url, memo=MemoryCache()) as client:
+            first = client.publications_by_person(1)
+            first.pop()
+            second = client.publications_by_person(1)
+
+            assert len(second) == 2
+            assert client.cache_info() == (1, 1, 0, 1024, 1)
+
+        assert len(stub.requests) == 1
+
+    def test_unknown_ids_are_memoized(self, stub):
+        with BiblioClient(base_url=stub.url, memo=MemoryCache()) as client:
+            assert client.single_publication(1) is None
+            assert client.single_publication(1) is None
+
+            assert client.cache_info().negative_hits == 1
+
+        assert len(stub.requests) == 1
+
+    def test_results_expire(self, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+
+        with BiblioClient(base_url=stub.url, memo=MemoryCache(ttl=0.05, negative_ttl=0)) as client:
+            client.single_publication(1)
+            client.single_publication(2)
+            time.sleep(0.06)
+            client.single_publication(1)
+            client.single_publication(2)
+
+        assert len(stub.requests) == 4
+
+    def test_least_recently_used_is_dropped(self):
+        memo = MemoryCache(maxsize=2)
+        memo.set('a', 1)
+        memo.set('b', 2)
+        memo.get('a')
+        memo.set('c', 3)
+
+        assert memo.get('b') is MemoryCache.MISSING
+        assert memo.get('a') == 1
+        assert memo.cache_info().currsize == 2
+
+    def test_cache_clear(self, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+
+        with BiblioClient(base_url=stub.url, memo=MemoryCache()) as client:
+            client.single_publication(1)
+            client.cache_clear()
+            client.single_publication(1)
+
+            assert client.cache_info() == (0, 1, 0, 1024, 1)
+
+        assert len(stub.requests) == 2
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.005)
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_are_run_once(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def call():
+            calls.append(1)
+            release.wait()
+            return 'result'
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(flight.do, 'key', call) for _ in range(5)]
+            wait_for(lambda: flight.coalesced == 4)
+            release.set()
+            results = [x.result() for x in futures]
+
+        assert len(calls) == 1
+        assert sorted(results) == [('result', False)] + [('result', True)] * 4
+        assert len(flight) == 0
+
+    def test_exception_is_shared(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def call():
+            release.wait()
+            raise ValueError('failed')
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(flight.do, 'key', call) for _ in range(3)]
+            wait_for(lambda: flight.coalesced == 2)
+            release.set()
+
+            for future in futures:
+                with pytest.raises(ValueError):
+                    future.result()
+
+        assert flight.do('key', lambda: 'again') == ('again', False)
+
+    def test_identical_calls_of_a_client_are_coalesced(self, stub):
+        release = threading.Event()
+
+        def slow(request):
+            release.wait()
+            return StubResponse(EXPORT)
+
+        stub.routes['/person/1/publication/export'] = slow
+        stub.routes['/person/2/publication/export'] = StubResponse(EXPORT)
+        recorder = CallRecorder()
+
+        with BiblioClient(base_url=stub.url, hooks=[recorder]) as client:
+            with ThreadPoolExecutor(max_workers=6) as executor:
+                futures = [executor.submit(client.publications_by_person, 1) for _ in range(5)]
+                wait_for(lambda: client.flight.coalesced == 4)
+
+                other = executor.submit(client.publications_by_person, 2).result()
+                release.set()
+                results = [x.result() for x in futures]
+
+            results[0].pop()
+
+            assert len(other) == 2
+            assert [len(x) for x in results] == [1, 2, 2, 2, 2]
+            assert [x.cache_status for x in recorder.calls].count(CACHE_COALESCED) == 4
+
+        assert sorted(x.path for x in stub.requests) == ['/person/1/publication/export', '/person/2/publication/export']
+
+    def test_calls_are_not_coalesced_when_disabled(self, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+
+        with BiblioClient(base_url=stub.url, coalesce=False) as client:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                assert [x.id for x in executor.map(lambda _: client.single_publication(1), range(4))] == ['1'] * 4
+
+            assert client.flight is None
+
+        assert len(stub.requests) == 4
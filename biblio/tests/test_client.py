@@ -0,0 +1,199 @@
+# encoding: utf-8
+
+import pytest
+
+from biblio import biblio
+import time
+
+from biblio.biblio import BiblioClient, set_default_client, single_publication, InvalidID, InvalidYear, \
+    IncompleteExport
+from biblio.cache import MemoryCache
+from biblio.scheduler import RequestScheduler, TransientError
+
+from .stub import StubResponse
+
+
+@pytest.fixture
+def client(stub):
+    with BiblioClient(base_url=stub.url) as client:
+        yield client
+
+
+class TestClient:
+    def test_connection_is_reused(self, client, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+
+        for _ in range(5):
+            assert client.single_publication(1).id == '1'
+
+        assert len(stub.requests) == 5
+        assert len(set(x.connection for x in stub.requests)) == 1
+
+    def test_streamed_export_releases_connection(self, client, stub):
+        stub.routes['/project/LT3/publication/export'] = StubResponse('{"_id":"1"}\n{"_id":"2"}\n')
+
+        for _ in range(3):
+            assert len(list(client.iter_publications_by_project('LT3'))) == 2
+
+        assert len(set(x.connection for x in stub.requests)) == 1
+
+    def test_adapter_is_configured(self):
+        client = BiblioClient(pool_connections=2, pool_maxsize=20, max_retries=3, pool_block=True)
+        adapter = client.session.get_adapter('https://biblio.ugent.be/')
+
+        assert adapter._pool_maxsize == 20
+        assert adapter._pool_block is True
+        assert adapter.max_retries.total == 3
+
+    def test_missing_publication_is_none(self, client):
+        assert client.single_publication(1) is None
+
+    def test_client_validates_ids(self, client, stub):
+        with pytest.raises(InvalidID):
+            client.publications_by_group([1, 'oink'])
+
+        assert stub.requests == []
+
+    def test_module_functions_use_default_client(self, client, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+        set_default_client(client)
+
+        try:
+            assert single_publication(1).id == '1'
+        finally:
+            set_default_client(None)
+
+        assert biblio.default_client() is not client
+
+    def test_fetch_publications_keeps_order_and_deduplicates(self, client, stub):
+        for number in range(1, 6):
+            stub.routes['/publication/{0}'.format(number)] = StubResponse('{{"_id":"{0}"}}'.format(number))
+
+        results = list(client.fetch_publications([5, '3', 1, 3, 4, 2, 5], max_workers=3))
+
+        assert [x.id for x in results] == ['5', '3', '1', '4', '2']
+        assert [x.publication.id for x in results] == ['5', '3', '1', '4', '2']
+        assert len(stub.requests) == 5
+
+    def test_fetch_publications_as_completed(self, client, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+        stub.routes['/publication/2'] = StubResponse('{"_id":"2"}')
+
+        results = client.fetch_publications([1, 2, 3], ordered=False)
+
+        assert sorted(x.id for x in results) == ['1', '2', '3']
+
+    def test_fetch_publications_reports_failures(self, client, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+        stub.routes['/publication/2'] = StubResponse('not json')
+
+        results = dict((x.id, x) for x in client.fetch_publications([1, 2, 3]))
+
+        assert results['1'].publication.id == '1'
+        assert results['1'].error is None
+        assert isinstance(results['2'].error, ValueError)
+        assert results['3'].publication is None
+        assert results['3'].error is None
+
+    def test_fetch_publications_validates_before_requesting(self, client, stub):
+        with pytest.raises(InvalidID):
+            client.fetch_publications([1, 2, 'lalalalala'])
+
+        assert stub.requests == []
+
+
+def shard_path(year):
+    return '/organization/PP02/{0}/publication/export'.format(year)
+
+
+class TestShardedExport:
+    def test_shards_are_merged_without_duplicates(self, client, stub):
+        stub.routes[shard_path(2014)] = StubResponse('{"_id":"1"}\n{"_id":"2"}\n')
+        stub.routes[shard_path(2015)] = StubResponse('{"_id":"2"}\n{"_id":"3"}\n')
+        stub.routes[shard_path(2016)] = StubResponse('')
+
+        publications = client.publications_by_organisation_sharded('PP02', 2014, 2017)
+
+        assert sorted(x.id for x in publications) == ['1', '2', '3']
+        assert sorted(x.path for x in stub.requests) == [shard_path(x) for x in range(2014, 2018)]
+
+    def test_unavailable_shard_is_retried(self, stub):
+        attempts = []
+
+        def flaky(request):
+            attempts.append(request)
+            return StubResponse('{"_id":"1"}\n') if len(attempts) > 1 else StubResponse(status=503)
+
+        stub.routes[shard_path(2015)] = flaky
+
+        with BiblioClient(base_url=stub.url, scheduler=RequestScheduler(max_retries=0)) as client:
+            assert [x.id for x in client.publications_by_organisation_sharded('PP02', 2015, 2015, retries=1)] == ['1']
+
+        assert len(attempts) == 2
+
+    def test_scheduler_owns_the_retries_of_a_shard(self, stub):
+        stub.routes[shard_path(2015)] = StubResponse(status=503)
+        scheduler = RequestScheduler(max_retries=1, backoff_factor=0.01)
+
+        with BiblioClient(base_url=stub.url, scheduler=scheduler) as client:
+            with pytest.raises(IncompleteExport) as error:
+                client.publications_by_organisation_sharded('PP02', 2015, 2015)
+
+        assert isinstance(error.value.errors[2015], TransientError)
+        assert len(stub.requests) == 2
+
+    def test_failing_shard_does_not_stop_the_others(self, client, stub):
+        stub.routes[shard_path(2014)] = StubResponse('{"_id":"1"}\n')
+        stub.routes[shard_path(2015)] = StubResponse('broken')
+
+        publications = []
+
+        with pytest.raises(IncompleteExport) as error:
+            for publication in client.iter_publications_by_organisation_sharded('PP02', 2014, 2015, retries=1):
+                publications.append(publication)
+
+        assert [x.id for x in publications] == ['1']
+        assert list(error.value.errors) == [2015]
+        # invalid json is not retried
+        assert len([x for x in stub.requests if x.path == shard_path(2015)]) == 1
+
+    def test_shards_are_downloaded_in_parallel(self, client, stub):
+        stub.latency = 0.2
+
+        start = time.time()
+        client.publications_by_organisation_sharded('PP02', 2010, 2017, max_workers=8)
+
+        assert time.time() - start < 0.2 * 4
+
+    def test_years_are_validated(self, client):
+        with pytest.raises(InvalidYear):
+            client.iter_publications_by_organisation_sharded('PP02', 'test')
+
+
+class TestFields:
+    EXPORT = '{"_id":"1","title":"A","cite":{"apa":"a"}}\n{"_id":"2","title":"B","cite":{"apa":"b"}}\n'
+
+    def test_export_is_projected(self, client, stub):
+        stub.routes['/person/1/publication/export'] = StubResponse(self.EXPORT)
+
+        publications = client.publications_by_person(1, fields=['id', 'title'])
+        streamed = list(client.iter_publications_by_person(1, fields=['id']))
+
+        assert [x._fields for x in publications] == [('id', 'title')] * 2
+        assert [x.id for x in streamed] == ['1', '2']
+        assert streamed[0]._fields == ('id',)
+
+    def test_memo_is_per_projection(self, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1","title":"A"}')
+
+        with BiblioClient(base_url=stub.url, memo=MemoryCache()) as client:
+            assert client.single_publication(1, fields=['id'])._fields == ('id',)
+            assert client.single_publication(1)._fields == ('id', 'title')
+            assert client.single_publication(1, fields=['id'])._fields == ('id',)
+
+        assert len(stub.requests) == 2
+
+    def test_fields_need_the_default_decoder(self, stub):
+        with BiblioClient(base_url=stub.url, decoder=lambda text: text) as client:
+            with pytest.raises(ValueError):
+                client.single_publication(1, fields=['id'])
@@ -0,0 +1,73 @@
+# encoding: utf-8
+
+import pytest
+
+from biblio.biblio import BiblioClient
+from biblio.columnar import ColumnBuilder, Field, iter_batches, to_columns, to_dataframe, to_table, \
+    dataframe_by_person, STRING
+
+from .stub import StubResponse
+
+numpy = pytest.importorskip('numpy')
+
+LINES = [
+    b'{"_id":"1","year":"2015","type":"journalArticle","title":"Readability","doi":["10.1/1"],'
+    b'"publication":"Journal","author":[{"first_name":"Els","last_name":"Lefever"},{"name":"B"}]}',
+    b'',
+    b'{"_id":"2","type":"book","author":[{"name":"Hoste"}]}',
+    '{"_id":"3","year":"2017","title":"Vertaling"}',
+]
+
+
+class TestColumnar:
+    def test_columns(self):
+        columns = to_columns(LINES)
+
+        assert list(columns) == ['id', 'year', 'type', 'title', 'first_author', 'journal', 'doi']
+        assert list(columns['id']) == ['1', '2', '3']
+        assert columns['year'].dtype == numpy.float64
+        assert columns['year'][0] == 2015 and numpy.isnan(columns['year'][1])
+        assert list(columns['first_author']) == ['Els Lefever', 'Hoste', None]
+        assert list(columns['doi']) == ['10.1/1', None, None]
+
+    def test_custom_fields(self):
+        fields = (Field('abstract', lambda record: (record.get('abstract') or [None])[0], STRING),)
+        builder = ColumnBuilder(fields)
+        builder.append({'abstract': ['text']})
+
+        assert list(builder.columns()) == ['abstract']
+        assert len(builder) == 1
+
+    def test_batches(self):
+        batches = list(iter_batches(LINES, batch_size=2))
+
+        assert [len(batch['id']) for batch in batches] == [2, 1]
+
+    def test_dataframe(self):
+        pytest.importorskip('pandas')
+
+        frame = to_dataframe(LINES)
+
+        assert list(frame['id']) == ['1', '2', '3']
+        assert str(frame['year'].dtype) == 'Int64'
+        assert frame['year'].isna().tolist() == [False, True, False]
+
+    def test_arrow(self):
+        pyarrow = pytest.importorskip('pyarrow')
+
+        table = to_table(LINES)
+        batch, = list(iter_batches(LINES, arrow=True))
+
+        assert table.num_rows == 3
+        assert table.schema.field('year').type == pyarrow.int64()
+        assert batch.column(1).null_count == 1
+
+    def test_dataframe_by_person(self, stub):
+        pytest.importorskip('pandas')
+        stub.routes['/person/1/publication/export'] = StubResponse(b'\n'.join(LINES[:3]) + b'\n' + LINES[3].encode('utf-8'))
+
+        with BiblioClient(base_url=stub.url) as client:
+            frame = dataframe_by_person(1, client=client)
+
+        assert len(frame) == 3
+        assert stub.requests[0].params['format'] == 'json'
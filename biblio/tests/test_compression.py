@@ -0,0 +1,129 @@
+# encoding: utf-8
+
+import gzip
+import io
+import zlib
+
+import pytest
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+from biblio.biblio import BiblioClient, accept_encoding
+from biblio.instrumentation import CallRecorder
+
+from .stub import StubResponse
+
+EXPORT = ''.join('{{"_id":"{0}","title":"Machine translation","year":"2015"}}\n'.format(i) for i in range(500))
+
+
+def gzip_compress(data):
+    """gzip.compress, which Python 2 does not have"""
+    buffer = io.BytesIO()
+
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
+        f.write(data)
+
+    return buffer.getvalue()
+
+
+def compress(data, encoding):
+    if encoding == 'gzip':
+        return gzip_compress(data)
+
+    if encoding == 'br':
+        brotli = pytest.importorskip('brotli')
+        return brotli.compress(data)
+
+    if encoding == 'zstd':
+        zstd = pytest.importorskip('backports.zstd')
+        return zstd.compress(data)
+
+    return data
+
+
+def compressed_route(encoding, text):
+    body = compress(text.encode('utf-8'), encoding)
+
+    def route(request):
+        if encoding not in request.headers.get('Accept-Encoding', ''):
+            return StubResponse(text)
+
+        return StubResponse(body, headers={'Content-Encoding': encoding})
+
+    return route, body
+
+
+@pytest.fixture
+def recorder():
+    return CallRecorder()
+
+
+class TestCompression:
+    def test_encodings_are_negotiated(self, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+
+        with BiblioClient(base_url=stub.url) as client:
+            client.single_publication(1)
+
+        with BiblioClient(base_url=stub.url, compression=False) as client:
+            client.single_publication(1)
+
+        assert 'gzip' in stub.requests[0].headers['Accept-Encoding']
+        assert stub.requests[0].headers['Accept-Encoding'] == accept_encoding()
+        assert stub.requests[1].headers['Accept-Encoding'] == 'identity'
+
+    @pytest.mark.parametrize('encoding', ['gzip', 'br', 'zstd'])
+    def test_compressed_export(self, stub, recorder, encoding):
+        if encoding not in accept_encoding():
+            pytest.skip('{0} can not be decoded'.format(encoding))
+
+        route, body = compressed_route(encoding, EXPORT)
+        stub.routes['/person/1/publication/export'] = route
+
+        with BiblioClient(base_url=stub.url, hooks=[recorder]) as client:
+            publications = client.publications_by_person(1)
+            streamed = list(client.iter_publications_by_person(1))
+
+        assert len(publications) == len(streamed) == 500
+        assert publications == streamed
+
+        for stats in recorder.calls:
+            assert stats.content_encoding == encoding
+            assert stats.bytes_received == len(body)
+            assert stats.bytes_decoded == len(EXPORT)
+
+    @pytest.mark.skipif(tracemalloc is None, reason='tracemalloc needs Python 3.4')
+    def test_streamed_export_is_decompressed_incrementally(self, stub):
+        line = ('{"_id":"1","abstract":"' + 'machine translation ' * 150 + '"}\n').encode('utf-8')
+        count = 10000
+
+        def body():
+            compressor = zlib.compressobj(1, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+            for _ in range(count):
+                chunk = compressor.compress(line)
+
+                if chunk:
+                    yield chunk
+
+            yield compressor.flush()
+
+        stub.routes['/organization/LW17/publication/export'] = lambda request: StubResponse(
+            body(), headers={'Content-Encoding': 'gzip'}
+        )
+
+        with BiblioClient(base_url=stub.url) as client:
+            tracemalloc.start()
+
+            try:
+                received = sum(1 for _ in client.iter_raw(stub.url + 'organization/LW17/publication/export', {}))
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        assert received == count
+        # the export is about 30 MB after decompression
+        assert peak < 2 * 1024 * 1024
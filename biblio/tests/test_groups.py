@@ -0,0 +1,88 @@
+# encoding: utf-8
+
+import pytest
+
+from biblio.biblio import BiblioClient, IncompleteExport, InvalidID
+from biblio.groups import GroupEngine, CHUNKS
+from biblio.scheduler import RequestScheduler
+
+from .stub import StubResponse
+
+EXPORTS = {
+    '1': ['A', 'B', 'C'],
+    '2': ['B', 'C', 'D'],
+    '3': ['C', 'E'],
+}
+
+
+def export(ids):
+    return ''.join('{{"_id":"{0}","title":"Publication {0}"}}\n'.format(x) for x in ids)
+
+
+@pytest.fixture
+def client(stub):
+    for ugent_id, ids in EXPORTS.items():
+        stub.routes['/person/{0}/publication/export'.format(ugent_id)] = StubResponse(export(ids))
+
+    with BiblioClient(base_url=stub.url, scheduler=False) as client:
+        yield client
+
+
+class TestGroupEngine:
+    def test_union(self, client):
+        engine = GroupEngine(client)
+
+        assert [x.id for x in engine.union([1, 2, 3])] == ['A', 'B', 'C', 'D', 'E']
+
+    def test_shared(self, client):
+        engine = GroupEngine(client)
+
+        assert [x.id for x in engine.shared([1, 2, 3])] == ['C']
+        assert [x.id for x in engine.shared([1, 2, 3], min_people=2)] == ['B', 'C']
+
+    def test_exports_are_reused_between_groups(self, client, stub):
+        engine = GroupEngine(client)
+
+        engine.union([1, 2])
+        engine.shared([2, 3, '1'])
+
+        assert sorted(x.path for x in stub.requests) == [
+            '/person/1/publication/export', '/person/2/publication/export', '/person/3/publication/export',
+        ]
+
+    def test_projection_keeps_the_id(self, client):
+        publications = GroupEngine(client).union([1], fields=['title'])
+
+        assert [x._fields for x in publications] == [('id', 'title')] * 3
+
+    def test_chunks(self, client, stub):
+        # a group export has the publications that all the people of the group share
+        stub.routes['/group/1,2/publication/export'] = StubResponse(export(['B', 'C']))
+        stub.routes['/group/3/publication/export'] = StubResponse(export(['C', 'E']))
+        engine = GroupEngine(client, strategy=CHUNKS, chunk_size=2)
+
+        assert [x.id for x in engine.shared([1, 2, 3])] == ['C']
+        assert sorted(x.path for x in stub.requests) == ['/group/1,2/publication/export', '/group/3/publication/export']
+
+    def test_chunks_union_uses_the_people(self, client, stub):
+        engine = GroupEngine(client, strategy=CHUNKS, chunk_size=2)
+
+        assert [x.id for x in engine.union([1, 2, 3])] == ['A', 'B', 'C', 'D', 'E']
+        assert [x.id for x in engine.shared([1, 2, 3], min_people=2)] == ['B', 'C']
+        assert all(x.path.startswith('/person/') for x in stub.requests)
+
+    def test_unknown_person_has_no_publications(self, client):
+        assert [x.id for x in GroupEngine(client).union([3, 4])] == ['C', 'E']
+
+    def test_failed_exports(self, client, stub):
+        stub.routes['/person/4/publication/export'] = StubResponse('', status=503)
+        client.scheduler = RequestScheduler(max_retries=0)
+
+        with pytest.raises(IncompleteExport) as error:
+            GroupEngine(client).union([1, 4])
+
+        assert list(error.value.errors) == ['4']
+
+    def test_invalid_id(self, client):
+        with pytest.raises(InvalidID):
+            GroupEngine(client).union([1, 'abc'])
@@ -0,0 +1,67 @@
+# encoding: utf-8
+
+import json
+
+from biblio.biblio import json_string_to_namedtuple
+from biblio.index import PublicationIndex, tokenize
+from biblio.models import publication_from_json
+
+
+PUBLICATIONS = [
+    {'_id': '1', 'year': '2015', 'type': 'journalArticle', 'title': 'Machine translation of Dutch',
+     'author': [{'ugent_id': ['802000574659']}, {'ugent_id': ['802000247889']}]},
+    {'_id': '2', 'year': '2015', 'type': 'conference', 'title': 'Readability prediction',
+     'abstract': ['We predict the readability of Dutch texts with machine learning.'],
+     'author': [{'ugent_id': ['802000574659']}]},
+    {'_id': '3', 'year': '2016', 'type': 'journalArticle', 'title': 'Sentiment analysis',
+     'author': [{'first_name': 'Without', 'last_name': 'Id'}]},
+    {'_id': '4', 'title': 'No year'},
+]
+
+
+def ids(publications):
+    return [x.id for x in publications]
+
+
+class TestIndex:
+    def setup_method(self):
+        self.index = PublicationIndex(json_string_to_namedtuple(json.dumps(x)) for x in PUBLICATIONS)
+
+    def test_get(self):
+        assert self.index.get('2').title == 'Readability prediction'
+        assert self.index.get(3).id == '3'
+        assert self.index.get('5') is None
+        assert len(self.index) == 4
+
+    def test_where(self):
+        assert ids(self.index.where(year=2015)) == ['1', '2']
+        assert ids(self.index.where(year='2015', type='journalArticle')) == ['1']
+        assert ids(self.index.where(author='802000574659')) == ['1', '2']
+        assert ids(self.index.where(author=802000247889, year=2016)) == []
+        assert ids(self.index.where()) == ['1', '2', '3', '4']
+
+    def test_text(self):
+        assert ids(self.index.text('dutch')) == ['1', '2']
+        assert ids(self.index.text('Dutch machine')) == ['1', '2']
+        assert ids(self.index.text('machine learning')) == ['2']
+        assert ids(self.index.where(text='dutch', type='conference')) == ['2']
+        assert self.index.text('unknown') == []
+        assert self.index.text('  ') == []
+
+    def test_non_ascii_text(self):
+        index = PublicationIndex([
+            json_string_to_namedtuple(u'{"_id":"5","title":"Vertaling van één Überblick","abstract":["Orphée"]}'),
+        ])
+
+        assert ids(index.text(u'één')) == ['5']
+        assert ids(index.text(u'ÜBERBLICK vertaling')) == ['5']
+        assert ids(index.text(u'orphée')) == ['5']
+
+    def test_models_can_be_indexed(self):
+        index = PublicationIndex(publication_from_json(json.dumps(x)) for x in PUBLICATIONS)
+
+        assert ids(index.where(year=2015, author='802000247889')) == ['1']
+        assert ids(index.text('sentiment')) == ['3']
+
+    def test_tokenize(self):
+        assert tokenize('Orphée, De Clercq!') == set(['orphée', 'de', 'clercq'])
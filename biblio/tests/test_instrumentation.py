@@ -0,0 +1,141 @@
+# encoding: utf-8
+
+import pytest
+
+from biblio.biblio import BiblioClient
+from biblio.cache import MemoryCache, ResponseCache
+from biblio.instrumentation import CallRecorder, PrometheusCollector, TimedHTTPConnection, TimedHTTPConnectionPool, \
+    CACHE_HIT, CACHE_MEMO, CACHE_MISS
+
+from .stub import StubResponse
+
+EXPORT = '{"_id":"1","year":"2015"}\n{"_id":"2","year":"2015"}\n'
+
+
+@pytest.fixture
+def recorder():
+    return CallRecorder()
+
+
+@pytest.fixture
+def client(stub, recorder):
+    with BiblioClient(base_url=stub.url, hooks=[recorder], scheduler=False) as client:
+        yield client
+
+
+class TestInstrumentation:
+    def test_single_publication_is_measured(self, client, stub, recorder):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+
+        client.single_publication(1)
+
+        stats, = recorder.calls
+        assert stats.endpoint == 'publication'
+        assert stats.status == 200
+        assert stats.records == 1
+        assert stats.bytes_received == len('{"_id":"1"}')
+        assert stats.time_to_first_byte > 0
+        assert stats.connect_time > 0
+        assert stats.duration >= stats.decode_time
+        assert stats.cache_status is None
+        assert stats.error is None
+
+    def test_connection_is_reused(self, client, stub, recorder):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+
+        client.single_publication(1)
+        client.single_publication(1)
+
+        assert recorder.calls[1].connect_time == 0.0
+
+    def test_streamed_export_is_measured(self, client, stub, recorder):
+        stub.routes['/person/1/publication/export'] = StubResponse(EXPORT)
+
+        assert len(list(client.iter_publications_by_person(1))) == 2
+
+        stats, = recorder.calls
+        assert stats.endpoint == 'person'
+        assert stats.records == 2
+        assert stats.bytes_received == len(EXPORT)
+
+    def test_not_found_has_no_records(self, client, recorder):
+        assert client.single_publication(2) is None
+
+        stats, = recorder.calls
+        assert stats.status == 404
+        assert stats.records == 0
+
+    def test_cache_status(self, stub, recorder, tmpdir):
+        stub.routes['/person/1/publication/export'] = StubResponse(EXPORT)
+        cache = ResponseCache(str(tmpdir.join('cache.db')))
+
+        with BiblioClient(base_url=stub.url, hooks=[recorder], cache=cache, memo=MemoryCache()) as client:
+            client.publications_by_person(1)
+            client.publications_by_person(1)
+
+        with BiblioClient(base_url=stub.url, hooks=[recorder], cache=cache) as client:
+            client.publications_by_person(1)
+
+        cache.close()
+        assert [stats.cache_status for stats in recorder.calls] == [CACHE_MISS, CACHE_MEMO, CACHE_HIT]
+        assert recorder.calls[2].status is None
+
+    def test_errors_are_recorded(self, client, recorder):
+        client.base_url = 'http://127.0.0.1:1'
+
+        with pytest.raises(Exception):
+            client.single_publication(1)
+
+        stats, = recorder.calls
+        assert stats.error is not None
+
+    def test_without_hooks_nothing_is_measured(self, stub, monkeypatch):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+        stub.routes['/person/1/publication/export'] = StubResponse(EXPORT)
+        calls = []
+
+        with BiblioClient(base_url=stub.url, scheduler=False) as client:
+            get_body, send = client._get_body, client.send  # pylint: disable=protected-access
+            monkeypatch.setattr(client, '_get_body', lambda *args: calls.append(args) or get_body(*args))
+            monkeypatch.setattr(client, 'send', lambda *args, **kwargs: calls.append(kwargs) or send(*args, **kwargs))
+
+            assert client.single_publication(1).id == '1'
+            assert len(list(client.iter_publications_by_person(1))) == 2
+
+            pool = client.session.get_adapter(stub.url).poolmanager.connection_from_url(stub.url)
+
+        assert not isinstance(pool, TimedHTTPConnectionPool)
+        assert not issubclass(pool.ConnectionCls, TimedHTTPConnection)
+        # no stats are passed, and the body is not streamed to measure its transfer
+        assert calls[0][2] is None
+        assert calls[1]['stream'] is False
+        assert calls[1]['stats'] is None
+        assert calls[2]['stats'] is None
+
+    def test_hooks_can_be_added_later(self, stub):
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+        recorder = CallRecorder()
+
+        with BiblioClient(base_url=stub.url, scheduler=False) as client:
+            client.single_publication(1)
+            client.add_hook(recorder)
+            client.single_publication(2)
+
+        stats, = recorder.calls
+        assert stats.connect_time > 0
+
+
+class TestPrometheusCollector:
+    def test_render(self, client, stub):
+        collector = PrometheusCollector(buckets=(0.1, 10))
+        client.add_hook(collector)
+        stub.routes['/publication/1'] = StubResponse('{"_id":"1"}')
+
+        client.single_publication(1)
+        client.single_publication(1)
+
+        text = collector.render()
+        assert 'biblio_requests_total{endpoint="publication",status="200",cache="none"} 2' in text
+        assert 'biblio_records_total{endpoint="publication"} 2' in text
+        assert 'biblio_decode_seconds_bucket{endpoint="publication",le="10"} 2' in text
+        assert 'biblio_decode_seconds_count{endpoint="publication"} 2' in text
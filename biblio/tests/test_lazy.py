@@ -0,0 +1,93 @@
+# encoding: utf-8
+
+import pickle
+
+import pytest
+
+from biblio import lazy
+from biblio.biblio import BiblioClient, json_string_to_namedtuple, json_loads
+from biblio.lazy import LazyRecord, lazy_from_json
+
+from .stub import StubResponse
+
+PUBLICATION = ('{"_id":"1","title":"Readability","cite":{"apa":"a","chicago-author-date":"c"},'
+               '"author":[{"first_name":"Els","last_name":"Lefever","ugent_id":["8"]}],"keyword":[],"doi":null}')
+
+
+class TestLazyRecord:
+    def test_same_attributes_as_namedtuple(self):
+        record = lazy_from_json(PUBLICATION)
+        expected = json_string_to_namedtuple(PUBLICATION)
+
+        assert record._fields == expected._fields
+        assert record == expected
+        assert tuple(record) == tuple(expected)
+        assert record.cite.chicago_author_date == 'c'
+        assert record[0] == '1'
+        assert len(record) == len(expected)
+
+    def test_nested_values_are_decoded_on_access(self):
+        record = lazy_from_json(PUBLICATION.encode('utf-8'))
+
+        assert set(record._pending) == {'cite', 'author'}
+        assert record.keyword == []
+        assert record.author[0].ugent_id == ['8']
+        assert record.author is record.author
+        assert record.cite.apa == 'a'
+        assert record._pending == {}
+        assert record._raw is None
+
+    def test_json_is_decoded_once(self, monkeypatch):
+        record = lazy_from_json(PUBLICATION)
+        decoded = []
+        monkeypatch.setattr(lazy, 'json_loads', lambda raw: decoded.append(raw) or json_loads(raw))
+
+        assert record.author[0].last_name == 'Lefever'
+        assert record.cite.apa == 'a'
+        assert len(decoded) == 1
+
+    def test_missing_field_raises_attribute_error(self):
+        record = lazy_from_json(PUBLICATION)
+
+        with pytest.raises(AttributeError):
+            record.abstract
+
+    def test_duplicate_keys_after_normalizing(self):
+        record = lazy_from_json('{"_oi-nk":{"a":1},"oi-nk":"5"}')
+
+        assert record._fields == ('oi_nk',)
+        assert record.oi_nk == '5'
+
+    def test_invalid_json(self):
+        with pytest.raises(ValueError):
+            lazy_from_json('{"_id":"1"}\n{"_id":"2"}')
+
+        with pytest.raises(ValueError):
+            LazyRecord('[1]')
+
+    def test_list_is_decoded_to_namedtuples(self):
+        assert lazy_from_json('[{"_id":"1"}]')[0].id == '1'
+
+    def test_pickle(self):
+        record = lazy_from_json(PUBLICATION)
+
+        assert pickle.loads(pickle.dumps(record)) == record
+
+        record.author
+        restored = pickle.loads(pickle.dumps(record))
+
+        assert restored == record
+        assert restored.cite.chicago_author_date == 'c'
+
+    def test_client_decoder(self, stub):
+        stub.routes['/person/1/publication/export'] = StubResponse(PUBLICATION + '\n' + PUBLICATION + '\n')
+        stub.routes['/publication/1'] = StubResponse(PUBLICATION)
+
+        with BiblioClient(base_url=stub.url, decoder=lazy_from_json) as client:
+            publications = client.publications_by_person(1)
+            streamed = list(client.iter_publications_by_person(1))
+            publication = client.single_publication(1)
+
+        assert [x.title for x in publications + streamed] == ['Readability'] * 4
+        assert isinstance(publication, LazyRecord)
+        assert publication.author[0].last_name == 'Lefever'
@@ -0,0 +1,129 @@
+# encoding: utf-8
+
+import datetime
+import json
+
+import pytest
+
+from biblio.biblio import BiblioClient, IncompleteExport
+from biblio.mirror import Mirror, ORGANISATION
+
+from .stub import StubResponse
+
+
+THIS_YEAR = datetime.date.today().year
+
+
+def export(*publications):
+    return ''.join(json.dumps(x) + '\n' for x in publications)
+
+
+def publication(number, year, title='Title', publication_type='journalArticle'):
+    return {'_id': str(number), 'year': str(year), 'title': title, 'type': publication_type}
+
+
+@pytest.fixture
+def mirror(stub, tmpdir):
+    mirror = Mirror(str(tmpdir.join('mirror.sqlite')), client=BiblioClient(base_url=stub.url))
+    yield mirror
+    mirror.close()
+
+
+class TestMirror:
+    def test_first_sync_downloads_full_export(self, mirror, stub):
+        stub.routes['/organization/PP02/publication/export'] = StubResponse(export(
+            publication(1, 2010), publication(2, THIS_YEAR), publication(3, THIS_YEAR, publication_type='book'),
+        ))
+
+        result = mirror.sync_organisation('PP02')
+
+        assert result.full
+        assert result.publications == 3
+        assert [x.id for x in mirror.publications_by_organisation('PP02')] == ['1', '2', '3']
+        assert [x.id for x in mirror.publications_by_organisation('PP02', year=THIS_YEAR)] == ['2', '3']
+        assert [x.id for x in mirror.publications(ORGANISATION, 'PP02', publication_type='book')] == ['3']
+        assert mirror.synced_at(ORGANISATION, 'PP02') is not None
+
+    def test_later_syncs_only_download_recent_years(self, mirror, stub):
+        stub.routes['/organization/PP02/publication/export'] = StubResponse(export(
+            publication(1, 2010), publication(2, THIS_YEAR), publication(3, THIS_YEAR),
+        ))
+        mirror.sync_organisation('PP02')
+
+        stub.routes['/organization/PP02/{0}/publication/export'.format(THIS_YEAR - 1)] = StubResponse(export())
+        stub.routes['/organization/PP02/{0}/publication/export'.format(THIS_YEAR)] = StubResponse(export(
+            publication(2, THIS_YEAR, title='Updated'), publication(4, THIS_YEAR),
+        ))
+        result = mirror.sync_organisation('PP02')
+
+        assert not result.full
+        assert result.years == [THIS_YEAR - 1, THIS_YEAR]
+        assert [x.path for x in stub.requests[1:]] == [
+            '/organization/PP02/{0}/publication/export'.format(THIS_YEAR - 1),
+            '/organization/PP02/{0}/publication/export'.format(THIS_YEAR),
+        ]
+
+        publications = mirror.publications_by_organisation('PP02')
+        assert [x.id for x in publications] == ['1', '2', '4']
+        assert publications[1].title == 'Updated'
+
+    def test_publications_are_shared_between_scopes(self, mirror, stub):
+        stub.routes['/person/1/publication/export'] = StubResponse(export(publication(1, 2015)))
+        stub.routes['/project/LT3/publication/export'] = StubResponse(export(
+            publication(1, 2015, title='Updated'), publication(2, 2016),
+        ))
+
+        mirror.sync_person('1')
+        mirror.sync_project('LT3')
+
+        assert mirror.publications_by_person(1)[0].title == 'Updated'
+        assert len(mirror.publications_by_project('LT3')) == 2
+        assert mirror.publication(2).year == '2016'
+        assert mirror.publication(3) is None
+
+    def test_mirror_is_persisted(self, mirror, stub):
+        stub.routes['/project/LT3/publication/export'] = StubResponse(export(publication(1, 2015)))
+        mirror.sync_project('LT3')
+
+        other = Mirror(mirror.path, client=mirror.client)
+
+        assert [x.id for x in other.publications_by_project('LT3')] == ['1']
+
+    def test_failed_full_sync_keeps_the_publications(self, mirror, stub):
+        stub.routes['/organization/PP02/publication/export'] = StubResponse(export(
+            publication(1, 2010), publication(2, THIS_YEAR),
+        ))
+        mirror.sync_organisation('PP02')
+
+        stub.routes['/organization/PP02/publication/export'] = StubResponse(b'Forbidden', status=403)
+
+        with pytest.raises(IncompleteExport) as error:
+            mirror.sync_organisation('PP02', full=True)
+
+        assert error.value.errors == {None: 403}
+        assert [x.id for x in mirror.publications_by_organisation('PP02')] == ['1', '2']
+
+    def test_failed_sync_of_a_year_keeps_its_publications(self, mirror, stub):
+        stub.routes['/organization/PP02/publication/export'] = StubResponse(export(
+            publication(1, THIS_YEAR - 1), publication(2, THIS_YEAR),
+        ))
+        mirror.sync_organisation('PP02')
+
+        stub.routes['/organization/PP02/{0}/publication/export'.format(THIS_YEAR - 1)] = StubResponse(status=404)
+
+        with pytest.raises(IncompleteExport) as error:
+            mirror.sync_organisation('PP02')
+
+        assert error.value.errors == {THIS_YEAR - 1: 404}
+        assert [x.id for x in mirror.publications_by_organisation('PP02')] == ['1', '2']
+
+    def test_failed_sync_of_a_person_keeps_the_publications(self, mirror, stub):
+        stub.routes['/person/1/publication/export'] = StubResponse(export(publication(1, 2015)))
+        mirror.sync_person('1')
+
+        stub.routes['/person/1/publication/export'] = StubResponse(status=400)
+
+        with pytest.raises(IncompleteExport):
+            mirror.sync_person('1')
+
+        assert [x.id for x in mirror.publications_by_person(1)] == ['1']
@@ -0,0 +1,72 @@
+# encoding: utf-8
+
+import json
+import pickle
+
+from biblio.biblio import BiblioClient, json_string_to_namedtuple
+from biblio.models import Publication, Author, Cite, publication_from_json
+
+from .stub import StubResponse
+
+
+PUBLICATION = {
+    '_id': '7175390',
+    'title': 'Title',
+    'year': '2016',
+    'author': [{'first_name': 'Orphée', 'last_name': 'De Clercq', 'ugent_id': ['802000574659']}],
+    'cite': {'chicago-author-date': 'De Clercq, Orphée. 2016.'},
+    'file': [{'kind': 'fullText', '_id': '1', 'access': 'open'}],
+    'unknown-field': {'_a': 1},
+}
+
+
+class TestModels:
+    def test_publication_from_dict(self):
+        publication = Publication.from_dict(json.loads(json.dumps(PUBLICATION)))
+
+        assert publication.id == '7175390'
+        assert isinstance(publication.author[0], Author)
+        assert publication.author[0].ugent_id == ['802000574659']
+        assert isinstance(publication.cite, Cite)
+        assert publication.cite.chicago_author_date == 'De Clercq, Orphée. 2016.'
+        assert publication.file[0].id == '1'
+        assert publication.extra == {'unknown_field': {'_a': 1}}
+
+    def test_missing_fields_are_none(self):
+        publication = publication_from_json('{"_id": "1", "cite": {}}')
+
+        assert publication.title is None
+        assert publication.cite.apa is None
+        assert publication.extra is None
+
+    def test_records_have_no_dict(self):
+        publication = publication_from_json(json.dumps(PUBLICATION))
+
+        assert not hasattr(publication, '__dict__')
+        assert not hasattr(publication.author[0], '__dict__')
+
+    def test_same_values_as_namedtuple(self):
+        string = json.dumps(PUBLICATION)
+        publication = publication_from_json(string)
+        item = json_string_to_namedtuple(string)
+
+        assert publication.title == item.title
+        assert publication.author[0].last_name == item.author[0].last_name
+        assert publication.cite.chicago_author_date == item.cite.chicago_author_date
+
+    def test_asdict_and_pickle(self):
+        publication = publication_from_json(json.dumps(PUBLICATION))
+
+        assert publication._asdict()['author'][0]['last_name'] == 'De Clercq'
+        assert publication._asdict()['unknown_field'] == {'_a': 1}
+        assert pickle.loads(pickle.dumps(publication)) == publication
+
+    def test_client_decoder(self, stub):
+        stub.routes['/person/1/publication/export'] = StubResponse('{"_id":"1"}\n{"_id":"2"}\n')
+
+        with BiblioClient(base_url=stub.url, decoder=publication_from_json) as client:
+            buffered = client.publications_by_person(1)
+            streamed = list(client.iter_publications_by_person(1))
+
+        assert buffered == streamed
+        assert [type(x) for x in buffered] == [Publication, Publication]
@@ -0,0 +1,144 @@
+# encoding: utf-8
+
+import json
+
+import pytest
+
+from biblio.biblio import BiblioClient, IncompleteExport
+from biblio.paging import PagedSearch
+
+from .stub import StubResponse
+
+
+class SearchRoute(object):
+    """Serves the ids, paged with the start and limit parameters"""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.fail_at = None
+        self.ignore_paging = False
+
+    def __call__(self, request):
+        start = int(request.params.get('start', 0))
+        limit = int(request.params.get('limit', len(self.ids)))
+
+        if start == self.fail_at:
+            return StubResponse('', status=404)
+
+        if self.ignore_paging:
+            start, limit = 0, len(self.ids)
+
+        return StubResponse(''.join(
+            '{{"_id":"{0}","title":"{1}"}}\n'.format(x, request.params.get('q')) for x in self.ids[start:start + limit]
+        ))
+
+
+@pytest.fixture
+def route(stub):
+    stub.routes['/publication/export'] = SearchRoute([str(x) for x in range(25)])
+    return stub.routes['/publication/export']
+
+
+@pytest.fixture
+def client(stub):
+    with BiblioClient(base_url=stub.url, scheduler=False) as client:
+        yield client
+
+
+class TestPagedSearch:
+    def test_pages(self, client, route, stub):
+        search = PagedSearch('translation', page_size=10, client=client)
+
+        assert [len(page) for page in search.pages()] == [10, 10, 5]
+        assert search.done
+        assert search.offset == 25
+        assert stub.requests[0].params == {'q': 'translation', 'start': '0', 'limit': '10', 'format': 'json'}
+
+    def test_resume_from_checkpoint(self, client, route, tmpdir):
+        path = str(tmpdir.join('search.json'))
+        route.fail_at = 19
+        ids = []
+
+        with pytest.raises(IncompleteExport):
+            for publication in PagedSearch('translation', page_size=10, checkpoint=path, client=client):
+                ids.append(publication.id)
+
+        with open(path) as f:
+            assert json.load(f) == {'query': 'translation', 'offset': 20, 'last_id': '19', 'done': False}
+
+        route.fail_at = None
+        search = PagedSearch('translation', page_size=10, checkpoint=path, client=client)
+        ids.extend(publication.id for publication in search)
+
+        assert ids == [str(x) for x in range(25)]
+        assert search.done
+        assert list(PagedSearch('translation', checkpoint=path, client=client)) == []
+
+    def test_resume_after_the_results_moved(self, client, route, tmpdir):
+        path = str(tmpdir.join('search.json'))
+        search = PagedSearch('translation', page_size=10, checkpoint=path, client=client)
+        pages = search.pages()
+        first = next(pages)
+        next(pages)  # the first page was handled
+
+        route.ids.insert(0, 'new')
+        rest = list(PagedSearch('translation', page_size=10, checkpoint=path, client=client))
+
+        assert [x.id for x in first + rest] == [str(x) for x in range(25)]
+
+    def test_resume_after_a_publication_was_removed(self, client, route, tmpdir):
+        path = str(tmpdir.join('search.json'))
+        search = PagedSearch('translation', page_size=10, checkpoint=path, client=client)
+        pages = search.pages()
+        first = next(pages)
+        next(pages)  # the first page was handled
+
+        route.ids.remove('3')
+        rest = list(PagedSearch('translation', page_size=10, checkpoint=path, client=client))
+
+        assert [x.id for x in first + rest] == [str(x) for x in range(25)]
+
+    def test_paging_is_ignored(self, client, route, stub):
+        route.ignore_paging = True
+        search = PagedSearch('translation', page_size=10, client=client)
+
+        with pytest.raises(IncompleteExport):
+            list(search)
+
+        assert len(stub.requests) == 1
+        assert search.offset == 0
+        assert not search.done
+
+    def test_empty_page_is_the_last(self, client, route):
+        search = PagedSearch('translation', page_size=5, client=client)
+
+        assert [len(page) for page in search.pages()] == [5, 5, 5, 5, 5, 0]
+        assert search.done
+
+    def test_checkpoint_of_non_ascii_query(self, client, route, tmpdir):
+        path = str(tmpdir.join('search.json'))
+        search = PagedSearch(u'vertaling één', page_size=10, checkpoint=path, client=client)
+        pages = search.pages()
+        next(pages)
+        next(pages)
+
+        resumed = PagedSearch(u'vertaling één', page_size=10, checkpoint=path, client=client)
+
+        assert resumed.offset == 10
+        assert not tmpdir.join('search.json.tmp').exists()
+
+    def test_checkpoint_of_other_query(self, client, route, tmpdir):
+        path = str(tmpdir.join('search.json'))
+        list(PagedSearch('translation', page_size=10, checkpoint=path, client=client))
+
+        with pytest.raises(ValueError):
+            PagedSearch('corpus', checkpoint=path, client=client)
+
+    def test_reset(self, client, route, tmpdir):
+        path = tmpdir.join('search.json')
+        search = PagedSearch('translation', page_size=10, checkpoint=str(path), client=client)
+        list(search)
+        search.reset()
+
+        assert not path.exists()
+        assert len(list(search)) == 25
@@ -0,0 +1,66 @@
+# encoding: utf-8
+
+import pytest
+
+from biblio.biblio import BiblioClient
+from biblio.models import Publication, publication_from_json
+from biblio.pipeline import DecodePipeline
+
+from .stub import StubResponse
+
+
+def lines(count):
+    return ['{{"_id":"{0}","title":"Publication {0}","author":[{{"last_name":"Doe"}}]}}'.format(x)
+            for x in range(count)]
+
+
+@pytest.fixture
+def pipeline():
+    with DecodePipeline(max_workers=2, batch_size=7) as pipeline:
+        yield pipeline
+
+
+class TestDecodePipeline:
+    def test_decode_keeps_the_order(self, pipeline):
+        records = list(pipeline.decode(lines(100)))
+
+        assert all(isinstance(x, Publication) for x in records)
+        assert [x.id for x in records] == [str(x) for x in range(100)]
+        assert records == [publication_from_json(x) for x in lines(100)]
+
+    def test_decode_skips_empty_lines(self, pipeline):
+        assert [x.id for x in pipeline.decode(['', lines(1)[0], b''])] == ['0']
+
+    def test_decode_bytes(self, pipeline):
+        assert [x.author[0].last_name for x in pipeline.decode([x.encode('utf-8') for x in lines(3)])] == ['Doe'] * 3
+
+    def test_errors_are_raised(self, pipeline):
+        with pytest.raises(ValueError):
+            list(pipeline.decode(lines(10) + ['{not json']))
+
+    def test_stop_early(self, pipeline):
+        records = pipeline.decode(lines(1000))
+
+        assert next(records).id == '0'
+        records.close()
+
+        # the pool can still be used
+        assert len(list(pipeline.decode(lines(10)))) == 10
+
+    def test_export(self, stub, pipeline):
+        stub.routes['/organization/PP02/publication/export'] = StubResponse('\n'.join(lines(50)) + '\n')
+
+        with BiblioClient(base_url=stub.url, scheduler=False) as client:
+            pipeline.client = client
+            records = list(pipeline.iter_publications_by_organisation('PP02'))
+
+        assert [x.id for x in records] == [str(x) for x in range(50)]
+
+    def test_close(self):
+        pipeline = DecodePipeline(max_workers=1)
+
+        assert list(pipeline.decode(lines(2)))[1].id == '1'
+        pipeline.close()
+        pipeline.close()
+
+        assert pipeline._executor is None
@@ -0,0 +1,129 @@
+# encoding: utf-8
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from biblio.biblio import BiblioClient, TransientError
+from biblio.scheduler import RequestScheduler, TokenBucket, retry_after
+
+from .stub import StubResponse, StubServer, failing
+
+
+@pytest.fixture
+def client(stub):
+    with BiblioClient(base_url=stub.url, scheduler=RequestScheduler(max_retries=2, backoff_factor=0.01)) as client:
+        yield client
+
+
+class FakeResponse(object):
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class TestScheduler:
+    def test_unavailable_is_retried(self, client, stub):
+        stub.routes['/publication/1'] = failing(StubResponse(status=503), StubResponse(status=502))
+
+        assert client.single_publication(1).id == '1'
+        assert len(stub.requests) == 3
+
+    def test_retry_after_is_honoured(self, client, stub):
+        stub.routes['/publication/1'] = failing(StubResponse(status=429, headers={'Retry-After': '1'}))
+        client.scheduler.max_retry_after = 0.3
+
+        start = time.time()
+        assert client.single_publication(1).id == '1'
+        assert time.time() - start >= 0.3
+
+    def test_transient_failure_raises(self, client, stub):
+        stub.routes['/publication/1'] = StubResponse(status=503)
+
+        with pytest.raises(TransientError) as error:
+            client.single_publication(1)
+
+        assert error.value.status == 503
+        assert len(stub.requests) == 3
+
+    def test_not_found_is_not_retried(self, client, stub):
+        assert client.single_publication(1) is None
+        assert len(stub.requests) == 1
+
+    def test_connection_error_raises(self):
+        server = StubServer().start()
+        server.stop()
+
+        with BiblioClient(base_url=server.url, scheduler=RequestScheduler(max_retries=1, backoff_factor=0.01)) as client:
+            with pytest.raises(TransientError) as error:
+                client.single_publication(1)
+
+        assert error.value.status is None
+
+    def test_streaming_is_retried(self, client, stub):
+        stub.routes['/project/LT3/publication/export'] = failing(StubResponse(status=503))
+
+        assert [x.id for x in client.iter_publications_by_project('LT3')] == ['1']
+
+    def test_exhausted_stream_releases_the_connection(self, stub):
+        stub.routes['/project/LT3/publication/export'] = StubResponse(status=503)
+        scheduler = RequestScheduler(max_retries=1, backoff_factor=0.01)
+
+        with BiblioClient(base_url=stub.url, scheduler=scheduler, pool_maxsize=1, pool_block=True) as client:
+            with pytest.raises(TransientError):
+                list(client.iter_publications_by_project('LT3'))
+
+            # with the connection still checked out, the next call waits for it forever
+            thread = threading.Thread(target=client.single_publication, args=(1,))
+            thread.daemon = True
+            thread.start()
+            thread.join(5)
+
+            assert not thread.is_alive()
+
+    def test_retries_can_be_disabled(self, stub):
+        stub.routes['/publication/1'] = StubResponse(status=503)
+
+        with BiblioClient(base_url=stub.url, scheduler=False) as client:
+            assert client.single_publication(1) is None
+
+    def test_rate_is_shared_between_threads(self, stub):
+        for x in range(10):
+            stub.routes['/publication/{0}'.format(x)] = StubResponse('{{"_id":"{0}"}}'.format(x))
+
+        scheduler = RequestScheduler(rate=20, burst=1)
+
+        with BiblioClient(base_url=stub.url, scheduler=scheduler) as client:
+            start = time.time()
+
+            # different ids, identical calls would be coalesced
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                list(executor.map(client.single_publication, range(10)))
+
+        assert time.time() - start >= 9 / 20.0
+
+    def test_token_bucket(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0])
+
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0.5
+        assert bucket.reserve() == 1.0
+
+        now[0] = 10
+        assert bucket.reserve() == 0
+
+    def test_backoff_has_jitter_and_a_maximum(self):
+        scheduler = RequestScheduler(backoff_factor=1, max_backoff=4)
+        waits = [scheduler.backoff(5) for _ in range(100)]
+
+        assert all(0 <= x <= 4 for x in waits)
+        assert len(set(waits)) > 1
+
+    def test_retry_after(self):
+        assert retry_after(FakeResponse({'Retry-After': '3'})) == 3
+        assert retry_after(FakeResponse({})) is None
+        assert retry_after(FakeResponse({'Retry-After': 'Wed, 21 Oct 2015 07:28:10 GMT'}), now=1445412480) == 10
+        assert retry_after(FakeResponse({'Retry-After': 'soon'})) is None
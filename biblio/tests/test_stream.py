@@ -0,0 +1,148 @@
+# encoding: utf-8
+
+import threading
+
+import pytest
+
+from biblio import biblio
+from biblio.biblio import iter_publications_by_person, iter_publications_by_organisation, iter_search, \
+    publications_by_project, publications_by_person, parse_result, iter_ndjson, json_string_to_namedtuple, InvalidID, \
+    BiblioClient
+
+from .stub import StubResponse
+
+
+EXPORT = '{"_id":"1","title":"One"}\n{"_id":"2","title":"Two"}\n{"_id":"3","title":"Three"}\n'
+
+
+@pytest.fixture
+def api(stub, monkeypatch):
+    monkeypatch.setattr(biblio, 'BASE_URL', stub.url)
+    return stub
+
+
+class TestStream:
+    def test_iter_yields_every_record(self, api):
+        api.routes['/person/802000574659/publication/export'] = StubResponse(EXPORT)
+
+        items = list(iter_publications_by_person('802000574659'))
+
+        assert [x.id for x in items] == ['1', '2', '3']
+        assert api.requests[0].params['format'] == 'json'
+
+    def test_iter_matches_buffered_result(self, api):
+        api.routes['/project/LT3/publication/export'] = StubResponse(EXPORT)
+
+        assert list(biblio.iter_publications_by_project('LT3')) == publications_by_project('LT3')
+
+    def test_iter_search_passes_query(self, api):
+        api.routes['/publication/export'] = StubResponse(EXPORT)
+
+        assert len(list(iter_search('translation'))) == 3
+        assert api.requests[0].params['q'] == 'translation'
+
+    def test_iter_unknown_organisation_is_empty(self, api):
+        assert list(iter_publications_by_organisation('NOPE', 2015)) == []
+        assert api.requests[0].path == '/organization/NOPE/2015/publication/export'
+
+    def test_iter_validates_before_iterating(self, api):
+        with pytest.raises(InvalidID):
+            iter_publications_by_person('lalalalala')
+
+        assert api.requests == []
+
+    def test_first_record_is_available_before_the_export_ends(self, api):
+        release = threading.Event()
+
+        def chunks():
+            yield '{"_id":"1"}\n'
+            release.wait(5)
+            yield '{"_id":"2"}\n'
+
+        api.routes['/person/1/publication/export'] = lambda request: StubResponse(chunks())
+
+        items = iter_publications_by_person(1)
+        first = next(items)
+        assert not release.is_set()
+        release.set()
+
+        assert first.id == '1'
+        assert [x.id for x in items] == ['2']
+
+    def test_export_with_one_publication_is_a_list(self, api):
+        api.routes['/person/1/publication/export'] = StubResponse('{"_id":"1"}\n')
+
+        assert [x.id for x in publications_by_person(1)] == ['1']
+
+    def test_export_is_not_decoded_as_a_whole(self):
+        decoded = []
+
+        def decoder(string):
+            decoded.append(string)
+            return json_string_to_namedtuple(string)
+
+        assert len(parse_result(EXPORT, decoder, many=True)) == 3
+        assert len(decoded) == 3
+
+        del decoded[:]
+        assert len(parse_result(EXPORT, decoder)) == 3
+        assert len(decoded) == 4
+
+    def test_iter_ndjson(self):
+        assert list(iter_ndjson('a\n\nb\n  \nc')) == ['a', 'b', 'c']
+        assert list(iter_ndjson('a\r\nb\r\n')) == ['a\r', 'b\r']
+        assert list(iter_ndjson('')) == []
+
+    def test_iter_ndjson_bytes(self):
+        assert list(iter_ndjson(b'a\n\nb\n  \nc')) == [b'a', b'b', b'c']
+        assert list(iter_ndjson(b'')) == []
+
+    def test_bytes_are_decoded_for_str_decoders(self):
+        decoded = []
+
+        def decoder(string):
+            decoded.append(string)
+            return json_string_to_namedtuple(string)
+
+        assert [x.id for x in parse_result(EXPORT.encode('utf-8'), decoder, many=True)] == ['1', '2', '3']
+        assert all(isinstance(x, str) for x in decoded)
+
+    def test_bytes_are_given_to_bytes_decoders(self):
+        decoded = []
+
+        def decoder(string):
+            decoded.append(string)
+            return json_string_to_namedtuple(string)
+
+        decoder.accepts_bytes = True
+
+        assert parse_result(EXPORT.encode('utf-8'), decoder, many=True) == parse_result(EXPORT, many=True)
+        assert all(isinstance(x, bytes) for x in decoded)
+
+    def test_no_bytes_when_the_json_backend_does_not_accept_them(self, monkeypatch):
+        decoded = []
+
+        def decoder(string):
+            decoded.append(string)
+            return json_string_to_namedtuple(string)
+
+        decoder.accepts_bytes = True
+        biblio.set_json_backend()
+        monkeypatch.setitem(biblio._JSON_BACKEND, 'bytes', False)
+
+        assert len(parse_result(EXPORT.encode('utf-8'), decoder, many=True)) == 3
+        assert all(isinstance(x, str) for x in decoded)
+
+    def test_body_is_not_decoded_to_text(self, stub, monkeypatch):
+        stub.routes['/person/802000574659/publication/export'] = StubResponse(
+            u'{"_id":"1","title":"Één"}\n', headers={'Content-Type': 'application/json'}
+        )
+
+        def text(response):
+            raise AssertionError('the charset should not be guessed')
+
+        monkeypatch.setattr('requests.Response.text', property(text))
+
+        with BiblioClient(base_url=stub.url, scheduler=False) as client:
+            assert client.publications_by_person('802000574659')[0].title == u'Één'
+            assert [x.title for x in client.iter_publications_by_person('802000574659')] == [u'Één']
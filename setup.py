@@ -26,7 +26,14 @@ setup(name='ugentbiblio',
       license='Apache',
       install_requires=[
           'requests',
+          'futures; python_version < "3"',
       ],
+      extras_require={
+          'aio': ['aiohttp; python_version >= "3.7"'],
+          'fast': ['orjson'],
+          'dataframe': ['numpy', 'pandas', 'pyarrow'],
+          'compression': ['brotli', 'backports.zstd; python_version < "3.14"'],
+      },
       setup_requires=['pytest-runner'],
       test_suite='pytest',
       include_package_data=True,